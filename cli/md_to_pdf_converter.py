@@ -7,31 +7,85 @@ Fecha: 2024
 
 import argparse
 import logging
-import re
 import sys
 import glob
 import os
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import asdict
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 
-import markdown
-import yaml
 from colorama import Fore, Style, init as colorama_init
 import difflib
 
-from core.config_manager import ConfigManager, ConversionConfig
-from core.exporter import export_pdf
-from core.parser import extract_metadata
-from core.renderer import (insert_automatic_toc, markdown_to_html,
-                           safe_update_metadata)
+from core.cache import AssetCache, RenderCache, hash_key, library_versions
+from core.config_manager import ConfigManager, ConversionConfig, DiscoveryConfig, ValidationConfig
+from core.discovery import MarkdownDiscovery
+from core.document import Document
+from core.exporter import export_pdf, export_pdf_chunks, get_exporter
+from core.renderer import (SVG_EMOJI_CSS, get_markdown_engine,
+                           insert_automatic_toc, render_markdown, split_html_sections)
 from core.validator import MarkdownValidator
-from core.image_processor import process_html_images
+from core.image_processor import ImageProcessor, find_local_images, find_remote_images, process_html_images
+from core.manifest import DependencyManifest
+from core.print_layout import PrintLayout
+from core.supervisor import ResourceLimitError, SupervisedPool
 
 colorama_init(autoreset=True)
 
 class MarkdownToPDFConverter:
     """Clase principal para convertir archivos Markdown a PDF"""
     
+    markdown_extensions = [
+        # Sintaxis básica (ya soportada por defecto)
+        # - Headings (# ## ###)
+        # - Paragraphs
+        # - Line breaks
+        # - Emphasis (bold, italic)
+        # - Links
+        # - Images
+        # - Escaping characters
+        
+        # Extensiones para sintaxis extendida
+        # (la tabla de contenidos la genera insert_automatic_toc, no la extensión 'toc')
+        'markdown.extensions.tables',           # Tablas
+        'markdown.extensions.fenced_code',      # Bloques de código con ```
+        'markdown.extensions.codehilite',       # Resaltado de sintaxis
+        'markdown.extensions.attr_list',        # Atributos HTML
+        'markdown.extensions.def_list',         # Listas de definición
+        'markdown.extensions.footnotes',        # Notas al pie
+        'markdown.extensions.md_in_html',       # Markdown dentro de HTML
+        'markdown.extensions.nl2br',            # Saltos de línea
+        'markdown.extensions.sane_lists',       # Listas mejoradas
+        'markdown.extensions.smarty',           # Comillas inteligentes
+        'markdown.extensions.abbr',             # Abreviaciones
+        'markdown.extensions.admonition',       # Advertencias/notas
+        'markdown.extensions.legacy_attrs',     # Atributos legacy
+        'markdown.extensions.legacy_em',        # Énfasis legacy
+        'markdown.extensions.meta',             # Metadatos
+        'markdown.extensions.wikilinks',        # Enlaces tipo wiki
+    ]
+    
+    markdown_extension_configs = {
+        'codehilite': {
+            'css_class': 'highlight',
+            'use_pygments': True,
+            'noclasses': True,
+            'linenums': False,
+            'guess_lang': True,
+        },
+        'footnotes': {
+            'PLACE_MARKER': '///Footnotes Go Here///',
+        },
+        'smarty': {
+            'smart_angled_quotes': True,
+            'smart_quotes': True,
+            'smart_dashes': True,
+            'smart_ellipses': True,
+        },
+    }
+    
     def __init__(self, config: ConversionConfig, config_manager: Optional[ConfigManager] = None):
         self.config = config
         self.config_manager = config_manager
@@ -45,59 +99,31 @@ class MarkdownToPDFConverter:
         # Crear directorio de salida si no existe
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Configurar markdown con extensiones completas para soporte total de Markdown Guide
-        self.md = markdown.Markdown(extensions=[
-            # Sintaxis básica (ya soportada por defecto)
-            # - Headings (# ## ###)
-            # - Paragraphs
-            # - Line breaks
-            # - Emphasis (bold, italic)
-            # - Links
-            # - Images
-            # - Escaping characters
-            
-            # Extensiones para sintaxis extendida
-            'markdown.extensions.tables',           # Tablas
-            'markdown.extensions.fenced_code',      # Bloques de código con ```
-            'markdown.extensions.codehilite',       # Resaltado de sintaxis
-            'markdown.extensions.toc',              # Tabla de contenidos
-            'markdown.extensions.attr_list',        # Atributos HTML
-            'markdown.extensions.def_list',         # Listas de definición
-            'markdown.extensions.footnotes',        # Notas al pie
-            'markdown.extensions.md_in_html',       # Markdown dentro de HTML
-            'markdown.extensions.nl2br',            # Saltos de línea
-            'markdown.extensions.sane_lists',       # Listas mejoradas
-            'markdown.extensions.smarty',           # Comillas inteligentes
-            'markdown.extensions.abbr',             # Abreviaciones
-            'markdown.extensions.admonition',       # Advertencias/notas
-            'markdown.extensions.legacy_attrs',     # Atributos legacy
-            'markdown.extensions.legacy_em',        # Énfasis legacy
-            'markdown.extensions.meta',             # Metadatos
-            'markdown.extensions.wikilinks',        # Enlaces tipo wiki
-        ], extension_configs={
-            'codehilite': {
-                'css_class': 'highlight',
-                'use_pygments': True,
-                'noclasses': True,
-                'linenums': False,
-                'guess_lang': True,
-            },
-            'toc': {
-                'title': 'Tabla de Contenidos',
-                'anchorlink': True,
-                'permalink': True,
-                'baselevel': 1,
-            },
-            'footnotes': {
-                'PLACE_MARKER': '///Footnotes Go Here///',
-            },
-            'smarty': {
-                'smart_angled_quotes': True,
-                'smart_quotes': True,
-                'smart_dashes': True,
-                'smart_ellipses': True,
-            },
-        })
+        # Motivo del último fallo de convert_file, para el resumen del lote
+        self.last_error: Optional[str] = None
+        
+        # Validador de la conversión con --validate (se crea la primera vez que se usa)
+        self.validator: Optional[MarkdownValidator] = None
+        self.last_validation = None
+        
+        # Caché de PDFs renderizados y de imágenes remotas (opcionales, según config.yaml)
+        self.render_cache = None
+        self.asset_cache = None
+        if config_manager is not None:
+            cache_config = config_manager.get_cache_config()
+            if cache_config.enabled:
+                self.render_cache = RenderCache(Path(cache_config.directory), cache_config.max_size_mb)
+            if cache_config.assets_enabled:
+                self.asset_cache = AssetCache(
+                    Path(cache_config.assets_directory),
+                    cache_config.assets_max_size_mb,
+                    cache_config.assets_ttl_seconds,
+                    cache_config.offline
+                )
+        
+        # Configurar markdown con extensiones completas para soporte total de Markdown Guide.
+        # El motor se reutiliza entre documentos (ver core.renderer.get_markdown_engine).
+        self.md = get_markdown_engine(self.markdown_extensions, self.markdown_extension_configs)
     
     def _setup_logging(self):
         """Configurar el sistema de logging"""
@@ -111,31 +137,9 @@ class MarkdownToPDFConverter:
         )
         self.logger = logging.getLogger(__name__)
     
-    def _extract_metadata(self, content: str) -> tuple[Dict[str, Any], str]:
-        """Extraer metadatos YAML del contenido"""
-        metadata = {}
-        
-        # Buscar YAML front matter
-        yaml_pattern = r'^---\s*\n(.*?)\n---\s*\n'
-        match = re.search(yaml_pattern, content, re.DOTALL)
-        
-        if match:
-            try:
-                yaml_content = match.group(1)
-                metadata = yaml.safe_load(yaml_content) or {}
-                
-                # Remover YAML del contenido
-                content = re.sub(yaml_pattern, '', content, count=1)
-                
-            except yaml.YAMLError as e:
-                self.logger.warning(f"Error al parsear YAML: {e}")
-        
-        return metadata, content
-    
     def _get_default_css(self) -> str:
         """Retorna CSS por defecto si no se proporciona archivo de estilos"""
         return f"""
-        <style>
         body {{
             font-family: {self.config.font_family};
             line-height: 1.6;
@@ -239,7 +243,6 @@ class MarkdownToPDFConverter:
                 font-size: 0.8em;
             }}
         }}
-        </style>
         """
     
     def _read_css_file(self) -> str:
@@ -255,27 +258,117 @@ class MarkdownToPDFConverter:
             self.logger.info("No se proporcionó archivo CSS, usando estilos por defecto")
             return self._get_default_css()
     
-    def _convert_markdown_to_html(self, markdown_content: str, metadata: Optional[Dict[str, Any]] = None, toc_levels: int = 3, number_headings: bool = False, toc: bool = False, debug_filename: str = "", max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False) -> str:
-        """Convertir contenido Markdown a HTML con soporte completo"""
-        print(f"[DEBUG] _convert_markdown_to_html: toc={toc} archivo={debug_filename}")
-        doc_metadata, clean_content = extract_metadata(markdown_content)
-        doc_metadata = safe_update_metadata(doc_metadata, metadata)
-        html_content = markdown_to_html(clean_content)
-        html_content = insert_automatic_toc(html_content, toc_levels=toc_levels, number_headings=number_headings) if toc else html_content
-        
-        # Procesar imágenes si se solicita
-        if download_remote_images or embed_images:
-            base_path = Path(self.input_dir)
-            html_content = process_html_images(
-                html_content, 
-                base_path,
-                max_width=max_image_width,
-                max_height=max_image_height,
-                quality=image_quality,
-                embed_images=embed_images
-            )
-        
-        css_content = self._read_css_file() if self.style_file and self.style_file.exists() else self._get_default_css()
+    def _pdf_stylesheets(self) -> tuple[Path, tuple]:
+        """Hoja de estilos del template y reglas adicionales que se aplican una sola vez al PDF"""
+        style_path = Path(self.style_file or 'style/light.css')
+        if self.style_file and self.style_file.exists():
+            return style_path, (SVG_EMOJI_CSS,)
+        return style_path, (self._get_default_css(), SVG_EMOJI_CSS)
+    
+    def _render_document(self, document: Document, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False) -> str:
+        """Renderiza el cuerpo del documento a HTML (Markdown e imágenes) una única vez"""
+        if document.html is not None:
+            return document.html
+        
+        # Las imágenes remotas que ya encontró el validador se descargan mientras se renderiza el Markdown
+        download = download_remote_images or embed_images
+        prefetch = self._prefetch_remote_images(document) if download and document.markdown_html is None else None
+        html_content = self._render_markdown(document)
+        
+        # Procesar imágenes si se solicita o si hay que ajustarlas a la resolución de impresión
+        layout = self._print_layout()
+        if download_remote_images or embed_images or layout is not None:
+            with document.timed('images'):
+                html_content = process_html_images(
+                    html_content, 
+                    document.asset_dir,
+                    max_width=max_image_width,
+                    max_height=max_image_height,
+                    quality=image_quality,
+                    embed_images=embed_images,
+                    asset_cache=self.asset_cache,
+                    workers=self._image_workers(),
+                    embed_max_bytes=self._embed_max_bytes(),
+                    layout=layout,
+                    download_remote=download,
+                    prefetched=prefetch.result() if prefetch is not None else None
+                )
+        
+        document.html = html_content
+        return html_content
+    
+    def _prefetch_remote_images(self, document: Document) -> Optional[Future]:
+        """Empieza a descargar en segundo plano las imágenes remotas de document.images
+        
+        Son las que encontró el validador (con --validate); las que no vio, p. ej. las de
+        sintaxis de referencia, se descargan después en process_html_images.
+        """
+        processor = ImageProcessor(asset_cache=self.asset_cache)
+        urls = [image.url for image in document.images if processor.is_remote_url(image.url)]
+        if not urls:
+            return None
+        return _prefetch_executor().submit(processor.prefetch_remote_images, urls, document.asset_dir)
+    
+    def _render_markdown(self, document: Document) -> str:
+        """HTML del Markdown, antes de procesar imágenes, con las imágenes que referencia
+        
+        Las imágenes salen de los <img src> del HTML generado, así que incluyen las de
+        sintaxis de referencia y las rutas entre <>; las locales se resuelven contra la
+        carpeta del documento.
+        """
+        if document.markdown_html is None:
+            with document.timed('markdown'):
+                html_content, document.headings = render_markdown(document.body, self.markdown_extensions, self.markdown_extension_configs)
+            document.assets = find_local_images(html_content, document.asset_dir)
+            document.remote_assets = find_remote_images(html_content)
+            document.markdown_html = html_content
+        return document.markdown_html
+    
+    def _convert_markdown_to_html(self, document: Document, toc_levels: int = 3, number_headings: bool = False, toc: bool = False, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False, inline_css: bool = True) -> str:
+        """Convertir el documento a una página HTML completa con soporte completo
+        
+        Con inline_css=False (flujo PDF) el <style> solo lleva los ajustes propios del
+        documento; las hojas del template las aplica el exportador una única vez.
+        """
+        self.logger.debug(f"_convert_markdown_to_html: toc={toc} archivo={document.path.name}")
+        html_content = self._document_body(
+            document,
+            toc_levels=toc_levels,
+            number_headings=number_headings,
+            toc=toc,
+            max_image_width=max_image_width,
+            max_image_height=max_image_height,
+            image_quality=image_quality,
+            download_remote_images=download_remote_images,
+            embed_images=embed_images
+        )
+        return self._wrap_html(document, html_content, inline_css)
+    
+    def _document_body(self, document: Document, toc_levels: int = 3, number_headings: bool = False, toc: bool = False, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False) -> str:
+        """Cuerpo HTML del documento (Markdown, imágenes y TOC opcional)"""
+        html_content = self._render_document(
+            document,
+            max_image_width=max_image_width,
+            max_image_height=max_image_height,
+            image_quality=image_quality,
+            download_remote_images=download_remote_images,
+            embed_images=embed_images
+        )
+        if toc:
+            with document.timed('toc'):
+                html_content = insert_automatic_toc(html_content, toc_levels=toc_levels, number_headings=number_headings, headings=document.headings)
+        return html_content
+    
+    def _wrap_html(self, document: Document, html_content: str, inline_css: bool = True) -> str:
+        """Página HTML completa alrededor de un cuerpo (el documento entero o un fragmento)"""
+        # Ajustes propios del documento; en HTML independiente se incluye además el CSS completo
+        document_css = f"""
+                body {{
+                    font-family: {self.config.font_family}, 'EmojiFont', sans-serif;
+                }}"""
+        if inline_css:
+            css_content = self._read_css_file() if self.style_file and self.style_file.exists() else self._get_default_css()
+            document_css = f"{css_content}\n{SVG_EMOJI_CSS}\n{document_css}"
         
         # Crear HTML completo con soporte para SVG y emojis
         full_html = f"""
@@ -284,77 +377,9 @@ class MarkdownToPDFConverter:
         <head>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{doc_metadata.get('title', 'Documento Markdown')}</title>
+            <title>{document.metadata.get('title', 'Documento Markdown')}</title>
             <style>
-                {css_content}
-                
-                /* Soporte mejorado para SVG */
-                svg {{
-                    max-width: 100%;
-                    height: auto;
-                    display: block;
-                    margin: 1em auto;
-                }}
-                
-                /* Soporte para emojis */
-                @font-face {{
-                    font-family: 'EmojiFont';
-                    src: local('Apple Color Emoji'),
-                         local('Segoe UI Emoji'),
-                         local('Noto Color Emoji'),
-                         local('Android Emoji'),
-                         local('EmojiSymbols');
-                    unicode-range: U+1F600-1F64F, U+1F300-1F5FF, U+1F680-1F6FF, U+1F1E0-1F1FF, U+2600-26FF, U+2700-27BF;
-                }}
-                
-                body {{
-                    font-family: {self.config.font_family}, 'EmojiFont', sans-serif;
-                }}
-                
-                /* Mejoras para contenido técnico */
-                .svg-container {{
-                    text-align: center;
-                    margin: 1.5em 0;
-                    padding: 1em;
-                    background-color: #f8f9fa;
-                    border-radius: 8px;
-                    border: 1px solid #e9ecef;
-                }}
-                
-                .svg-container svg {{
-                    margin: 0;
-                }}
-                
-                .emoji {{
-                    font-family: 'EmojiFont', sans-serif;
-                    font-size: 1.2em;
-                    vertical-align: middle;
-                }}
-                
-                /* Mejoras para diagramas SVG */
-                .diagram {{
-                    background-color: white;
-                    border: 2px solid #dee2e6;
-                    border-radius: 8px;
-                    padding: 1em;
-                    margin: 1.5em 0;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                
-                .diagram svg {{
-                    margin: 0;
-                }}
-                
-                /* Responsive para SVG */
-                @media print {{
-                    svg {{
-                        page-break-inside: avoid;
-                    }}
-                    
-                    .svg-container {{
-                        page-break-inside: avoid;
-                    }}
-                }}
+                {document_css}
             </style>
         </head>
         <body>
@@ -365,64 +390,403 @@ class MarkdownToPDFConverter:
         
         return full_html
     
-    def _validate_markdown_file(self, file_path: Path) -> bool:
-        """Valida que el archivo Markdown tenga contenido"""
+    def _asset_fingerprints(self, document: Document) -> list:
+        """Huella (ruta, tamaño, mtime) de las imágenes locales del HTML renderizado"""
+        assets = []
+        for path in document.assets:
+            src = os.path.relpath(path, document.asset_dir)
+            try:
+                stat = path.stat()
+                assets.append((src, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                assets.append((src, None, None))
+        return assets
+    
+    def _build_settings(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Configuración que, si cambia, obliga a regenerar el PDF"""
+        settings = {'template': asdict(self.config), 'options': options}
+        if self.config_manager is not None:
+            settings['output'] = asdict(self.config_manager.get_output_config())
+        return settings
+    
+    def _discovery_config(self) -> DiscoveryConfig:
+        if self.config_manager is None:
+            return DiscoveryConfig(recursive=True, exclude=[], mirror_output=True, workers=8)
+        return self.config_manager.get_discovery_config()
+    
+    def discover(self) -> MarkdownDiscovery:
+        """Archivos .md del directorio de entrada (discovery de config.yaml), sin entrar en el de salida"""
+        return MarkdownDiscovery.from_config(self.input_dir, self._discovery_config(), skip=[self.output_dir])
+    
+    def _output_path(self, markdown_file: Path, suffix: str) -> Path:
+        """Ruta de salida: replica bajo output_dir las carpetas de la entrada (discovery.mirror_output)"""
+        relative = Path(Path(markdown_file).name)
+        if self._discovery_config().mirror_output:
+            try:
+                relative = Path(markdown_file).resolve().relative_to(self.input_dir.resolve())
+            except ValueError:
+                pass
+        output_path = self.output_dir / relative.with_suffix(suffix)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        return output_path
+    
+    def _is_up_to_date(self, markdown_file: Path, options: Dict[str, Any]) -> bool:
+        """Comprueba el manifiesto de dependencias del PDF de markdown_file"""
+        manifest = DependencyManifest(self._output_path(markdown_file, '.pdf'))
+        return manifest.is_up_to_date(self._build_settings(options))
+    
+    def _render_cache_key(self, document: Document, options: Dict[str, Any]) -> str:
+        """Clave de caché: fuente, CSS resuelto, template, opciones, imágenes locales y versiones"""
+        self._render_markdown(document)
+        return hash_key(
+            document.text,
+            self._read_css_file(),
+            self._pdf_stylesheets()[1],
+            self._build_settings(options),
+            self._asset_fingerprints(document),
+            library_versions(),
+        )
+    
+    def _load_document(self, file_path: Path) -> Optional[Document]:
+        """Lee el archivo una sola vez; None si no se puede leer o está vacío"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:
-                    self.logger.warning(f"Archivo vacío: {file_path}")
-                    return False
-                return True
+            document = Document.load(file_path)
         except Exception as e:
             self.logger.error(f"Error al leer archivo {file_path}: {e}")
-            return False
+            return None
+        if document.is_empty:
+            self.logger.warning(f"Archivo vacío: {file_path}")
+            return None
+        return document
+    
+    def _get_validator(self) -> MarkdownValidator:
+        if self.validator is None:
+            if self.config_manager is not None:
+                validation_config = self.config_manager.get_validation_config()
+            else:
+                validation_config = ValidationConfig(check_broken_links=True, check_missing_images=True,
+                                                     check_empty_files=True, max_file_size_mb=10)
+            self.validator = MarkdownValidator(validation_config)
+        return self.validator
+    
+    def _validated_document(self, markdown_file: Path) -> Optional[Document]:
+        """Lee el archivo una vez y lo valida sobre el mismo texto que se va a renderizar
+        
+        Devuelve None, sin renderizar nada, si la validación encuentra errores.
+        """
+        validator = self._get_validator()
+        try:
+            document = Document.load(markdown_file)
+        except Exception as e:
+            # Archivo ilegible: el validador informa del motivo (p. ej. codificación)
+            self.logger.error(f"Error al leer archivo {markdown_file}: {e}")
+            self.last_validation = validator.validate_file(markdown_file)
+            return None
+        
+        self.last_validation = validator.validate_document(document)
+        if not self.last_validation.valid:
+            errors = sum(1 for issue in self.last_validation.issues if issue.severity == "error")
+            self.last_error = f"no se convirtió: {errors} errores de validación"
+            self.logger.warning(f"⏭️  {markdown_file.name}: {errors} errores de validación, no se convierte")
+            return None
+        if document.is_empty:
+            self.logger.warning(f"Archivo vacío: {markdown_file}")
+            return None
+        return document
+    
+    def _write_html(self, document: Document, html_path: Path, options: Dict[str, Any]):
+        """Escribe la previsualización HTML (sin TOC) a partir del documento ya renderizado"""
+        html_content = self._convert_markdown_to_html(
+            document,
+            toc=False,  # Nunca TOC en HTML
+            toc_levels=options['toc_levels'],
+            number_headings=options['number_headings'],
+            max_image_width=options['max_image_width'],
+            max_image_height=options['max_image_height'],
+            image_quality=options['image_quality'],
+            download_remote_images=options['download_remote_images'],
+            embed_images=options['embed_images']
+        )
+        with document.timed('html'):
+            Path(html_path).write_text(html_content, encoding='utf-8')
+        self.logger.info(f"✅ HTML generado: {document.path.name} -> {Path(html_path).name}")
+    
+    def _dependencies(self, document: Document) -> set:
+        """Entradas que afectan al PDF: el Markdown, la hoja de estilos y las imágenes locales
+        
+        Las imágenes son las que resolvió el renderizador (document.assets); si el PDF se
+        reutiliza de la caché se renderiza el Markdown para obtenerlas.
+        """
+        self._render_markdown(document)
+        dependencies = {document.path}
+        if self.style_file and self.style_file.exists():
+            dependencies.add(self.style_file)
+        dependencies.update(document.assets)
+        return dependencies
+    
+    def _export_document(self, document: Document, pdf_path: Path, options: Dict[str, Any], incremental: bool = False):
+        """Genera el PDF del documento, reutilizando la caché si las entradas no cambiaron
+        
+        Con incremental se guarda además el manifiesto de dependencias en .deps/ junto al PDF.
+        """
+        markdown_file = document.path
+        
+        # Reutilizar el PDF si ya se renderizó con las mismas entradas. Las imágenes remotas no
+        # forman parte de la clave (pueden cambiar en el servidor sin que cambie la URL), así que
+        # un documento que las usa se renderiza siempre. Las imágenes se toman del HTML del Markdown
+        cache_key = None
+        if self.render_cache is not None:
+            self._render_markdown(document)
+        if self.render_cache is not None and document.remote_assets:
+            self.logger.debug(f"{markdown_file.name}: imágenes remotas; no se usa la caché de renderizado")
+        elif self.render_cache is not None:
+            cache_key = self._render_cache_key(document, options)
+            if self.render_cache.get(cache_key, pdf_path):
+                if incremental:
+                    DependencyManifest(pdf_path).save(self._dependencies(document), self._build_settings(options))
+                self.logger.info(f"♻️  Reutilizado desde caché: {markdown_file.name} -> {pdf_path.name}")
+                return
+        
+        # Convertir a HTML
+        html_content = self._document_body(document, **options)
+        
+        # Exportar PDF (sin escribir sobre un posible enlace duro a la caché)
+        style_path, extra_css = self._pdf_stylesheets()
+        pdf_path.unlink(missing_ok=True)
+        chunk_bounds = self._chunk_bounds(html_content)
+        with document.timed('pdf'):
+            if len(chunk_bounds) > 1:
+                self._export_chunked(document, html_content, chunk_bounds, pdf_path, style_path, extra_css)
+            else:
+                export_pdf(self._wrap_html(document, html_content, inline_css=False), pdf_path,
+                           document.asset_dir, style_path, extra_css)
+        
+        if cache_key is not None:
+            self.render_cache.put(cache_key, pdf_path)
+        if incremental:
+            DependencyManifest(pdf_path).save(self._dependencies(document), self._build_settings(options))
+        
+        self.logger.info(f"✅ Convertido exitosamente: {markdown_file.name} -> {pdf_path.name}")
+    
+    def _chunk_bounds(self, html_content: str) -> list:
+        """Fragmentos del cuerpo HTML en modo por fragmentos (performance.chunked); uno solo si no aplica"""
+        if self.config_manager is None:
+            return [(0, len(html_content))]
+        performance = self.config_manager.get_performance_config()
+        if not performance.chunked:
+            return [(0, len(html_content))]
+        return split_html_sections(html_content, max(1, performance.chunk_size) * 1024)
     
-    def convert_file(self, markdown_file: Path, toc: bool = False, toc_levels: int = 3, number_headings: bool = False, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False) -> bool:
-        """Convierte un archivo Markdown específico a PDF"""
+    def _export_chunked(self, document: Document, html_content: str, chunk_bounds: list, pdf_path: Path,
+                        style_path: Path, extra_css: tuple):
+        """Exporta el PDF fragmento a fragmento para informar del progreso de cada uno
+        
+        No reduce la memoria: el documento y todas sus páginas maquetadas siguen en memoria
+        hasta escribir el PDF (ver PdfExporter.export_chunks).
+        """
+        total = len(chunk_bounds)
+        self.logger.info(f"🧩 {document.path.name}: renderizando en {total} fragmentos")
+        
+        def progress(index: int, pages: int):
+            self.logger.info(f"   📄 Fragmento {index}/{total} listo ({pages} páginas acumuladas)")
+        
+        # Cada página HTML se construye justo antes de renderizar su fragmento
+        chunks = (self._wrap_html(document, html_content[start:end], inline_css=False) for start, end in chunk_bounds)
+        export_pdf_chunks(chunks, pdf_path, document.asset_dir, style_path, extra_css, progress)
+    
+    def convert_file(self, markdown_file: Path, toc: bool = False, toc_levels: int = 3, number_headings: bool = False, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False, output_path: Optional[Path] = None, html_path: Optional[Path] = None, pdf: bool = True, validate: bool = False, base_dir: Optional[Path] = None, incremental: bool = False) -> bool:
+        """Convierte un archivo Markdown específico a PDF y, opcionalmente, a HTML
+        
+        El archivo se lee y se parsea una sola vez; el HTML de previsualización se
+        obtiene del mismo documento renderizado que el PDF. Con validate, el documento
+        leído se valida antes de renderizar (resultado en last_validation) y, si tiene
+        errores, no se convierte. Las imágenes relativas se resuelven contra la carpeta
+        del archivo o, si se indica, contra base_dir. Con incremental se guarda el
+        manifiesto de dependencias del PDF para las compilaciones siguientes.
+        """
+        self.last_error = None
+        self.last_validation = None
         try:
-            # Validar archivo
-            if not self._validate_markdown_file(markdown_file):
+            document = self._validated_document(markdown_file) if validate else self._load_document(markdown_file)
+            if document is None:
+                self.last_error = self.last_error or "no se pudo leer el archivo o está vacío"
                 return False
+            if base_dir is not None:
+                document.base_dir = Path(base_dir)
             
-            # Leer contenido Markdown
-            with open(markdown_file, 'r', encoding='utf-8') as f:
-                markdown_content = f.read()
-            
-            # Extraer metadatos
-            metadata, markdown_content = extract_metadata(markdown_content)
-            
-            # Convertir a HTML
-            html_content = self._convert_markdown_to_html(
-                markdown_content,
-                metadata,
-                toc_levels=toc_levels,
-                number_headings=number_headings,
-                toc=toc,
-                max_image_width=max_image_width,
-                max_image_height=max_image_height,
-                image_quality=image_quality,
-                download_remote_images=download_remote_images,
-                embed_images=embed_images
-            )
+            options = {
+                'toc': toc,
+                'toc_levels': toc_levels,
+                'number_headings': number_headings,
+                'max_image_width': max_image_width,
+                'max_image_height': max_image_height,
+                'image_quality': image_quality,
+                'download_remote_images': download_remote_images,
+                'embed_images': embed_images,
+            }
             
-            # Generar nombre del archivo PDF
-            pdf_filename = markdown_file.stem + '.pdf'
-            pdf_path = self.output_dir / pdf_filename
+            if html_path is not None:
+                self._write_html(document, html_path, options)
             
-            # Exportar PDF
-            style_path = Path(self.style_file or 'style/light.css')
-            export_pdf(html_content, pdf_path, markdown_file.parent, style_path)
+            if pdf:
+                # Generar nombre del archivo PDF
+                pdf_path = Path(output_path) if output_path else self._output_path(markdown_file, '.pdf')
+                self._export_document(document, pdf_path, options, incremental)
             
-            self.logger.info(f"✅ Convertido exitosamente: {markdown_file.name} -> {pdf_filename}")
+            self.logger.debug(f"Tiempos de {markdown_file.name}: {document.format_timings()}")
             return True
             
         except Exception as e:
+            self.last_error = str(e)
             self.logger.error(f"❌ Error al convertir {markdown_file.name}: {e}")
             return False
     
-    def convert_all_files(self, specific_file: Optional[str] = None, toc: bool = False, toc_levels: int = 3, number_headings: bool = False, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False) -> dict:
-        """Convierte todos los archivos Markdown en el directorio de entrada o uno específico"""
+    def convert_previews_first(self, markdown_files: list, options: Dict[str, Any], html: bool = True, pdf: bool = True) -> Dict[str, Any]:
+        """Convierte varios documentos en este proceso escribiendo primero todos los HTML
+        
+        Cada archivo se lee y se renderiza una sola vez: la previsualización HTML de todos
+        los documentos queda lista antes de empezar con los PDFs, que son más lentos.
+        """
+        failures: Dict[str, str] = {}
+        documents = []
+        for markdown_file in markdown_files:
+            document = self._load_document(markdown_file)
+            if document is None:
+                failures[str(markdown_file)] = "no se pudo leer el archivo o está vacío"
+            else:
+                documents.append(document)
+        
+        stages = ([('html', lambda document: self._write_html(
+            document, self._output_path(document.path, '.html'), options))] if html else [])
+        if pdf:
+            stages.append(('pdf', lambda document: self._export_document(
+                document, self._output_path(document.path, '.pdf'), options)))
+        for _stage, run in stages:
+            for document in documents:
+                if str(document.path) in failures:
+                    continue
+                try:
+                    run(document)
+                except Exception as e:
+                    failures[str(document.path)] = str(e)
+                    self.logger.error(f"❌ Error al convertir {document.path.name}: {e}")
+        
+        return {
+            "success": len(markdown_files) - len(failures),
+            "failed": len(failures),
+            "failures": failures,
+            "total": len(markdown_files)
+        }
+    
+    def _image_workers(self) -> Optional[int]:
+        """Hilos para el procesamiento de imágenes (performance.image_workers; 0 = uno por núcleo)"""
+        if self.config_manager is None:
+            return None
+        return self.config_manager.get_performance_config().image_workers or None
+    
+    def _print_layout(self) -> Optional[PrintLayout]:
+        """Geometría de impresión si output.optimize_images está activo; None para usar max_width/max_height"""
+        if self.config_manager is None:
+            return None
+        output_config = self.config_manager.get_output_config()
+        if not output_config.optimize_images:
+            return None
+        try:
+            return PrintLayout.from_page(self.config.page_size, self.config.margins, output_config.dpi)
+        except ValueError as e:
+            self.logger.warning(f"{e}; se usa el tamaño máximo fijo de imagen")
+            return None
+    
+    def _embed_max_bytes(self) -> int:
+        """Límite por documento de las imágenes incrustadas (output.embed_max_mb)"""
+        embed_max_mb = self.config_manager.get_output_config().embed_max_mb if self.config_manager is not None else 20
+        return embed_max_mb * 1024 * 1024
+    
+    def _resolve_workers(self, jobs: Optional[int] = None) -> int:
+        """Determina el número de procesos: --jobs tiene prioridad sobre performance.max_workers"""
+        if jobs is None and self.config_manager is not None:
+            jobs = self.config_manager.get_performance_config().max_workers
+        return max(1, jobs or 1)
+    
+    def _resource_limits(self) -> tuple[int, int]:
+        """(performance.memory_limit_mb, performance.timeout_seconds); 0 desactiva cada límite"""
+        if self.config_manager is None:
+            return 0, 0
+        performance = self.config_manager.get_performance_config()
+        return max(0, performance.memory_limit_mb or 0), max(0, performance.timeout_seconds or 0)
+    
+    def convert_batch(self, jobs: Iterable[tuple], workers: int = 1) -> Dict[str, Any]:
+        """Convierte una secuencia de (archivo, opciones de convert_file)
+        
+        Con varios procesos o con límites de recursos configurados, cada documento se
+        convierte en un proceso supervisado: si supera la memoria o el tiempo máximo, el
+        proceso se mata y se reemplaza, y el archivo queda como fallido con el motivo.
+        Los trabajos se envían a medida que llegan, así que `jobs` puede ser un generador
+        (por ejemplo, el de la búsqueda de archivos, que aún no ha terminado).
+        """
+        memory_limit_mb, timeout_seconds = self._resource_limits()
+        failures: Dict[str, str] = {}
+        validation: Dict[str, Any] = {}
+        total = 0
+        
+        # Cada lote es una pasada de validación nueva: los enlaces e imágenes pudieron cambiar
+        # desde el anterior (modo --watch, servidor). Los procesos del pool se crean por lote.
+        if self.validator is not None:
+            self.validator.reset_stats()
+        
+        if workers > 1:
+            # No arrancar más procesos que archivos en lotes pequeños
+            jobs = iter(jobs)
+            head = list(islice(jobs, workers))
+            workers = max(1, len(head))
+            jobs = chain(head, jobs)
+        
+        if workers > 1 or memory_limit_mb or timeout_seconds:
+            self.logger.info(f"Conversión supervisada con {workers} procesos "
+                             f"(memoria: {memory_limit_mb or '∞'}MB, tiempo: {timeout_seconds or '∞'}s)")
+            with SupervisedPool(workers, _init_worker, (self.config, self.config_manager),
+                                memory_limit_mb=memory_limit_mb, timeout_seconds=timeout_seconds) as pool:
+                futures = {pool.submit(_convert_in_worker, md_file, options): md_file for md_file, options in jobs}
+                total = len(futures)
+                for future in as_completed(futures):
+                    md_file = futures[future]
+                    try:
+                        converted, error, validation_result = future.result()
+                        if validation_result is not None:
+                            validation[str(md_file)] = validation_result
+                    except ResourceLimitError as e:
+                        converted, error = False, e.reason
+                    except Exception as e:
+                        # Un fallo del proceso trabajador no debe detener el lote completo
+                        converted, error = False, str(e)
+                    if not converted:
+                        failures[str(md_file)] = error or "error de conversión"
+                        self.logger.error(f"❌ Error al convertir {md_file.name}: {failures[str(md_file)]}")
+        else:
+            for md_file, options in jobs:
+                total += 1
+                converted = self.convert_file(md_file, **options)
+                if self.last_validation is not None:
+                    validation[str(md_file)] = self.last_validation
+                if not converted:
+                    failures[str(md_file)] = self.last_error or "error de conversión"
+        
+        return {
+            "success": total - len(failures),
+            "failed": len(failures),
+            "failures": failures,
+            "validation": validation,
+            "total": total
+        }
+    
+    def convert_all_files(self, specific_file: Optional[str] = None, toc: bool = False, toc_levels: int = 3, number_headings: bool = False, max_image_width: int = 800, max_image_height: int = 600, image_quality: int = 85, download_remote_images: bool = False, embed_images: bool = False, jobs: Optional[int] = None, incremental: bool = False, files: Optional[Iterable[Path]] = None, validate: bool = False) -> dict:
+        """Convierte todos los archivos Markdown en el directorio de entrada o uno específico
+        
+        Los archivos salen de `files` (p. ej. un MarkdownDiscovery ya recorrido) o de un
+        recorrido nuevo de la entrada; la conversión empieza con los primeros archivos
+        encontrados, sin esperar a que termine el recorrido. Con validate, cada proceso
+        valida y convierte el documento con una sola lectura (ver convert_file).
+        """
         if not self.input_dir.exists():
             self.logger.error(f"El directorio de entrada no existe: {self.input_dir}")
             return {"success": 0, "failed": 0, "total": 0}
@@ -433,28 +797,107 @@ class MarkdownToPDFConverter:
                 self.logger.error(f"El archivo especificado no existe: {markdown_files[0]}")
                 return {"success": 0, "failed": 1, "total": 1}
         else:
-            markdown_files = list(self.input_dir.glob("*.md"))
+            markdown_files = files if files is not None else self.discover()
         
-        if not markdown_files:
-            self.logger.warning(f"No se encontraron archivos .md en {self.input_dir}")
-            return {"success": 0, "failed": 0, "total": 0}
-        
-        self.logger.info(f"Encontrados {len(markdown_files)} archivos Markdown para convertir")
+        options = {
+            'toc': toc,
+            'toc_levels': toc_levels,
+            'number_headings': number_headings,
+            'max_image_width': max_image_width,
+            'max_image_height': max_image_height,
+            'image_quality': image_quality,
+            'download_remote_images': download_remote_images,
+            'embed_images': embed_images,
+        }
         
-        success_count = 0
-        failed_count = 0
+        # Opciones de convert_file que no forman parte de la configuración del PDF
+        job_options = dict(options, validate=validate, incremental=incremental)
+        skipped = []
         
-        for md_file in markdown_files:
-            if self.convert_file(md_file, toc=toc, toc_levels=toc_levels, number_headings=number_headings, max_image_width=max_image_width, max_image_height=max_image_height, image_quality=image_quality, download_remote_images=download_remote_images, embed_images=embed_images):
-                success_count += 1
-            else:
-                failed_count += 1
+        def pending_jobs():
+            for md_file in markdown_files:
+                if incremental and self._is_up_to_date(md_file, options):
+                    skipped.append(md_file)
+                    continue
+                yield md_file, job_options
         
-        return {
-            "success": success_count,
-            "failed": failed_count,
-            "total": len(markdown_files)
-        }
+        results = self.convert_batch(pending_jobs(), self._resolve_workers(jobs))
+        total = results['total'] + len(skipped)
+        if not total:
+            self.logger.warning(f"No se encontraron archivos .md en {self.input_dir}")
+        else:
+            self.logger.info(f"Encontrados {total} archivos Markdown")
+        if skipped:
+            self.logger.info(f"⏭️  {len(skipped)} archivos sin cambios desde la última compilación")
+        results.update(skipped=len(skipped), total=total)
+        return results
+
+
+# Hilo que adelanta la descarga de imágenes remotas mientras se renderiza el Markdown
+_prefetcher: Optional[ThreadPoolExecutor] = None
+
+
+def _prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetcher
+    if _prefetcher is None:
+        _prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch')
+    return _prefetcher
+
+
+# Convertidor propio de cada proceso del pool, creado una sola vez por _init_worker
+_worker_converter: Optional[MarkdownToPDFConverter] = None
+
+
+def _init_worker(config: ConversionConfig, config_manager: Optional[ConfigManager]):
+    """Inicializa el convertidor del proceso trabajador"""
+    global _worker_converter
+    _worker_converter = MarkdownToPDFConverter(config, config_manager)
+    # Cargar las fuentes del sistema una sola vez por proceso
+    get_exporter()
+
+
+def _convert_in_worker(markdown_file: Path, options: Dict[str, Any]) -> tuple[bool, Optional[str], Any]:
+    """Convierte un archivo usando el convertidor ya inicializado del proceso
+    
+    Devuelve (éxito, motivo del fallo, resultado de la validación o None).
+    """
+    converted = _worker_converter.convert_file(markdown_file, **options)
+    return converted, _worker_converter.last_error, _worker_converter.last_validation
+
+def print_validation_summary(results: Dict[str, Any], validation_config: ValidationConfig,
+                             verbose: bool = False) -> Dict[str, Any]:
+    """Reporte de validación de un lote convertido con --validate (a partir de results['validation'])"""
+    validator = MarkdownValidator(validation_config)
+    validation_results = dict(sorted(results.get('validation', {}).items()))
+    validator.print_validation_report(validation_results, verbose=verbose)
+    summary = validator.get_summary(validation_results)
+    if summary['invalid_files'] > 0:
+        print(f"\n❌ {summary['invalid_files']} archivos con errores críticos no se convirtieron.")
+        print("💡 Sugerencia: Corrige los errores y vuelve a convertir. Usa --validate --verbose para más detalles.")
+    elif summary['total_issues'] > 0:
+        print(f"\n⚠️  Todos los archivos son válidos, pero hay {summary['total_issues']} advertencias/sugerencias.")
+        print("💡 Sugerencia: Usa --verbose para ver todas las recomendaciones de mejora.")
+    elif validation_results:
+        print(f"\n✅ ¡Todos los archivos son perfectos! No se encontraron problemas.")
+    return summary
+
+def validate_only(input_dir: Path, config_manager: ConfigManager, files: Optional[Iterable[Path]] = None,
+                  workers: Optional[int] = None, verbose: bool = False, skip: Iterable[Path] = ()) -> Dict[str, Any]:
+    """--validate-only: valida sin convertir, repartiendo los archivos con MarkdownValidator.validate_directory"""
+    validator = MarkdownValidator(config_manager.get_validation_config())
+    if files is None:
+        files = MarkdownDiscovery.from_config(input_dir, config_manager.get_discovery_config(), skip=list(skip))
+    validation_results = validator.validate_directory(input_dir, workers=workers, files=files)
+    validator.print_validation_report(validation_results, verbose=verbose)
+    summary = validator.get_summary(validation_results)
+    if summary['invalid_files'] > 0:
+        print(f"\n❌ Se encontraron {summary['invalid_files']} archivos con errores críticos.")
+        print("💡 Sugerencia: Corrige los errores antes de convertir. Usa --validate-only --verbose para más detalles.")
+    elif summary['total_issues'] > 0:
+        print(f"\n⚠️  Todos los archivos son válidos, pero hay {summary['total_issues']} advertencias/sugerencias.")
+    elif validation_results:
+        print(f"\n✅ ¡Todos los archivos son perfectos! No se encontraron problemas.")
+    return summary
 
 def print_error(msg):
     print(f"{Fore.RED}❌ {msg}{Style.RESET_ALL}")
@@ -465,8 +908,52 @@ def print_warning(msg):
 def print_success(msg):
     print(f"{Fore.GREEN}✅ {msg}{Style.RESET_ALL}")
 
+def _conversion_config_from_args(args: argparse.Namespace, config_manager: ConfigManager,
+                                 template_name: Optional[str], explicit_image_size: bool) -> ConversionConfig:
+    """Configuración del template con las opciones de la línea de comandos aplicadas
+    
+    También la usa el modo --watch para reconstruir la configuración al cambiar config.yaml.
+    """
+    conversion_config = config_manager.get_conversion_config(template_name)
+    
+    # Sobrescribir con argumentos de línea de comandos
+    if args.input:
+        conversion_config.input_dir = args.input
+    if args.output:
+        conversion_config.output_dir = args.output
+    if args.style:
+        conversion_config.style_file = args.style
+    if args.verbose:
+        conversion_config.verbose = True
+    if args.no_cache:
+        config_manager.config.setdefault('cache', {})['enabled'] = False
+    if args.offline:
+        config_manager.config.setdefault('cache', {})['offline'] = True
+    if args.chunked:
+        config_manager.config.setdefault('performance', {})['chunked'] = True
+    if args.aggregate_issues:
+        config_manager.config.setdefault('validation', {})['aggregate_issues'] = True
+    if args.exclude:
+        discovery = config_manager.config.setdefault('discovery', {})
+        discovery['exclude'] = list(discovery.get('exclude') or []) + args.exclude
+    if explicit_image_size:
+        # Un tamaño máximo explícito sustituye al ajuste por resolución de impresión
+        config_manager.config.setdefault('output', {})['optimize_images'] = False
+    
+    # Lógica de selección de tema (ignora --style y --dark-theme si --theme está presente)
+    if args.theme:
+        if args.theme == 'dark':
+            conversion_config.style_file = 'style/dark.css'
+        else:  # 'light' o 'auto'
+            conversion_config.style_file = 'style/light.css'
+    return conversion_config
+
 def main():
     """Función principal del script"""
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        from cli.server import serve_main
+        sys.exit(serve_main(sys.argv[2:]))
+    
     parser = argparse.ArgumentParser(
         description="""
         📝 Convierte archivos Markdown a PDF con estilos CSS profesionales y validación avanzada.
@@ -488,7 +975,7 @@ Ejemplos prácticos:
   # Usar un estilo CSS personalizado
   python md_to_pdf_converter.py --style ./style/light.css
 
-  # Validar todos los archivos antes de convertir
+  # Validar cada archivo al convertirlo (los que tienen errores no se convierten)
   python md_to_pdf_converter.py --validate
 
   # Validar con información detallada
@@ -497,6 +984,18 @@ Ejemplos prácticos:
   # Listar templates disponibles
   python md_to_pdf_converter.py --list-templates
 
+  # Convertir un árbol de carpetas excluyendo borradores
+  python md_to_pdf_converter.py --input ./docs --exclude "borradores/" --exclude "*.tmp.md"
+
+  # Convertir un directorio en paralelo con 8 procesos
+  python md_to_pdf_converter.py --jobs 8
+
+  # Regenerar HTML y PDF al guardar cambios
+  python md_to_pdf_converter.py --html --pdf --watch
+
+  # Servidor residente con procesos precalentados (ver: serve --help)
+  python md_to_pdf_converter.py serve --port 8765 --workers 4
+
 Solución de problemas:
   - Si tienes errores de validación, usa --validate --verbose para ver detalles.
   - Si no se genera el PDF, revisa el log conversion.log.
@@ -542,7 +1041,17 @@ Solución de problemas:
     parser.add_argument(
         '--validate', '-V',
         action='store_true',
-        help='Validar archivos antes de convertir'
+        help='Validar cada archivo en la misma lectura que su conversión; los que tienen errores no se convierten'
+    )
+    parser.add_argument(
+        '--validate-only',
+        action='store_true',
+        help='Solo validar, sin convertir: los archivos se reparten en un pool de procesos (--jobs)'
+    )
+    parser.add_argument(
+        '--aggregate-issues',
+        action='store_true',
+        help='Agrupar los problemas de validación repetidos en uno solo con ejemplos'
     )
     parser.add_argument(
         '--list-templates',
@@ -585,14 +1094,12 @@ Solución de problemas:
     parser.add_argument(
         '--max-image-width',
         type=int,
-        default=800,
-        help='Ancho máximo para redimensionar imágenes automáticamente (por defecto: 800px)'
+        help='Ancho máximo fijo para redimensionar imágenes (por defecto: 800px). Sin --max-image-width/--max-image-height y con output.optimize_images, las imágenes se ajustan a output.dpi según su tamaño en la página'
     )
     parser.add_argument(
         '--max-image-height',
         type=int,
-        default=600,
-        help='Alto máximo para redimensionar imágenes automáticamente (por defecto: 600px)'
+        help='Alto máximo fijo para redimensionar imágenes (por defecto: 600px)'
     )
     parser.add_argument(
         '--image-quality',
@@ -610,6 +1117,47 @@ Solución de problemas:
         action='store_true',
         help='Embeber imágenes como base64 en el HTML (aumenta el tamaño del archivo)'
     )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Regenerar solo los PDFs cuyas entradas (Markdown, imágenes, CSS o template) cambiaron'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignorar la caché de renderizado y regenerar todos los PDFs'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='No acceder a la red: usar solo las imágenes remotas ya guardadas en la caché'
+    )
+    parser.add_argument(
+        '--chunked',
+        action='store_true',
+        help='Mostrar el progreso de los documentos muy grandes renderizándolos por fragmentos (performance.chunk_size KB); no reduce la memoria'
+    )
+    parser.add_argument(
+        '--exclude', '-x',
+        action='append',
+        metavar='PATRON',
+        help='Excluir archivos o carpetas de la búsqueda con un patrón estilo .gitignore (repetible; se suma a discovery.exclude)'
+    )
+    parser.add_argument(
+        '--watch', '-w',
+        action='store_true',
+        help='Tras la conversión, vigilar la entrada, el CSS y config.yaml y regenerar solo los documentos afectados'
+    )
+    parser.add_argument(
+        '--watch-polling',
+        action='store_true',
+        help='En modo --watch, detectar cambios por sondeo en lugar de inotify'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        help='Número de procesos para la conversión por lotes (por defecto: performance.max_workers de config.yaml)'
+    )
     args = parser.parse_args()
 
     # Cargar configuración
@@ -638,62 +1186,22 @@ Solución de problemas:
             if args.template and args.template != "oscuro":
                 print("⚠️  Advertencia: --dark-theme sobrescribe --template")
         
-        conversion_config = config_manager.get_conversion_config(template_name)
+        explicit_image_size = bool(args.max_image_width or args.max_image_height)
+        conversion_config = _conversion_config_from_args(args, config_manager, template_name, explicit_image_size)
     except Exception as e:
         print(f"❌ Error al cargar la configuración de conversión: {e}")
         print("💡 Sugerencia: Revisa tu archivo config.yaml o el nombre del template.")
         sys.exit(1)
 
-    # Sobrescribir con argumentos de línea de comandos
-    if args.input:
-        conversion_config.input_dir = args.input
-    if args.output:
-        conversion_config.output_dir = args.output
-    if args.style:
-        conversion_config.style_file = args.style
-    if args.verbose:
-        conversion_config.verbose = True
+    args.max_image_width = args.max_image_width or 800
+    args.max_image_height = args.max_image_height or 600
 
     # Configurar nivel de logging
     if conversion_config.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
-    # Validar archivos si se solicita
-    if args.validate:
-        print("\n🔍 Iniciando validación avanzada de archivos Markdown...")
-        validator = MarkdownValidator(config_manager.get_validation_config())
-        validation_results = validator.validate_directory(Path(conversion_config.input_dir))
-        validator.print_validation_report(validation_results, verbose=args.verbose)
-        summary = validator.get_summary(validation_results)
-        if summary['invalid_files'] > 0:
-            print(f"\n❌ Se encontraron {summary['invalid_files']} archivos con errores críticos.")
-            print("💡 Sugerencia: Corrige los errores antes de convertir. Usa --validate --verbose para más detalles.")
-            if not args.verbose:
-                print("💡 Usa --verbose para ver detalles completos de cada problema.")
-            if not sys.stdin.isatty():
-                print("🔄 Continuando con la conversión (modo no interactivo)...")
-            else:
-                try:
-                    response = input("\n¿Deseas continuar con la conversión? (s/N): ").strip().lower()
-                    if response not in ['s', 'si', 'sí', 'y', 'yes']:
-                        print("❌ Conversión cancelada por el usuario.")
-                        sys.exit(0)
-                except KeyboardInterrupt:
-                    print("\n❌ Conversión cancelada por el usuario.")
-                    sys.exit(0)
-        elif summary['total_issues'] > 0:
-            print(f"\n⚠️  Todos los archivos son válidos, pero hay {summary['total_issues']} advertencias/sugerencias.")
-            print("💡 Sugerencia: Usa --verbose para ver todas las recomendaciones de mejora.")
-        else:
-            print(f"\n✅ ¡Todos los archivos son perfectos! No se encontraron problemas.")
-
-    # Lógica de selección de tema
+    # --theme sustituye a --style y --dark-theme (ver _conversion_config_from_args)
     if args.theme:
-        if args.theme == 'dark':
-            conversion_config.style_file = 'style/dark.css'
-        else:  # 'light' o 'auto'
-            conversion_config.style_file = 'style/light.css'
-        # Ignorar --style y --dark-theme si --theme está presente
         args.style = None
         args.dark_theme = False
 
@@ -723,6 +1231,15 @@ Solución de problemas:
         print_error(f"El directorio de entrada no existe: {conversion_config.input_dir}")
         print_warning("Crea la carpeta o revisa la ruta con --input")
         sys.exit(1)
+
+    # Solo validación: no hace falta la carpeta de salida
+    if args.validate_only:
+        print("\n🔍 Validando archivos Markdown (sin convertir)...")
+        workers = args.jobs or config_manager.get_performance_config().max_workers
+        summary = validate_only(Path(conversion_config.input_dir), config_manager, files_to_convert or None, workers,
+                                verbose=args.verbose, skip=[Path(conversion_config.output_dir)])
+        sys.exit(1 if summary['invalid_files'] > 0 else 0)
+
     # Verificar existencia de carpeta de salida
     if not Path(conversion_config.output_dir).exists():
         print_error(f"El directorio de salida no existe: {conversion_config.output_dir}")
@@ -756,63 +1273,69 @@ Solución de problemas:
 
     try:
         if files_to_convert:
-            results = {'success': 0, 'failed': 0, 'total': len(files_to_convert)}
+            jobs = []
             for md_file in files_to_convert:
-                pdf_filename = md_file.stem + '.pdf'
-                html_filename = md_file.stem + '.html'
-                pdf_path = Path(conversion_config.output_dir) / pdf_filename
-                html_path = Path(conversion_config.output_dir) / html_filename
-                # PDF: solo aquí se inserta la TOC si se solicita
-                if args.pdf:
-                    success = converter.convert_file(
-                        md_file,
-                        toc=args.toc,
-                        toc_levels=args.toc_levels,
-                        number_headings=args.number_headings,
-                        max_image_width=args.max_image_width,
-                        max_image_height=args.max_image_height,
-                        image_quality=args.image_quality,
-                        download_remote_images=args.download_remote_images,
-                        embed_images=args.embed_images
-                    )
-                    if success:
-                        results['success'] += 1
-                    else:
-                        results['failed'] += 1
-                    results['total'] += 1
-                # HTML: nunca insertar TOC
-                if args.html:
-                    with open(md_file, 'r', encoding='utf-8') as f:
-                        markdown_content = f.read()
-                    html_content = converter._convert_markdown_to_html(
-                        markdown_content,
-                        metadata=None,
-                        toc=False,  # Nunca TOC en HTML
-                        toc_levels=args.toc_levels,
-                        number_headings=args.number_headings,
-                        debug_filename=md_file.name,
-                        max_image_width=args.max_image_width,
-                        max_image_height=args.max_image_height,
-                        image_quality=args.image_quality,
-                        download_remote_images=args.download_remote_images,
-                        embed_images=args.embed_images
-                    )
-                    with open(html_path, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
-                    print_success(f"HTML generado: {md_file} -> {html_path}")
+                html_path = converter._output_path(md_file, '.html') if args.html else None
+                # PDF con TOC si se solicita; el HTML se genera del mismo documento, sin TOC
+                jobs.append((md_file, {
+                    'toc': args.toc,
+                    'toc_levels': args.toc_levels,
+                    'number_headings': args.number_headings,
+                    'max_image_width': args.max_image_width,
+                    'max_image_height': args.max_image_height,
+                    'image_quality': args.image_quality,
+                    'download_remote_images': args.download_remote_images,
+                    'embed_images': args.embed_images,
+                    'html_path': html_path,
+                    'pdf': args.pdf,
+                    'validate': args.validate,
+                }))
+            results = converter.convert_batch(jobs, converter._resolve_workers(args.jobs))
         else:
-            results = converter.convert_all_files(toc=args.toc, toc_levels=args.toc_levels, number_headings=args.number_headings, max_image_width=args.max_image_width, max_image_height=args.max_image_height, image_quality=args.image_quality, download_remote_images=args.download_remote_images, embed_images=args.embed_images)
+            results = converter.convert_all_files(toc=args.toc, toc_levels=args.toc_levels, number_headings=args.number_headings, max_image_width=args.max_image_width, max_image_height=args.max_image_height, image_quality=args.image_quality, download_remote_images=args.download_remote_images, embed_images=args.embed_images, jobs=args.jobs, incremental=args.incremental, validate=args.validate)
     except Exception as e:
         print_error(f"Error durante la conversión: {e}")
         print_warning("Revisa el log conversion.log para más detalles.")
         print_warning("Sugerencia: Usa --validate para verificar la calidad de tus documentos o --verbose para más detalles.")
         sys.exit(1)
 
+    # Con --validate cada documento se validó en el mismo proceso y con la misma lectura que su conversión
+    if args.validate:
+        print_validation_summary(results, config_manager.get_validation_config(), verbose=args.verbose)
+
     print("-" * 50)
     print("📊 Resumen de conversión:")
     print(f"   Total de archivos: {results['total']}")
     print(f"   ✅ Exitosos: {results['success']}")
     print(f"   ❌ Fallidos: {results['failed']}")
+    if results.get('skipped'):
+        print(f"   ⏭️  Sin cambios: {results['skipped']}")
+    for failed_file, reason in results.get('failures', {}).items():
+        print(f"   ❌ {Path(failed_file).name}: {reason}")
+
+    if args.watch:
+        from cli.watch import WatchSession
+
+        def make_converter() -> MarkdownToPDFConverter:
+            manager = ConfigManager(args.config if args.config else "config.yaml")
+            config = _conversion_config_from_args(args, manager, template_name, explicit_image_size)
+            return MarkdownToPDFConverter(config, manager)
+
+        watch_options = {
+            'toc': args.toc,
+            'toc_levels': args.toc_levels,
+            'number_headings': args.number_headings,
+            'max_image_width': args.max_image_width,
+            'max_image_height': args.max_image_height,
+            'image_quality': args.image_quality,
+            'download_remote_images': args.download_remote_images,
+            'embed_images': args.embed_images,
+        }
+        session = WatchSession(converter, make_converter, config_manager.config_file, watch_options,
+                               html=args.html, pdf=args.pdf, files=files_to_convert or None)
+        print("-" * 50)
+        session.run(polling=args.watch_polling)
+        sys.exit(0)
 
     if results['failed'] > 0:
         print("\n❌ Algunos archivos no se pudieron convertir.")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Servidor residente de conversión con procesos precalentados
+
+Mantiene un pool de procesos que ya importaron WeasyPrint, Markdown, Pygments
+y PIL y que conservan sus convertidores entre peticiones. Acepta trabajos por
+HTTP en localhost o por un socket Unix:
+
+    POST /convert   {"markdown_path": "doc.md"} o {"markdown": "# Texto"}
+    GET  /health
+
+La respuesta es el PDF (application/pdf) o, si el trabajo incluye
+"output_path", un JSON con la ruta generada. Cada trabajo se ejecuta bajo los
+límites performance.memory_limit_mb y performance.timeout_seconds; si los
+supera, su proceso se reemplaza y la respuesta es un 422 con el motivo.
+"""
+
+import argparse
+import json
+import logging
+import os
+import socketserver
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from cli.md_to_pdf_converter import MarkdownToPDFConverter
+from core.config_manager import ConfigManager
+from core.exporter import get_exporter
+from core.supervisor import ResourceLimitError, SupervisedPool
+
+logger = logging.getLogger(__name__)
+
+# Opciones de convert_file que un trabajo puede sobrescribir
+JOB_OPTIONS = {
+    'toc': bool,
+    'toc_levels': int,
+    'number_headings': bool,
+    'max_image_width': int,
+    'max_image_height': int,
+    'image_quality': int,
+    'download_remote_images': bool,
+    'embed_images': bool,
+}
+
+# Estado propio de cada proceso trabajador
+_config_manager: Optional[ConfigManager] = None
+_converters: Dict[Optional[str], MarkdownToPDFConverter] = {}
+
+
+def _init_server_worker(config_file: str):
+    """Carga la configuración y precalienta el convertidor por defecto"""
+    global _config_manager
+    _config_manager = ConfigManager(config_file)
+    _get_converter(None)
+    get_exporter()
+
+
+def _get_converter(template: Optional[str]) -> MarkdownToPDFConverter:
+    """Devuelve el convertidor del template, creándolo la primera vez"""
+    if template not in _converters:
+        config = _config_manager.get_conversion_config(template)
+        _converters[template] = MarkdownToPDFConverter(config, _config_manager)
+    return _converters[template]
+
+
+def _run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecuta un trabajo de conversión dentro del proceso trabajador"""
+    converter = _get_converter(job.get('template'))
+    options = job['options']
+    output_path = job.get('output_path')
+
+    with tempfile.TemporaryDirectory(prefix='md2pdf_') as tmp_dir:
+        base_dir = None
+        if job.get('markdown_path'):
+            markdown_file = Path(job['markdown_path'])
+        else:
+            # El texto se resuelve contra base_dir para las rutas relativas de imágenes
+            base_dir = Path(job.get('base_dir') or tmp_dir)
+            markdown_file = Path(tmp_dir) / f"{job.get('name') or 'documento'}.md"
+            markdown_file.write_text(job['markdown'], encoding='utf-8')
+
+        pdf_path = Path(output_path) if output_path else Path(tmp_dir) / (markdown_file.stem + '.pdf')
+        if not converter.convert_file(markdown_file, output_path=pdf_path, base_dir=base_dir, **options):
+            return {'success': False, 'error': f"No se pudo convertir {markdown_file.name}"}
+
+        if output_path:
+            return {'success': True, 'output_path': str(pdf_path)}
+        return {'success': True, 'pdf': pdf_path.read_bytes()}
+
+
+def parse_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida el cuerpo JSON de una petición y lo normaliza como trabajo"""
+    if not isinstance(payload, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    if bool(payload.get('markdown_path')) == ('markdown' in payload):
+        raise ValueError("Indica exactamente uno de 'markdown_path' o 'markdown'")
+    if payload.get('markdown_path') and not Path(payload['markdown_path']).is_file():
+        raise ValueError(f"El archivo no existe: {payload['markdown_path']}")
+
+    options = {}
+    for key, value in (payload.get('options') or {}).items():
+        if key not in JOB_OPTIONS:
+            raise ValueError(f"Opción desconocida: {key}")
+        options[key] = JOB_OPTIONS[key](value)
+
+    return {
+        'markdown_path': payload.get('markdown_path'),
+        'markdown': payload.get('markdown'),
+        'name': Path(payload.get('name') or 'documento').stem,
+        'base_dir': payload.get('base_dir'),
+        'template': payload.get('template'),
+        'output_path': payload.get('output_path'),
+        'options': options,
+    }
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Manejador HTTP de las peticiones de conversión"""
+
+    server_version = "MarkdownPDF/1.0"
+
+    def address_string(self) -> str:
+        # En sockets Unix client_address es una cadena vacía
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format: str, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'workers': self.server.workers})
+        else:
+            self._send_json(404, {'success': False, 'error': 'Ruta no encontrada'})
+
+    def do_POST(self):
+        if self.path != '/convert':
+            self._send_json(404, {'success': False, 'error': 'Ruta no encontrada'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = parse_job(json.loads(self.rfile.read(length) or b'{}'))
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'success': False, 'error': str(e)})
+            return
+
+        try:
+            result = self.server.executor.submit(_run_job, job).result()
+        except ResourceLimitError as e:
+            logger.error(f"❌ Trabajo cancelado: {e.reason}")
+            self._send_json(422, {'success': False, 'error': e.reason})
+            return
+        except Exception as e:
+            logger.error(f"❌ Error en el trabajo de conversión: {e}")
+            self._send_json(500, {'success': False, 'error': str(e)})
+            return
+
+        if not result['success']:
+            self._send_json(422, result)
+        elif 'pdf' in result:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+            self.send_header('Content-Length', str(len(result['pdf'])))
+            self.end_headers()
+            self.wfile.write(result['pdf'])
+        else:
+            self._send_json(200, result)
+
+
+class ConversionHTTPServer(ThreadingHTTPServer):
+    """Servidor HTTP en localhost que delega en el pool de procesos"""
+    daemon_threads = True
+
+
+class ConversionUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor HTTP sobre un socket Unix que delega en el pool de procesos"""
+    daemon_threads = True
+
+
+def create_server(executor: SupervisedPool, workers: int, host: str = '127.0.0.1',
+                  port: int = 8765, socket_path: Optional[str] = None):
+    """Crea el servidor HTTP o de socket Unix asociado al pool"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = ConversionUnixServer(socket_path, ConversionRequestHandler)
+    else:
+        server = ConversionHTTPServer((host, port), ConversionRequestHandler)
+    server.executor = executor
+    server.workers = workers
+    return server
+
+
+def serve_main(argv: Optional[list] = None) -> int:
+    """Punto de entrada de `md_to_pdf_converter serve`"""
+    parser = argparse.ArgumentParser(
+        prog='md_to_pdf_converter serve',
+        description='Servidor residente de conversión Markdown a PDF con procesos precalentados'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Dirección de escucha (por defecto: 127.0.0.1)')
+    parser.add_argument('--port', '-p', type=int, default=8765, help='Puerto HTTP (por defecto: 8765)')
+    parser.add_argument('--socket', help='Escuchar en un socket Unix en lugar de HTTP en localhost')
+    parser.add_argument('--workers', '-w', type=int,
+                        help='Procesos precalentados (por defecto: performance.max_workers de config.yaml)')
+    parser.add_argument('--config', '-c', default='config.yaml', help='Archivo de configuración')
+    args = parser.parse_args(argv)
+
+    try:
+        config_manager = ConfigManager(args.config)
+    except Exception as e:
+        print(f"❌ Error al cargar la configuración: {e}")
+        return 1
+    performance = config_manager.get_performance_config()
+    workers = max(1, args.workers or performance.max_workers)
+
+    # Los procesos arrancan y se precalientan al crear el pool, antes de aceptar trabajos
+    with SupervisedPool(workers, _init_server_worker, (args.config,),
+                        memory_limit_mb=performance.memory_limit_mb,
+                        timeout_seconds=performance.timeout_seconds) as executor:
+        server = create_server(executor, workers, args.host, args.port, args.socket)
+        address = args.socket or f"http://{args.host}:{args.port}"
+        print(f"🚀 Servidor de conversión escuchando en {address} con {workers} procesos")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Deteniendo servidor...")
+        finally:
+            server.server_close()
+            if args.socket and os.path.exists(args.socket):
+                os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve_main())
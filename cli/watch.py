@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Modo --watch: recompila los documentos afectados por cada cambio guardado
+
+Vigila el directorio de entrada, el CSS activo y config.yaml. Los cambios de una
+ráfaga de guardados se agrupan y solo se regeneran los documentos afectados, con
+un convertidor que ya está inicializado (módulos importados, motor Markdown,
+fuentes y hojas de estilo parseadas). La previsualización HTML de todos los
+documentos afectados se escribe antes de empezar con los PDFs.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from cli.md_to_pdf_converter import MarkdownToPDFConverter
+from core.exporter import get_exporter
+from core.watcher import DEBOUNCE_SECONDS, create_watcher, debounced_changes
+
+logger = logging.getLogger(__name__)
+
+
+class WatchSession:
+    """Estado del modo --watch: convertidor activo y documentos vigilados"""
+
+    def __init__(self, converter: MarkdownToPDFConverter, make_converter: Callable[[], MarkdownToPDFConverter],
+                 config_file: Path, options: Dict[str, Any], html: bool = False, pdf: bool = True,
+                 files: Optional[List[Path]] = None):
+        self.converter = converter
+        self.make_converter = make_converter
+        self.config_file = Path(config_file).resolve()
+        self.options = options
+        self.html = html
+        self.pdf = pdf
+        self.files = [Path(f).resolve() for f in files] if files else None
+        # Imágenes locales de cada documento, por mtime del Markdown
+        self._assets: Dict[Path, Tuple[int, Set[Path]]] = {}
+
+    @property
+    def style_file(self) -> Optional[Path]:
+        style_file = self.converter.style_file
+        return style_file.resolve() if style_file is not None else None
+
+    def markdown_files(self) -> List[Path]:
+        """Documentos vigilados: los de --file o los .md del directorio de entrada (sección discovery)"""
+        if self.files is not None:
+            return [f for f in self.files if f.is_file()]
+        return sorted(f.resolve() for f in self.converter.discover())
+
+    def watched_directories(self) -> List[Path]:
+        """Directorio de entrada (recursivo) y directorios del CSS y de config.yaml"""
+        directories = [self.converter.input_dir.resolve()]
+        if self.style_file is not None:
+            directories.append(self.style_file.parent)
+        directories.append(self.config_file.parent)
+        return directories
+
+    def affected(self, changed: Set[Path]) -> Tuple[List[Path], bool]:
+        """Documentos a regenerar por los cambios y si hay que recargar la configuración"""
+        changed = {path.resolve() for path in changed}
+        markdown_files = self.markdown_files()
+        if self.config_file in changed:
+            return markdown_files, True
+        if self.style_file in changed or any(path.is_dir() for path in changed):
+            return markdown_files, False
+
+        targets = [f for f in markdown_files if f in changed]
+        input_dir = self.converter.input_dir.resolve()
+        assets = {path for path in changed - set(markdown_files) if input_dir in path.parents}
+        if assets:
+            # Imágenes u otros archivos locales: los documentos que los referencian
+            targets.extend(f for f in markdown_files if f not in targets and self.document_assets(f) & assets)
+        return targets, False
+
+    def document_assets(self, markdown_file: Path) -> Set[Path]:
+        """Imágenes locales del documento, tal como las resuelve el renderizador (document.assets)
+
+        El Markdown se renderiza sin procesar imágenes y el resultado se reutiliza mientras
+        el archivo no cambie.
+        """
+        try:
+            mtime = markdown_file.stat().st_mtime_ns
+        except OSError:
+            return set()
+        cached = self._assets.get(markdown_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        document = self.converter._load_document(markdown_file)
+        if document is None:
+            return set()
+        self.converter._render_markdown(document)
+        assets = {path.resolve() for path in document.assets}
+        self._assets[markdown_file] = (mtime, assets)
+        return assets
+
+    def reload(self) -> bool:
+        """Recrea el convertidor con la configuración nueva; conserva el anterior si falla"""
+        try:
+            self.converter = self.make_converter()
+            self._assets.clear()
+        except Exception as e:
+            logger.error(f"❌ No se pudo recargar {self.config_file.name}: {e}; se mantiene la configuración anterior")
+            return False
+        logger.info(f"🔧 Configuración recargada desde {self.config_file.name}")
+        return True
+
+    def rebuild(self, changed: Set[Path]) -> Optional[Dict[str, Any]]:
+        """Regenera los documentos afectados por un lote de cambios; None si no hay ninguno"""
+        targets, reload = self.affected(changed)
+        if reload:
+            self.reload()
+            targets = self.markdown_files()
+        if not targets:
+            return None
+
+        names = ', '.join(f.name for f in targets)
+        logger.info(f"🔄 Cambios detectados; regenerando {len(targets)} documentos: {names}")
+        start = time.perf_counter()
+        results = self.converter.convert_previews_first(targets, self.options, html=self.html, pdf=self.pdf)
+        elapsed = time.perf_counter() - start
+        if results['failed']:
+            for failed_file, reason in results['failures'].items():
+                logger.error(f"❌ {Path(failed_file).name}: {reason}")
+        logger.info(f"⏱️  {results['success']}/{results['total']} documentos regenerados en {elapsed:.2f}s")
+        return results
+
+    def run(self, debounce: float = DEBOUNCE_SECONDS, polling: bool = False):
+        """Bucle principal: espera cambios y regenera hasta Ctrl+C"""
+        if self.pdf:
+            # Fuentes del sistema cargadas antes del primer cambio
+            get_exporter()
+        directories = self.watched_directories()
+        watcher = create_watcher(directories, exclude=[self.converter.output_dir], polling=polling)
+        print(f"👀 Vigilando {self.converter.input_dir} ({watcher.backend}); Ctrl+C para salir")
+        try:
+            while True:
+                for changed in debounced_changes(watcher, debounce):
+                    self.rebuild(changed)
+                    if self.watched_directories() != directories:
+                        break
+                else:
+                    break
+                # La configuración recargada cambió la entrada o el CSS: vigilar los directorios nuevos
+                watcher.close()
+                directories = self.watched_directories()
+                watcher = create_watcher(directories, exclude=[self.converter.output_dir], polling=polling)
+                print(f"👀 Vigilando {self.converter.input_dir} ({watcher.backend})")
+        except KeyboardInterrupt:
+            print("\n🛑 Vigilancia detenida")
+        finally:
+            watcher.close()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Caché persistente en disco para los PDFs generados y las imágenes remotas
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import threading
+import time
+import urllib.parse
+from functools import lru_cache
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el formato de las claves o el HTML generado para invalidar entradas antiguas
+CACHE_FORMAT_VERSION = 2
+
+# Bibliotecas cuya versión afecta al resultado del renderizado
+RENDER_LIBRARIES = ('weasyprint', 'markdown', 'Pygments', 'Pillow')
+
+
+@lru_cache(maxsize=1)
+def library_versions() -> Dict[str, str]:
+    """Versiones instaladas de las bibliotecas de renderizado"""
+    versions = {}
+    for name in RENDER_LIBRARIES:
+        try:
+            versions[name] = importlib_metadata.version(name)
+        except importlib_metadata.PackageNotFoundError:
+            versions[name] = 'desconocida'
+    return versions
+
+
+def hash_key(*parts: Any) -> str:
+    """Calcula una clave SHA-256 estable a partir de valores serializables en JSON"""
+    digest = hashlib.sha256()
+    digest.update(str(CACHE_FORMAT_VERSION).encode('utf-8'))
+    for part in parts:
+        if isinstance(part, bytes):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _scan_entries(directory: Path, suffix: str) -> List[Tuple[float, int, Path]]:
+    """Lista (mtime, tamaño, ruta) de las entradas de la caché"""
+    entries = []
+    for path in directory.glob(f"*/*{suffix}"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict_lru(directory: Path, max_bytes: int, suffix: str) -> int:
+    """Elimina las entradas menos usadas hasta quedar bajo el límite; devuelve el tamaño final"""
+    entries = _scan_entries(directory, suffix)
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return total
+
+    for _, size, path in sorted(entries):
+        try:
+            path.unlink()
+        except OSError:
+            continue
+        total -= size
+        logger.debug(f"Entrada de caché eliminada (LRU): {path.name}")
+        if total <= max_bytes:
+            break
+    return total
+
+
+class RenderCache:
+    """Caché direccionada por contenido de PDFs renderizados con desalojo LRU"""
+
+    suffix = '.pdf'
+
+    def __init__(self, directory: Path, max_size_mb: int = 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self._size = None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key: str, destination: Path) -> bool:
+        """Coloca la entrada en destination (enlace duro o copia); False si no existe"""
+        entry = self._entry_path(key)
+        if not entry.exists():
+            return False
+
+        try:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            destination.unlink(missing_ok=True)
+            try:
+                os.link(entry, destination)
+            except OSError:
+                shutil.copyfile(entry, destination)
+            # Marcar la entrada como usada recientemente para el LRU
+            os.utime(entry)
+            return True
+        except OSError as e:
+            logger.warning(f"No se pudo reutilizar la entrada de caché {entry.name}: {e}")
+            return False
+
+    def put(self, key: str, source: Path):
+        """Guarda una copia de source en la caché y aplica el límite de tamaño"""
+        entry = self._entry_path(key)
+        # Escritura atómica: otros procesos del lote pueden leer la misma caché
+        tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, entry)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar en caché {source.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in _scan_entries(self.directory, self.suffix))
+        else:
+            self._size += entry.stat().st_size
+        if self._size > self.max_bytes:
+            self._size = evict_lru(self.directory, self.max_bytes, self.suffix)
+
+
+class AssetCache:
+    """Caché compartida de imágenes remotas, direccionada por el SHA-256 de la URL
+
+    Cada entrada guarda el contenido y un archivo .json con ETag/Last-Modified. Dentro
+    del TTL se sirve sin red; después se revalida con una petición condicional.
+    """
+
+    def __init__(self, directory: Path, max_size_mb: int = 512, ttl_seconds: int = 86400, offline: bool = False):
+        self.directory = Path(directory)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+        self._size = None
+        # Las descargas concurrentes comparten el contador de tamaño
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _load_meta(self, meta_path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, path: Path, data: bytes):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _save_meta(self, meta_path: Path, meta: Dict[str, Any]):
+        self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    @staticmethod
+    def _suffix(url: str, content_type: Optional[str]) -> str:
+        """Extensión del archivo: la de la URL o, si no tiene, la del tipo de contenido"""
+        suffix = Path(urllib.parse.urlparse(url).path).suffix.lower()
+        if suffix and len(suffix) <= 5:
+            return suffix
+        if content_type:
+            guessed = mimetypes.guess_extension(content_type.split(';')[0].strip())
+            if guessed:
+                return guessed
+        return '.jpg'
+
+    def fetch(self, url: str, session, timeout: int = 30) -> Optional[Path]:
+        """Devuelve la ruta local de la imagen, descargándola o revalidándola si hace falta"""
+        key = hash_key('asset', url)
+        meta_path = self._meta_path(key)
+        meta = self._load_meta(meta_path)
+        body = meta_path.with_name(meta['file']) if meta else None
+        if body is not None and not body.exists():
+            meta = body = None
+
+        if meta is not None and (self.offline or time.time() - meta.get('fetched_at', 0) < self.ttl_seconds):
+            # Marcar la entrada como usada recientemente para el LRU
+            os.utime(meta_path)
+            return body
+        if meta is None and self.offline:
+            logger.warning(f"Modo sin conexión: imagen no disponible en caché: {url}")
+            return None
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            logger.info(f"Descargando imagen remota: {url}")
+            response = session.get(url, headers=headers, timeout=timeout)
+            if response.status_code == 304 and meta is not None:
+                meta['fetched_at'] = time.time()
+                self._save_meta(meta_path, meta)
+                return body
+            response.raise_for_status()
+        except Exception as e:
+            if body is not None:
+                logger.warning(f"No se pudo revalidar {url} ({e}); se usa la copia en caché")
+                return body
+            raise
+
+        content_type = response.headers.get('content-type')
+        body = meta_path.with_name(f"{key}{self._suffix(url, content_type)}")
+        body.parent.mkdir(parents=True, exist_ok=True)
+        self._write_atomic(body, response.content)
+        self._save_meta(meta_path, {
+            'url': url,
+            'file': body.name,
+            'etag': response.headers.get('etag'),
+            'last_modified': response.headers.get('last-modified'),
+            'content_type': content_type,
+            'fetched_at': time.time(),
+        })
+        self._track(len(response.content))
+        return body
+
+    def _track(self, added: int):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += added
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """(último uso, tamaño del contenido, metadatos) de cada entrada"""
+        entries = []
+        for mtime, _, meta_path in _scan_entries(self.directory, '.json'):
+            meta = self._load_meta(meta_path)
+            try:
+                size = meta_path.with_name(meta['file']).stat().st_size if meta else 0
+            except OSError:
+                size = 0
+            entries.append((mtime, size, meta_path))
+        return entries
+
+    def _evict(self):
+        """Elimina las imágenes menos usadas hasta quedar bajo el límite de tamaño"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in meta_path.parent.glob(f"{meta_path.stem}.*"):
+                path.unlink(missing_ok=True)
+            total -= size
+            logger.debug(f"Imagen eliminada de la caché (LRU): {meta_path.stem}")
+        self._size = total
@@ -5,7 +5,7 @@ Gestor de configuración para el conversor de Markdown a PDF
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import yaml
 
@@ -30,6 +30,9 @@ class ValidationConfig:
     check_missing_images: bool
     check_empty_files: bool
     max_file_size_mb: int
+    max_issues_per_type: int = 100
+    aggregate_issues: bool = False
+    allowed_characters: str = 'áéíóúñüÁÉÍÓÚÑÜ'
 
 
 @dataclass
@@ -42,6 +45,48 @@ class MetadataConfig:
     include_modification_date: bool
 
 
+@dataclass
+class PerformanceConfig:
+    """Configuración de rendimiento para el procesamiento por lotes"""
+    max_workers: int
+    chunk_size: int
+    timeout_seconds: int
+    memory_limit_mb: int
+    image_workers: int
+    chunked: bool
+
+
+@dataclass
+class OutputConfig:
+    """Configuración de salida para el tratamiento de imágenes"""
+    optimize_images: bool
+    dpi: int
+    image_quality: int
+    embed_max_mb: int
+
+
+@dataclass
+class CacheConfig:
+    """Configuración de la caché de renderizado y de imágenes remotas"""
+    enabled: bool
+    directory: str
+    max_size_mb: int
+    assets_enabled: bool
+    assets_directory: str
+    assets_max_size_mb: int
+    assets_ttl_seconds: int
+    offline: bool
+
+
+@dataclass
+class DiscoveryConfig:
+    """Configuración de la búsqueda de archivos Markdown en el directorio de entrada"""
+    recursive: bool
+    exclude: List[str]
+    mirror_output: bool
+    workers: int
+
+
 class ConfigManager:
     """Gestor de configuración del proyecto"""
     
@@ -99,7 +144,10 @@ class ConfigManager:
                 'check_broken_links': True,
                 'check_missing_images': True,
                 'check_empty_files': True,
-                'max_file_size_mb': 10
+                'max_file_size_mb': 10,
+                'max_issues_per_type': 100,
+                'aggregate_issues': False,
+                'allowed_characters': 'áéíóúñüÁÉÍÓÚÑÜ'
             },
             'metadata': {
                 'default_author': 'Usuario',
@@ -107,6 +155,36 @@ class ConfigManager:
                 'default_date_format': '%Y-%m-%d',
                 'include_creation_date': True,
                 'include_modification_date': True
+            },
+            'performance': {
+                'max_workers': 4,
+                'chunk_size': 1024,
+                'timeout_seconds': 30,
+                'memory_limit_mb': 512,
+                'image_workers': 0,
+                'chunked': False
+            },
+            'discovery': {
+                'recursive': True,
+                'exclude': [],
+                'mirror_output': True,
+                'workers': 8
+            },
+            'cache': {
+                'enabled': True,
+                'directory': './.cache/render',
+                'max_size_mb': 1024,
+                'assets_enabled': True,
+                'assets_directory': './.cache/assets',
+                'assets_max_size_mb': 512,
+                'assets_ttl_seconds': 86400,
+                'offline': False
+            },
+            'output': {
+                'optimize_images': True,
+                'dpi': 300,
+                'image_quality': 85,
+                'embed_max_mb': 20
             }
         }
     
@@ -135,7 +213,10 @@ class ConfigManager:
             check_broken_links=validation.get('check_broken_links', True),
             check_missing_images=validation.get('check_missing_images', True),
             check_empty_files=validation.get('check_empty_files', True),
-            max_file_size_mb=validation.get('max_file_size_mb', 10)
+            max_file_size_mb=validation.get('max_file_size_mb', 10),
+            max_issues_per_type=validation.get('max_issues_per_type', 100),
+            aggregate_issues=validation.get('aggregate_issues', False),
+            allowed_characters=validation.get('allowed_characters', 'áéíóúñüÁÉÍÓÚÑÜ')
         )
     
     def get_metadata_config(self) -> MetadataConfig:
@@ -149,6 +230,52 @@ class ConfigManager:
             include_modification_date=metadata.get('include_modification_date', True)
         )
     
+    def get_performance_config(self) -> PerformanceConfig:
+        """Obtener configuración de rendimiento"""
+        performance = self.config.get('performance', {})
+        return PerformanceConfig(
+            max_workers=performance.get('max_workers', 4),
+            chunk_size=performance.get('chunk_size', 1024),
+            timeout_seconds=performance.get('timeout_seconds', 30),
+            memory_limit_mb=performance.get('memory_limit_mb', 512),
+            image_workers=performance.get('image_workers', 0),
+            chunked=performance.get('chunked', False)
+        )
+    
+    def get_output_config(self) -> OutputConfig:
+        """Obtener configuración de salida"""
+        output = self.config.get('output', {})
+        return OutputConfig(
+            optimize_images=output.get('optimize_images', True),
+            dpi=output.get('dpi', 300),
+            image_quality=output.get('image_quality', 85),
+            embed_max_mb=output.get('embed_max_mb', 20)
+        )
+    
+    def get_cache_config(self) -> CacheConfig:
+        """Obtener configuración de la caché de renderizado y de imágenes remotas"""
+        cache = self.config.get('cache', {})
+        return CacheConfig(
+            enabled=cache.get('enabled', True),
+            directory=cache.get('directory', './.cache/render'),
+            max_size_mb=cache.get('max_size_mb', 1024),
+            assets_enabled=cache.get('assets_enabled', True),
+            assets_directory=cache.get('assets_directory', './.cache/assets'),
+            assets_max_size_mb=cache.get('assets_max_size_mb', 512),
+            assets_ttl_seconds=cache.get('assets_ttl_seconds', 86400),
+            offline=cache.get('offline', False)
+        )
+    
+    def get_discovery_config(self) -> DiscoveryConfig:
+        """Obtener configuración de la búsqueda de archivos Markdown"""
+        discovery = self.config.get('discovery', {})
+        return DiscoveryConfig(
+            recursive=discovery.get('recursive', True),
+            exclude=list(discovery.get('exclude') or []),
+            mirror_output=discovery.get('mirror_output', True),
+            workers=discovery.get('workers', 8)
+        )
+    
     def get_logging_config(self) -> Dict[str, Any]:
         """Obtener configuración de logging"""
         return self.config.get('logging', {
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de archivos Markdown en el directorio de entrada
+
+El recorrido usa os.scandir en varios hilos (uno por directorio pendiente) y
+entrega los archivos a medida que los encuentra, para que la conversión pueda
+empezar antes de terminar el recorrido. Los patrones de exclusión siguen la
+sintaxis de .gitignore. Un mismo MarkdownDiscovery se comparte entre la
+validación y la conversión: el árbol se recorre una sola vez.
+"""
+
+import logging
+import os
+import queue
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_SUFFIX = '.md'
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Traduce un patrón estilo .gitignore ('*', '?', '[...]', '**') a expresión regular"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+            continue
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append(f'[{body}]')
+                i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return ''.join(regex)
+
+
+class ExcludePatterns:
+    """Patrones de exclusión con la sintaxis de .gitignore
+
+    - Un patrón sin '/' se compara con el nombre en cualquier nivel (`borradores`, `*.tmp.md`).
+    - Un patrón con '/' se ancla al directorio de entrada (`docs/antiguo`, `/README.md`).
+    - Un '/' final limita el patrón a directorios (`build/`); '**' abarca varios niveles.
+    - '!' al principio vuelve a incluir lo excluido por un patrón anterior.
+    - Las líneas vacías y las que empiezan por '#' se ignoran.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.rules: List[Tuple[re.Pattern, bool, bool, bool]] = []
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern: str):
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith('#'):
+            return
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        directory_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        if not pattern:
+            return
+        self.rules.append((re.compile(_glob_to_regex(pattern) + r'\Z'), anchored, directory_only, negate))
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def excluded(self, relative_path: str, is_dir: bool) -> bool:
+        """Indica si la ruta (relativa a la entrada, con '/') queda excluida; gana el último patrón"""
+        name = relative_path.rsplit('/', 1)[-1]
+        excluded = False
+        for regex, anchored, directory_only, negate in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if regex.match(relative_path if anchored else name):
+                excluded = not negate
+        return excluded
+
+
+def walk_markdown(root: Path, exclude: Optional[ExcludePatterns] = None, recursive: bool = True,
+                  workers: int = 8, skip: Sequence[Path] = ()) -> Iterator[Path]:
+    """Entrega los archivos .md bajo root a medida que se encuentran
+
+    Cada directorio se lee con os.scandir en un hilo del pool; los subdirectorios se
+    encolan en cuanto aparecen. Se omiten los directorios ocultos, los de `skip` (por
+    ejemplo, el de salida si está dentro de la entrada) y los excluidos, sin recorrerlos.
+    Los enlaces simbólicos a directorios se siguen, pero cada directorio (st_dev, st_ino)
+    se recorre una sola vez, así que un ciclo de enlaces no bloquea el recorrido.
+    El orden entre directorios no está definido; dentro de cada uno es alfabético.
+    """
+    root = Path(root)
+    exclude = exclude or ExcludePatterns()
+    skipped = {os.path.normcase(os.path.abspath(p)) for p in skip}
+    results: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+    visited = set()
+    visited_lock = threading.Lock()
+
+    def first_visit(stat: os.stat_result) -> bool:
+        key = (stat.st_dev, stat.st_ino)
+        with visited_lock:
+            if key in visited:
+                return False
+            visited.add(key)
+            return True
+
+    def scan(directory: str, relative: str):
+        files, subdirectories = [], []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    rel = f"{relative}{entry.name}"
+                    try:
+                        if entry.is_dir():
+                            if (recursive and os.path.normcase(os.path.abspath(entry.path)) not in skipped
+                                    and not exclude.excluded(rel, True) and first_visit(entry.stat())):
+                                subdirectories.append((entry.path, rel + '/'))
+                            continue
+                    except OSError:
+                        continue
+                    if entry.name.endswith(MARKDOWN_SUFFIX) and not exclude.excluded(rel, False):
+                        files.append(entry.path)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo leer el directorio {directory}: {e}")
+        finally:
+            if stop.is_set():
+                subdirectories = []
+            # El número de subdirectorios que se lanzarán permite saber cuándo termina el
+            # recorrido; se publica antes de lanzarlos para que ningún hijo llegue primero
+            results.put((sorted(files), len(subdirectories)))
+            for subdirectory in subdirectories:
+                pool.submit(scan, *subdirectory)
+
+    try:
+        first_visit(os.stat(root))
+    except OSError:
+        pass
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='discovery')
+    try:
+        pool.submit(scan, str(root), '')
+        outstanding = 1
+        while outstanding:
+            files, launched = results.get()
+            outstanding += launched - 1
+            for file_path in files:
+                yield Path(file_path)
+    finally:
+        # Si el consumidor abandona el recorrido, no se lanzan más directorios
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class MarkdownDiscovery:
+    """Lista de archivos .md de la entrada, recorrida una vez y reutilizada por cada fase
+
+    La primera iteración recorre el árbol y entrega cada archivo en cuanto se encuentra;
+    las siguientes repiten la lista ya obtenida sin volver a leer el disco.
+    """
+
+    def __init__(self, root: Path, exclude: Iterable[str] = (), recursive: bool = True,
+                 workers: int = 8, skip: Sequence[Path] = ()):
+        self.root = Path(root)
+        self.exclude = ExcludePatterns(exclude)
+        self.recursive = recursive
+        self.workers = workers
+        self.skip = list(skip)
+        self._files: Optional[List[Path]] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, root: Path, config, skip: Sequence[Path] = ()) -> "MarkdownDiscovery":
+        """Construye el recorrido a partir de DiscoveryConfig"""
+        return cls(root, config.exclude, config.recursive, config.workers, skip)
+
+    def __iter__(self) -> Iterator[Path]:
+        if self._files is not None:
+            yield from self._files
+            return
+        found = []
+        for file_path in walk_markdown(self.root, self.exclude, self.recursive, self.workers, self.skip):
+            found.append(file_path)
+            yield file_path
+        # Solo un recorrido completo se guarda para las fases siguientes
+        with self._lock:
+            self._files = found
+
+    def files(self) -> List[Path]:
+        """Todos los archivos, ordenados por ruta"""
+        return sorted(self)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Documento Markdown que recorre el flujo de conversión
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.parser import extract_metadata
+
+
+@dataclass
+class Document:
+    """Documento leído y parseado una sola vez: contenido, metadatos, HTML, headings, validación y tiempos"""
+    path: Path
+    raw: bytes
+    text: str
+    metadata: Dict[str, Any]
+    body: str
+    html: Optional[str] = None
+    markdown_html: Optional[str] = None
+    assets: List[Path] = field(default_factory=list)
+    remote_assets: List[str] = field(default_factory=list)
+    headings: List[Any] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    base_dir: Optional[Path] = None
+    # Resultados del validador (MarkdownValidator.validate_document): enlaces, imágenes y headings
+    links: List[Any] = field(default_factory=list)
+    images: List[Any] = field(default_factory=list)
+    outline: List[Any] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path) -> "Document":
+        """Lee el archivo y separa los metadatos YAML del cuerpo"""
+        start = time.perf_counter()
+        raw = Path(path).read_bytes()
+        text = raw.decode('utf-8')
+        # Mismo resultado que open(..., 'r'): saltos de línea universales
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        metadata, body = extract_metadata(text)
+        document = cls(Path(path), raw, text, metadata, body)
+        document.timings['read'] = time.perf_counter() - start
+        return document
+
+    @property
+    def asset_dir(self) -> Path:
+        """Directorio contra el que se resuelven las rutas relativas (por defecto, el del archivo)"""
+        return Path(self.base_dir) if self.base_dir is not None else self.path.parent
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.text.strip()
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Acumula en timings el tiempo de una etapa del flujo"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+
+    def format_timings(self) -> str:
+        return ', '.join(f"{stage}: {seconds * 1000:.1f} ms" for stage, seconds in self.timings.items())
@@ -1,15 +1,107 @@
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterable, Optional, Sequence
 
 from weasyprint import CSS, HTML
 from weasyprint.text.fonts import FontConfiguration
 
 
-def export_pdf(html_content: str, output_path: Path, base_url: Path, style_file: Optional[Path] = None):
-    font_config = FontConfiguration()
-    stylesheets = [CSS(filename=str(style_file))] if style_file and style_file.exists() else None
-    HTML(string=html_content, base_url=base_url).write_pdf(
-        output_path,
-        stylesheets=stylesheets,
-        font_config=font_config
-    ) 
\ No newline at end of file
+class PdfExporter:
+    """Exportador a PDF que reutiliza la configuración de fuentes y las hojas de estilo ya parseadas"""
+
+    def __init__(self, max_stylesheets: int = 16):
+        self.font_config = FontConfiguration()
+        self.max_stylesheets = max_stylesheets
+        self._stylesheets: "OrderedDict[tuple, CSS]" = OrderedDict()
+
+    def _cached(self, key: tuple, build) -> CSS:
+        """Busca la hoja de estilos en la caché LRU o la construye con build()"""
+        stylesheet = self._stylesheets.get(key)
+        if stylesheet is not None:
+            self._stylesheets.move_to_end(key)
+            return stylesheet
+
+        stylesheet = build()
+        self._stylesheets[key] = stylesheet
+        if len(self._stylesheets) > self.max_stylesheets:
+            self._stylesheets.popitem(last=False)
+        return stylesheet
+
+    def get_stylesheet(self, style_file: Path) -> CSS:
+        """Devuelve la hoja de estilos parseada, invalidándola si el archivo cambió"""
+        key = (str(Path(style_file).resolve()), style_file.stat().st_mtime_ns)
+        return self._cached(key, lambda: CSS(filename=str(style_file), font_config=self.font_config))
+
+    def get_stylesheets(self, style_file: Optional[Path] = None, extra_css: Sequence[str] = ()) -> list:
+        """Conjunto de hojas de estilo del template: reglas adicionales seguidas del archivo CSS"""
+        stylesheets = [
+            self._cached(('<string>', css), lambda css=css: CSS(string=css, font_config=self.font_config))
+            for css in extra_css
+        ]
+        if style_file and style_file.exists():
+            stylesheets.append(self.get_stylesheet(style_file))
+        return stylesheets
+
+    def export(self, html_content: str, output_path: Path, base_url: Path, style_file: Optional[Path] = None,
+               extra_css: Sequence[str] = ()):
+        stylesheets = self.get_stylesheets(style_file, extra_css) or None
+        HTML(string=html_content, base_url=base_url).write_pdf(
+            output_path,
+            stylesheets=stylesheets,
+            font_config=self.font_config
+        )
+
+    
+    def export_chunks(self, chunks: Iterable[str], output_path: Path, base_url: Path, style_file: Optional[Path] = None,
+                      extra_css: Sequence[str] = (), progress: Optional[Callable[[int, int], None]] = None):
+        """Renderiza cada fragmento HTML por separado y une sus páginas en un único PDF
+        
+        Sirve para informar del progreso: progress(fragmento, páginas acumuladas) se llama tras
+        renderizar cada uno. Las páginas maquetadas de todos los fragmentos se conservan hasta
+        escribir el PDF (los enlaces internos #ancla se resuelven sobre el conjunto, así que la
+        TOC enlaza secciones de cualquier fragmento), por lo que la memoria no queda acotada.
+        """
+        stylesheets = self.get_stylesheets(style_file, extra_css)
+        first = None
+        pages = []
+        for index, chunk in enumerate(chunks, 1):
+            chunk_stylesheets = list(stylesheets)
+            if pages:
+                # La numeración continúa donde terminó el fragmento anterior
+                chunk_stylesheets.append(CSS(string=f'@page :first {{ counter-reset: page {len(pages)} }}',
+                                             font_config=self.font_config))
+            document = HTML(string=chunk, base_url=base_url).render(
+                stylesheets=chunk_stylesheets or None,
+                font_config=self.font_config
+            )
+            if first is None:
+                first = document
+            pages.extend(document.pages)
+            del document
+            if progress is not None:
+                progress(index, len(pages))
+        
+        if first is not None:
+            first.copy(pages).write_pdf(output_path)
+
+
+# Exportador compartido por todos los documentos del proceso
+_exporter: Optional[PdfExporter] = None
+
+
+def get_exporter() -> PdfExporter:
+    """Devuelve el exportador del proceso, creándolo la primera vez"""
+    global _exporter
+    if _exporter is None:
+        _exporter = PdfExporter()
+    return _exporter
+
+
+def export_pdf(html_content: str, output_path: Path, base_url: Path, style_file: Optional[Path] = None,
+               extra_css: Sequence[str] = ()):
+    get_exporter().export(html_content, output_path, base_url, style_file, extra_css)
+
+
+def export_pdf_chunks(chunks: Iterable[str], output_path: Path, base_url: Path, style_file: Optional[Path] = None,
+                      extra_css: Sequence[str] = (), progress: Optional[Callable[[int, int], None]] = None):
+    get_exporter().export_chunks(chunks, output_path, base_url, style_file, extra_css, progress)
@@ -3,97 +3,206 @@
 Procesador de imágenes y SVG para el convertidor Markdown a PDF
 """
 
+import hashlib
+import html
 import os
 import re
+import threading
 import urllib.request
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import Dict, Iterable, Optional, Set, TextIO, Tuple, Union
 from PIL import Image
 import requests
-from io import BytesIO
+from requests.adapters import HTTPAdapter
+from io import BytesIO, StringIO
 import base64
 import mimetypes
 import logging
 
+from core.cache import AssetCache, hash_key
+from core.manifest import file_sha256
+from core.print_layout import PrintLayout
+
 logger = logging.getLogger(__name__)
 
+# Por debajo de este número de colores una imagen se trata como gráfico (PNG)
+PNG_MAX_COLORS = 256
+
+# Tamaño de bloque al codificar imágenes en base64 (múltiplo de 3)
+EMBED_BLOCK_SIZE = 3 * 64 * 1024
+
+# Descargas simultáneas en total y por servidor
+DOWNLOAD_WORKERS = 8
+PER_HOST_LIMIT = 4
+
+_IMG_TAG_RE = re.compile(r'<img[^>]+>')
+_SRC_ATTR_RE = re.compile(r'src=["\']([^"\']+)["\']')
+_ALT_ATTR_RE = re.compile(r'alt=["\']([^"\']*)["\']')
+_WIDTH_ATTR_RE = re.compile(r'\bwidth=["\']?([\d.]+(?:px|%)?)', re.IGNORECASE)
+_STYLE_WIDTH_RE = re.compile(r'style=["\'][^"\']*?(?<![-\w])width\s*:\s*([^;"\']+)', re.IGNORECASE)
+
+# SHA-256 del contenido de cada imagen, memorizado por (ruta, tamaño, mtime)
+_content_hashes: Dict[Tuple[str, int, int], str] = {}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Sesión HTTP compartida del proceso, con conexiones keep-alive reutilizables"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=DOWNLOAD_WORKERS, pool_maxsize=DOWNLOAD_WORKERS)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+def content_hash(path: Path) -> str:
+    """SHA-256 del contenido de un archivo, sin releerlo mientras no cambie"""
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    digest = _content_hashes.get(key)
+    if digest is None:
+        digest = _content_hashes[key] = file_sha256(path)
+    return digest
+
+def has_transparency(img: Image.Image) -> bool:
+    """True si la imagen tiene algún píxel no opaco"""
+    return img.mode in ('RGBA', 'LA') and img.getchannel('A').getextrema()[0] < 255
+
+def choose_output_format(img: Image.Image) -> str:
+    """PNG para transparencias y gráficos planos (pocos colores); JPEG para fotografías"""
+    if has_transparency(img) or img.getcolors(maxcolors=PNG_MAX_COLORS) is not None:
+        return 'PNG'
+    return 'JPEG'
+
 class ImageProcessor:
     """Procesador de imágenes con soporte para redimensionamiento, descarga remota y optimización"""
     
-    def __init__(self, max_width: int = 800, max_height: int = 600, quality: int = 85):
+    def __init__(self, max_width: int = 800, max_height: int = 600, quality: int = 85, asset_cache: Optional[AssetCache] = None, layout: Optional[PrintLayout] = None):
         self.max_width = max_width
         self.max_height = max_height
         self.quality = quality
+        self.asset_cache = asset_cache
+        # Con layout las imágenes se ajustan a la resolución de impresión en lugar de a max_width/max_height
+        self.layout = layout
         self.supported_formats = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg'}
+        # URL remota -> archivo local ya descargado (lo rellena prefetch_remote_images)
+        self.downloaded: Dict[str, Path] = {}
+        self.failed_downloads: Set[str] = set()
         
     def process_image_tag(self, img_tag: str, base_path: Path) -> str:
         """Procesa una etiqueta de imagen y retorna la versión optimizada"""
         try:
             # Extraer atributos de la imagen
-            src_match = re.search(r'src=["\']([^"\']+)["\']', img_tag)
+            src_match = _SRC_ATTR_RE.search(img_tag)
             if not src_match:
                 return img_tag
-                
-            src = src_match.group(1)
-            alt_match = re.search(r'alt=["\']([^"\']*)["\']', img_tag)
-            alt = alt_match.group(1) if alt_match else ""
             
             # Procesar la imagen
-            processed_src = self.process_image_src(src, base_path)
+            processed_src = self.process_image_src(src_match.group(1), base_path)
             
-            # Reconstruir la etiqueta con atributos optimizados
-            new_img_tag = self.build_optimized_img_tag(img_tag, processed_src, alt)
-            
-            return new_img_tag
+            return self.rewrite_image_tag(img_tag, processed_src)
             
         except Exception as e:
             logger.warning(f"Error procesando imagen {img_tag}: {e}")
             return img_tag
     
-    def process_image_src(self, src: str, base_path: Path) -> str:
+    def rewrite_image_tag(self, img_tag: str, processed_src: str) -> str:
+        """Reconstruye la etiqueta con la imagen ya procesada y atributos optimizados"""
+        alt_match = _ALT_ATTR_RE.search(img_tag)
+        alt = alt_match.group(1) if alt_match else ""
+        return self.build_optimized_img_tag(img_tag, processed_src, alt)
+    
+    def process_image_src(self, src: str, base_path: Path, css_width: Optional[str] = None) -> str:
         """Procesa la fuente de una imagen (local o remota)"""
         # Verificar si es una URL remota
         if self.is_remote_url(src):
-            return self.download_and_process_remote_image(src, base_path)
+            return self.download_and_process_remote_image(src, base_path, css_width)
         
         # Procesar imagen local
-        return self.process_local_image(src, base_path)
+        return self.process_local_image(src, base_path, css_width)
     
     def is_remote_url(self, src: str) -> bool:
         """Verifica si la fuente es una URL remota"""
         return src.startswith(('http://', 'https://', '//'))
     
-    def download_and_process_remote_image(self, url: str, base_path: Path) -> str:
-        """Descarga y procesa una imagen remota"""
+    def download_and_process_remote_image(self, url: str, base_path: Path, css_width: Optional[str] = None) -> str:
+        """Descarga (si no se descargó ya) y procesa una imagen remota"""
+        if url in self.failed_downloads:
+            return url
+        local_path = self.downloaded.get(url)
+        if local_path is None:
+            local_path = self.download_remote_image(url, base_path / "downloaded_images")
+            if local_path is None:
+                self.failed_downloads.add(url)
+                return url  # Retornar URL original si falla
+            self.downloaded[url] = local_path
+        
+        # Procesar imagen descargada
+        return self.process_local_image(str(local_path), base_path, css_width)
+    
+    def download_remote_image(self, url: str, images_dir: Path, timeout: int = 30) -> Optional[Path]:
+        """Descarga una imagen remota con la sesión compartida (o la toma de la caché); None si falla"""
         try:
+            if self.asset_cache is not None:
+                return self.asset_cache.fetch(self.absolute_url(url), get_http_session(), timeout=timeout)
+            
             # Crear directorio para imágenes descargadas
-            images_dir = base_path / "downloaded_images"
             images_dir.mkdir(exist_ok=True)
             
-            # Generar nombre de archivo único
-            filename = self.generate_filename_from_url(url)
-            local_path = images_dir / filename
-            
-            # Descargar imagen
             logger.info(f"Descargando imagen remota: {url}")
-            response = requests.get(url, timeout=30)
+            response = get_http_session().get(self.absolute_url(url), timeout=timeout)
             response.raise_for_status()
             
-            # Guardar imagen
+            # El tipo de contenido de la propia respuesta evita una petición HEAD adicional
+            filename = self.generate_filename_from_url(url, response.headers.get('content-type'))
+            local_path = images_dir / filename
             with open(local_path, 'wb') as f:
                 f.write(response.content)
-            
-            # Procesar imagen descargada
-            processed_path = self.process_local_image(str(local_path), base_path)
-            
-            return processed_path
+            return local_path
             
         except Exception as e:
             logger.error(f"Error descargando imagen {url}: {e}")
-            return url  # Retornar URL original si falla
+            return None
     
-    def process_local_image(self, src: str, base_path: Path) -> str:
+    def prefetch_remote_images(self, urls: Iterable[str], base_path: Path, max_workers: int = DOWNLOAD_WORKERS, per_host: int = PER_HOST_LIMIT) -> Dict[str, Path]:
+        """Descarga en paralelo las imágenes remotas indicadas, sin repetir URLs
+        
+        Limita las conexiones simultáneas a cada servidor para no saturarlo.
+        """
+        pending = [url for url in dict.fromkeys(urls)
+                   if self.is_remote_url(url) and url not in self.downloaded and url not in self.failed_downloads]
+        if not pending:
+            return self.downloaded
+        
+        images_dir = base_path / "downloaded_images"
+        hosts = {url: urllib.parse.urlparse(self.absolute_url(url)).netloc for url in pending}
+        host_limits = {host: threading.BoundedSemaphore(per_host) for host in set(hosts.values())}
+        
+        def fetch(url: str):
+            with host_limits[hosts[url]]:
+                return url, self.download_remote_image(url, images_dir)
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            for url, local_path in executor.map(fetch, pending):
+                if local_path is not None:
+                    self.downloaded[url] = local_path
+                else:
+                    self.failed_downloads.add(url)
+        return self.downloaded
+    
+    def absolute_url(self, url: str) -> str:
+        """URL a solicitar: sin entidades HTML y con https: si es relativa al protocolo (//host/...)"""
+        url = html.unescape(url)
+        return f"https:{url}" if url.startswith('//') else url
+    
+    def process_local_image(self, src: str, base_path: Path, css_width: Optional[str] = None) -> str:
         """Procesa una imagen local"""
         try:
             # Resolver ruta relativa
@@ -110,8 +219,8 @@ class ImageProcessor:
             if image_path.suffix.lower() == '.svg':
                 return self.process_svg(image_path, base_path)
             
-            # Procesar imagen raster
-            return self.process_raster_image(image_path, base_path)
+            # Procesar imagen raster (None: se usa tal cual)
+            return self.process_raster_image(image_path, base_path, css_width) or src
             
         except Exception as e:
             logger.error(f"Error procesando imagen local {src}: {e}")
@@ -124,6 +233,11 @@ class ImageProcessor:
             processed_dir = base_path / "processed_images"
             processed_dir.mkdir(exist_ok=True)
             
+            # Reutilizar el SVG optimizado si ya existe para este contenido
+            processed_path = processed_dir / f"{svg_path.stem}_{self.derived_key(svg_path, '.svg')}.svg"
+            if processed_path.exists():
+                return str(processed_path.relative_to(base_path))
+            
             # Leer contenido SVG
             with open(svg_path, 'r', encoding='utf-8') as f:
                 svg_content = f.read()
@@ -132,9 +246,10 @@ class ImageProcessor:
             optimized_svg = self.optimize_svg(svg_content)
             
             # Guardar SVG optimizado
-            processed_path = processed_dir / f"{svg_path.stem}_optimized.svg"
-            with open(processed_path, 'w', encoding='utf-8') as f:
+            tmp_path = self._tmp_path(processed_path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write(optimized_svg)
+            os.replace(tmp_path, processed_path)
             
             return str(processed_path.relative_to(base_path))
             
@@ -142,13 +257,21 @@ class ImageProcessor:
             logger.error(f"Error procesando SVG {svg_path}: {e}")
             return str(svg_path)
     
-    def process_raster_image(self, image_path: Path, base_path: Path) -> str:
-        """Procesa una imagen raster (redimensionar, optimizar)"""
+    def process_raster_image(self, image_path: Path, base_path: Path, css_width: Optional[str] = None) -> Optional[str]:
+        """Procesa una imagen raster (redimensionar, optimizar); None si no hay que tocarla"""
         try:
-            # Crear directorio para imágenes procesadas
             processed_dir = base_path / "processed_images"
+            if self.layout is not None:
+                return self.process_for_print(image_path, base_path, processed_dir, css_width)
+            
+            # Crear directorio para imágenes procesadas
             processed_dir.mkdir(exist_ok=True)
             
+            # Reutilizar la imagen derivada si ya existe para este contenido y estos parámetros
+            processed_path = processed_dir / f"{image_path.stem}_{self.derived_key(image_path, image_path.suffix.lower())}{image_path.suffix}"
+            if processed_path.exists():
+                return str(processed_path.relative_to(base_path))
+            
             # Abrir imagen
             with Image.open(image_path) as img:
                 # Convertir a RGB si es necesario
@@ -160,16 +283,17 @@ class ImageProcessor:
                 if new_size != img.size:
                     img = img.resize(new_size, Image.Resampling.LANCZOS)
                 
-                # Guardar imagen optimizada
-                processed_path = processed_dir / f"{image_path.stem}_optimized{image_path.suffix}"
+                # Guardar imagen optimizada (escritura atómica: otros procesos pueden compartirla)
+                tmp_path = self._tmp_path(processed_path)
                 
                 # Determinar formato de salida
                 if image_path.suffix.lower() in ('.jpg', '.jpeg'):
-                    img.save(processed_path, 'JPEG', quality=self.quality, optimize=True)
+                    img.save(tmp_path, 'JPEG', quality=self.quality, optimize=True)
                 elif image_path.suffix.lower() == '.png':
-                    img.save(processed_path, 'PNG', optimize=True)
+                    img.save(tmp_path, 'PNG', optimize=True)
                 else:
-                    img.save(processed_path, optimize=True)
+                    img.save(tmp_path, optimize=True)
+                os.replace(tmp_path, processed_path)
                 
                 return str(processed_path.relative_to(base_path))
             
@@ -177,6 +301,54 @@ class ImageProcessor:
             logger.error(f"Error procesando imagen raster {image_path}: {e}")
             return str(image_path)
     
+    def process_for_print(self, image_path: Path, base_path: Path, processed_dir: Path, css_width: Optional[str] = None) -> Optional[str]:
+        """Remuestrea la imagen a la resolución de impresión de su caja en la página
+        
+        El formato se elige por contenido: PNG para gráficos con pocos colores o
+        transparencia, JPEG para fotografías. Un PNG o JPEG que ya cabe en su caja no
+        se vuelve a codificar: devuelve None y se usa el original.
+        """
+        key = hash_key('print', content_hash(image_path), self.layout, css_width, self.quality)[:16]
+        for suffix in ('.png', '.jpg'):
+            processed_path = processed_dir / f"{image_path.stem}_{key}{suffix}"
+            if processed_path.exists():
+                return str(processed_path.relative_to(base_path))
+        
+        with Image.open(image_path) as img:
+            # Solo se lee la cabecera: sin remuestreo ni cambio de formato no se decodifica
+            target_size = self.layout.target_size(img.size, css_width)
+            if target_size == img.size and img.format in ('PNG', 'JPEG'):
+                return None
+            
+            if img.mode not in ('RGB', 'RGBA', 'L'):
+                img = img.convert('RGBA')
+            output_format = choose_output_format(img)
+            if output_format == 'JPEG' or img.mode == 'RGBA' and not has_transparency(img):
+                img = img.convert('L' if img.mode == 'L' else 'RGB')
+            
+            if target_size != img.size:
+                img = img.resize(target_size, Image.Resampling.LANCZOS)
+            
+            processed_dir.mkdir(exist_ok=True)
+            processed_path = processed_dir / f"{image_path.stem}_{key}{'.jpg' if output_format == 'JPEG' else '.png'}"
+            tmp_path = self._tmp_path(processed_path)
+            if output_format == 'JPEG':
+                img.save(tmp_path, 'JPEG', quality=self.quality, optimize=True)
+            else:
+                img.save(tmp_path, 'PNG', optimize=True)
+            os.replace(tmp_path, processed_path)
+        
+        return str(processed_path.relative_to(base_path))
+    
+    def derived_key(self, source: Path, output_format: str) -> str:
+        """Clave de la imagen derivada: contenido de la fuente, tamaño máximo, calidad y formato"""
+        return hash_key('derived', content_hash(source), self.max_width, self.max_height, self.quality, output_format)[:16]
+    
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        """Ruta temporal junto a path que conserva la extensión (PIL deduce el formato de ella)"""
+        return path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp{path.suffix}")
+    
     def calculate_optimal_size(self, original_size: Tuple[int, int]) -> Tuple[int, int]:
         """Calcula el tamaño óptimo para la imagen"""
         width, height = original_size
@@ -205,29 +377,29 @@ class ImageProcessor:
         
         return svg_content
     
-    def generate_filename_from_url(self, url: str) -> str:
+    def generate_filename_from_url(self, url: str, content_type: Optional[str] = None) -> str:
         """Genera un nombre de archivo único basado en la URL"""
         parsed = urllib.parse.urlparse(url)
         filename = os.path.basename(parsed.path)
+        # Sufijo estable entre ejecuciones: distingue URLs con el mismo nombre de archivo
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()[:12]
         
-        if not filename or '.' not in filename:
-            # Generar nombre basado en la URL
-            filename = f"image_{hash(url) % 10000}"
-            # Intentar determinar extensión
-            content_type = self.get_content_type_from_url(url)
-            if content_type:
-                ext = mimetypes.guess_extension(content_type)
-                if ext:
-                    filename += ext
-            else:
-                filename += '.jpg'  # Por defecto
+        if filename and '.' in filename:
+            stem, ext = os.path.splitext(filename)
+            return f"{stem}_{digest}{ext}"
         
-        return filename
+        # Generar nombre basado en la URL
+        filename = f"image_{digest}"
+        # Intentar determinar extensión
+        if content_type is None:
+            content_type = self.get_content_type_from_url(url)
+        ext = mimetypes.guess_extension(content_type.split(';')[0].strip()) if content_type else None
+        return filename + (ext or '.jpg')  # Por defecto .jpg
     
     def get_content_type_from_url(self, url: str) -> Optional[str]:
         """Obtiene el tipo de contenido de una URL"""
         try:
-            response = requests.head(url, timeout=10)
+            response = get_http_session().head(self.absolute_url(url), timeout=10)
             return response.headers.get('content-type')
         except:
             return None
@@ -237,9 +409,6 @@ class ImageProcessor:
         # Mantener atributos existentes pero actualizar src y alt
         tag = original_tag
         
-        # Actualizar src
-        tag = re.sub(r'src=["\'][^"\']*["\']', f'src="{new_src}"', tag)
-        
         # Asegurar que tenga alt
         if 'alt=' not in tag:
             tag = tag.replace('>', f' alt="{alt}">')
@@ -248,42 +417,164 @@ class ImageProcessor:
         if 'style=' not in tag:
             tag = tag.replace('>', ' style="max-width: 100%; height: auto;">')
         
-        return tag
+        # Actualizar src al final: puede ser un data URI muy largo
+        return _SRC_ATTR_RE.sub(lambda match: f'src="{new_src}"', tag, count=1)
     
     def embed_image_as_base64(self, image_path: Path) -> str:
         """Convierte una imagen a base64 para embebido directo"""
         try:
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-            
-            # Determinar tipo MIME
-            mime_type = mimetypes.guess_type(str(image_path))[0]
-            if not mime_type:
-                mime_type = 'image/jpeg'
-            
-            # Codificar en base64
-            base64_data = base64.b64encode(image_data).decode('utf-8')
-            
-            return f"data:{mime_type};base64,{base64_data}"
+            buffer = StringIO()
+            write_data_uri(image_path, buffer)
+            return buffer.getvalue()
             
         except Exception as e:
             logger.error(f"Error embebiendo imagen {image_path}: {e}")
             return str(image_path)
 
+def data_uri_length(image_path: Path) -> int:
+    """Longitud del data URI de una imagen, sin codificarla"""
+    return len(f"data:{_mime_type(image_path)};base64,") + 4 * ((image_path.stat().st_size + 2) // 3)
+
+def _mime_type(image_path: Path) -> str:
+    return mimetypes.guess_type(str(image_path))[0] or 'image/jpeg'
+
+def write_data_uri(image_path: Path, buffer: TextIO):
+    """Escribe el data URI de una imagen en buffer, codificando por bloques"""
+    buffer.write(f"data:{_mime_type(image_path)};base64,")
+    with open(image_path, 'rb') as f:
+        # Bloques múltiplos de 3 bytes: el base64 concatenado es idéntico al del archivo completo
+        for block in iter(lambda: f.read(EMBED_BLOCK_SIZE), b''):
+            buffer.write(base64.b64encode(block).decode('ascii'))
+
+class ImageEmbedder:
+    """Incrusta imágenes como data URIs con un presupuesto de bytes por documento
+    
+    Cada contenido se codifica una sola vez; por encima del presupuesto las imágenes
+    se dejan como referencias a archivo.
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.remaining = max_bytes
+        self._encoded: Dict[str, str] = {}
+    
+    def data_uri(self, image_path: Path) -> Optional[str]:
+        """Data URI de la imagen o None si no cabe en el presupuesto restante"""
+        digest = content_hash(image_path)
+        uri = self._encoded.get(digest)
+        length = len(uri) if uri is not None else data_uri_length(image_path)
+        if length > self.remaining:
+            return None
+        if uri is None:
+            buffer = StringIO()
+            write_data_uri(image_path, buffer)
+            uri = self._encoded[digest] = buffer.getvalue()
+        self.remaining -= length
+        return uri
+
+def find_local_images(html_content: str, base_path: Path) -> list:
+    """Devuelve las rutas de las imágenes locales referenciadas en el HTML"""
+    images = []
+    for img_tag in re.findall(r'<img[^>]+>', html_content):
+        src_match = re.search(r'src=["\']([^"\']+)["\']', img_tag)
+        if not src_match:
+            continue
+        src = urllib.parse.unquote(src_match.group(1))
+        if src.startswith(('http://', 'https://', '//', 'data:')):
+            continue
+        images.append(Path(src) if os.path.isabs(src) else base_path / src)
+    return images
+
+def css_width_of(img_tag: str) -> Optional[str]:
+    """Ancho CSS declarado en la etiqueta (style tiene prioridad sobre el atributo width)"""
+    match = _STYLE_WIDTH_RE.search(img_tag) or _WIDTH_ATTR_RE.search(img_tag)
+    return match.group(1).strip() if match else None
+
+def find_remote_images(html_content: str) -> list:
+    """Devuelve las URLs de las imágenes remotas referenciadas en el HTML, sin repetir"""
+    urls = []
+    for img_tag in _IMG_TAG_RE.findall(html_content):
+        src_match = _SRC_ATTR_RE.search(img_tag)
+        if src_match and src_match.group(1).startswith(('http://', 'https://', '//')):
+            urls.append(src_match.group(1))
+    return list(dict.fromkeys(urls))
+
 def process_html_images(html_content: str, base_path: Path, 
                        max_width: int = 800, max_height: int = 600, 
-                       quality: int = 85, embed_images: bool = False) -> str:
-    """Procesa todas las imágenes en el contenido HTML"""
-    processor = ImageProcessor(max_width, max_height, quality)
+                       quality: int = 85, embed_images: bool = False,
+                       asset_cache: Optional[AssetCache] = None,
+                       workers: Optional[int] = None,
+                       embed_max_bytes: int = 20 * 1024 * 1024,
+                       layout: Optional[PrintLayout] = None,
+                       download_remote: bool = True,
+                       prefetched: Optional[Dict[str, Path]] = None) -> str:
+    """Procesa todas las imágenes en el contenido HTML
     
-    # Encontrar todas las etiquetas de imagen
-    img_pattern = r'<img[^>]+>'
+    Se hace en tres fases: recoger las fuentes distintas (descargando en paralelo las
+    remotas), transformarlas en un pool de hilos (Pillow libera el GIL al decodificar,
+    redimensionar y codificar) y reescribir las etiquetas. Con embed_images las imágenes
+    optimizadas se incrustan como data URIs hasta agotar embed_max_bytes. Con layout las
+    imágenes se remuestrean a la resolución de impresión de su caja en la página. Con
+    download_remote=False las imágenes remotas se dejan intactas. prefetched (URL -> archivo)
+    son descargas ya hechas, que no se repiten.
+    """
+    processor = ImageProcessor(max_width, max_height, quality, asset_cache, layout)
+    if prefetched:
+        processor.downloaded.update(prefetched)
     
-    def replace_img(match):
-        img_tag = match.group(0)
-        return processor.process_image_tag(img_tag, base_path)
+    # Fase 1: recoger las fuentes (con su ancho CSS, que determina el tamaño impreso), sin repetir
+    sources = []
+    for img_tag in _IMG_TAG_RE.findall(html_content):
+        src_match = _SRC_ATTR_RE.search(img_tag)
+        if src_match and (download_remote or not processor.is_remote_url(src_match.group(1))):
+            sources.append((src_match.group(1), css_width_of(img_tag) if layout is not None else None))
+    sources = list(dict.fromkeys(sources))
+    if not sources:
+        return html_content
+    processor.prefetch_remote_images((src for src, _ in sources), base_path)
     
-    # Procesar todas las imágenes
-    processed_html = re.sub(img_pattern, replace_img, html_content)
+    # Fase 2: transformar cada imagen una sola vez
+    def transform(source: Tuple[str, Optional[str]]) -> str:
+        src, css_width = source
+        try:
+            return processor.process_image_src(src, base_path, css_width)
+        except Exception as e:
+            logger.warning(f"Error procesando imagen {src}: {e}")
+            return src
+    
+    workers = min(workers or os.cpu_count() or 1, len(sources))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            processed = dict(zip(sources, executor.map(transform, sources)))
+    else:
+        processed = {src: transform(src) for src in sources}
+    
+    # Fase 3: reescribir las etiquetas en un buffer, sin concatenar cadenas intermedias
+    embedder = ImageEmbedder(embed_max_bytes) if embed_images else None
+    skipped = 0
+    buffer = StringIO()
+    last = 0
+    for match in _IMG_TAG_RE.finditer(html_content):
+        buffer.write(html_content[last:match.start()])
+        last = match.end()
+        img_tag = match.group(0)
+        src_match = _SRC_ATTR_RE.search(img_tag)
+        if not src_match or not download_remote and processor.is_remote_url(src_match.group(1)):
+            buffer.write(img_tag)
+            continue
+        new_src = processed[(src_match.group(1), css_width_of(img_tag) if layout is not None else None)]
+        if embedder is not None and not processor.is_remote_url(new_src) and not new_src.startswith('data:'):
+            image_path = Path(new_src) if os.path.isabs(new_src) else base_path / new_src
+            try:
+                data_uri = embedder.data_uri(image_path)
+                if data_uri is not None:
+                    new_src = data_uri
+                else:
+                    skipped += 1
+            except OSError as e:
+                logger.warning(f"No se pudo incrustar la imagen {image_path}: {e}")
+        buffer.write(processor.rewrite_image_tag(img_tag, new_src))
+    buffer.write(html_content[last:])
     
-    return processed_html 
\ No newline at end of file
+    if skipped:
+        logger.warning(f"{skipped} imagen(es) sin incrustar por superar el límite de {embed_max_bytes / (1024 * 1024):g} MB")
+    return buffer.getvalue()
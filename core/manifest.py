@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Manifiestos de dependencias para compilaciones incrementales
+"""
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from core.cache import hash_key
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_DIR = '.deps'
+
+
+def file_sha256(path: Path) -> str:
+    """Calcula el SHA-256 del contenido de un archivo"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: Path) -> Optional[Dict[str, Any]]:
+    """Huella de un archivo (tamaño, mtime y contenido) o None si no existe"""
+    try:
+        stat = path.stat()
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_sha256(path)}
+    except OSError:
+        return None
+
+
+class DependencyManifest:
+    """Registro de las entradas que afectaron a un PDF generado"""
+
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self.path = self.output_path.parent / MANIFEST_DIR / f"{self.output_path.name}.json"
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, inputs: Iterable[Path], settings: Any):
+        """Guarda las huellas de las entradas y de la configuración usada"""
+        data = {
+            'output': self.output_path.name,
+            'settings': hash_key(settings),
+            'inputs': {str(Path(p).resolve()): file_fingerprint(Path(p)) for p in sorted(set(map(str, inputs)))},
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el manifiesto {self.path}: {e}")
+
+    def is_up_to_date(self, settings: Any) -> bool:
+        """True si el PDF existe y ninguna de sus entradas cambió desde la última compilación"""
+        if not self.output_path.exists():
+            return False
+        data = self._load()
+        if not data or data.get('settings') != hash_key(settings):
+            return False
+
+        for path, recorded in data.get('inputs', {}).items():
+            if recorded is None:
+                # La entrada no existía: sigue al día mientras siga sin existir
+                if Path(path).exists():
+                    return False
+                continue
+            try:
+                stat = Path(path).stat()
+            except OSError:
+                return False
+            if stat.st_size != recorded['size']:
+                return False
+            # Solo se recalcula el hash si cambió la fecha de modificación
+            if stat.st_mtime_ns != recorded['mtime_ns'] and file_sha256(Path(path)) != recorded['sha256']:
+                return False
+        return True
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Geometría de impresión: caja de contenido de la página y tamaño de las imágenes a una resolución dada
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Tamaños de página de CSS Paged Media en milímetros (ancho, alto)
+PAGE_SIZES_MM = {
+    'a3': (297, 420),
+    'a4': (210, 297),
+    'a5': (148, 210),
+    'b4': (250, 353),
+    'b5': (176, 250),
+    'letter': (215.9, 279.4),
+    'legal': (215.9, 355.6),
+    'ledger': (279.4, 431.8),
+}
+
+# Pulgadas por unidad CSS absoluta
+INCHES_PER_UNIT = {
+    'in': 1.0,
+    'cm': 1 / 2.54,
+    'mm': 1 / 25.4,
+    'pt': 1 / 72,
+    'pc': 1 / 6,
+    'px': 1 / 96,
+}
+
+# Píxeles CSS por pulgada: tamaño natural de una imagen sin resolución explícita
+CSS_PX_PER_INCH = 96
+
+_LENGTH_RE = re.compile(r'^\s*(\d+(?:\.\d+)?|\.\d+)\s*(in|cm|mm|pt|pc|px|%)?\s*$', re.IGNORECASE)
+
+
+def css_length_to_inches(value: str, reference_in: Optional[float] = None) -> Optional[float]:
+    """Convierte una longitud CSS a pulgadas; los porcentajes son relativos a reference_in"""
+    match = _LENGTH_RE.match(value or '')
+    if not match:
+        return None
+    number = float(match.group(1))
+    unit = (match.group(2) or 'px').lower()
+    if unit == '%':
+        return number / 100 * reference_in if reference_in is not None else None
+    return number * INCHES_PER_UNIT[unit]
+
+
+def page_size_inches(page_size: str) -> Tuple[float, float]:
+    """Tamaño de página ('A4', 'letter landscape', '210mm 297mm') en pulgadas"""
+    parts = page_size.lower().split()
+    landscape = 'landscape' in parts
+    parts = [part for part in parts if part not in ('portrait', 'landscape')]
+
+    if len(parts) == 1 and parts[0] in PAGE_SIZES_MM:
+        width, height = (mm / 25.4 for mm in PAGE_SIZES_MM[parts[0]])
+    else:
+        lengths = [css_length_to_inches(part) for part in parts]
+        if not lengths or None in lengths or len(lengths) > 2:
+            raise ValueError(f"Tamaño de página no soportado: {page_size}")
+        width, height = lengths[0], lengths[-1]
+
+    return (max(width, height), min(width, height)) if landscape else (width, height)
+
+
+def margins_inches(margins: str) -> Tuple[float, float, float, float]:
+    """Márgenes CSS abreviados (1 a 4 valores) como (arriba, derecha, abajo, izquierda) en pulgadas"""
+    values = [css_length_to_inches(part) for part in margins.split()]
+    if not values or None in values or len(values) > 4:
+        raise ValueError(f"Márgenes no soportados: {margins}")
+    top = values[0]
+    right = values[1] if len(values) > 1 else top
+    bottom = values[2] if len(values) > 2 else top
+    left = values[3] if len(values) > 3 else right
+    return top, right, bottom, left
+
+
+@dataclass(frozen=True)
+class PrintLayout:
+    """Caja de contenido de la página y resolución objetivo de las imágenes"""
+    content_width_in: float
+    content_height_in: float
+    dpi: int
+
+    @classmethod
+    def from_page(cls, page_size: str, margins: str, dpi: int) -> "PrintLayout":
+        width, height = page_size_inches(page_size)
+        top, right, bottom, left = margins_inches(margins)
+        return cls(round(width - left - right, 4), round(height - top - bottom, 4), dpi)
+
+    def display_width(self, image_width_px: int, css_width: Optional[str] = None) -> float:
+        """Ancho impreso en pulgadas: el CSS explícito o el natural, limitado por max-width: 100%"""
+        width = css_length_to_inches(css_width, self.content_width_in) if css_width else None
+        if width is None:
+            width = image_width_px / CSS_PX_PER_INCH
+        return min(width, self.content_width_in)
+
+    def target_size(self, size: Tuple[int, int], css_width: Optional[str] = None) -> Tuple[int, int]:
+        """Tamaño en píxeles para imprimir a self.dpi; nunca amplía la imagen"""
+        width, height = size
+        target_width = round(self.display_width(width, css_width) * self.dpi)
+        if target_width >= width:
+            return size
+        return max(1, target_width), max(1, round(height * target_width / width))
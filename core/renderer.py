@@ -1,85 +1,288 @@
+import html
+import json
 import re
+import threading
+from typing import Iterator, List, NamedTuple, Optional, Tuple
 
 import markdown
+from markdown.extensions import Extension, toc
+from markdown.treeprocessors import Treeprocessor
 
+# Reglas comunes a todos los templates: soporte de SVG, emojis y diagramas
+SVG_EMOJI_CSS = """
+/* Soporte mejorado para SVG */
+svg {
+    max-width: 100%;
+    height: auto;
+    display: block;
+    margin: 1em auto;
+}
 
-def markdown_to_html(md_content: str, extensions=None):
+/* Soporte para emojis */
+@font-face {
+    font-family: 'EmojiFont';
+    src: local('Apple Color Emoji'),
+         local('Segoe UI Emoji'),
+         local('Noto Color Emoji'),
+         local('Android Emoji'),
+         local('EmojiSymbols');
+    unicode-range: U+1F600-1F64F, U+1F300-1F5FF, U+1F680-1F6FF, U+1F1E0-1F1FF, U+2600-26FF, U+2700-27BF;
+}
+
+/* Mejoras para contenido técnico */
+.svg-container {
+    text-align: center;
+    margin: 1.5em 0;
+    padding: 1em;
+    background-color: #f8f9fa;
+    border-radius: 8px;
+    border: 1px solid #e9ecef;
+}
+
+.svg-container svg {
+    margin: 0;
+}
+
+.emoji {
+    font-family: 'EmojiFont', sans-serif;
+    font-size: 1.2em;
+    vertical-align: middle;
+}
+
+/* Mejoras para diagramas SVG */
+.diagram {
+    background-color: white;
+    border: 2px solid #dee2e6;
+    border-radius: 8px;
+    padding: 1em;
+    margin: 1.5em 0;
+    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+}
+
+.diagram svg {
+    margin: 0;
+}
+
+/* Responsive para SVG */
+@media print {
+    svg {
+        page-break-inside: avoid;
+    }
+
+    .svg-container {
+        page-break-inside: avoid;
+    }
+}
+"""
+
+
+# No incluir 'toc' por defecto ya que se maneja manualmente
+DEFAULT_EXTENSIONS = ['extra', 'tables', 'fenced_code', 'codehilite', 'attr_list', 'def_list', 'footnotes', 'md_in_html', 'nl2br', 'sane_lists', 'smarty', 'abbr', 'admonition', 'legacy_attrs', 'legacy_em', 'meta', 'wikilinks']
+
+# Motores Markdown ya configurados, uno por combinación de extensiones y configuración.
+# markdown.Markdown no es seguro entre hilos, así que cada hilo tiene su propio pool.
+_engine_pool = threading.local()
+
+
+class Heading(NamedTuple):
+    """Heading del documento: nivel, título en texto plano y ancla única"""
+    level: int
+    title: str
+    anchor: str
+
+
+_SLUG_STRIP_RE = re.compile(r'[^a-zA-Z0-9\s-]')
+_TAG_RE = re.compile(r'<[^>]+>')
+_HEADING_RE = re.compile(r'<h([1-6])([^>]*)>(.*?)</h\1>', re.DOTALL)
+# Comentarios y etiquetas de apertura o cierre, para saber qué elementos siguen abiertos
+_ELEMENT_RE = re.compile(r'<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9:-]*)\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(/?)>', re.DOTALL)
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source',
+              'track', 'wbr'}
+# Definición de abreviatura de la extensión 'abbr': *[HTML]: Hyper Text Markup Language
+_ABBR_DEFINITION_RE = re.compile(r'^[ ]{0,3}[*]\[[^\]]*\][ ]?:', re.MULTILINE)
+_ID_ATTR_RE = re.compile(r'\bid=["\']([^"\']*)["\']')
+_HEADING_TAGS = {f'h{level}': level for level in range(1, 7)}
+
+
+def slugify(title: str) -> str:
+    """Ancla de un título: minúsculas, sin símbolos y con guiones en lugar de espacios"""
+    return _SLUG_STRIP_RE.sub('', title.lower()).replace(' ', '-') or 'seccion'
+
+
+class HeadingCollector(Treeprocessor):
+    """Recorre el árbol una sola vez: asigna anclas únicas y registra los headings en orden"""
+
+    def run(self, root):
+        headings = []
+        used_ids = {el.get('id') for el in root.iter() if el.get('id')}
+        for el in root.iter():
+            level = _HEADING_TAGS.get(el.tag)
+            if level is None:
+                continue
+            title = html.unescape(toc.unescape(toc.stashedHTML2text(''.join(el.itertext()), self.md, strip_entities=False))).strip()
+            anchor = el.get('id')
+            if not anchor:
+                anchor = toc.unique(slugify(title), used_ids)
+                el.set('id', anchor)
+            headings.append(Heading(level, title, anchor))
+        self.md.headings = headings
+
+
+class HeadingExtension(Extension):
+    """Expone en md.headings los headings del último documento convertido"""
+
+    def extendMarkdown(self, md):
+        md.registerExtension(self)
+        self.md = md
+        md.headings = []
+        # Después de attr_list (8) y de prettify (10), como la extensión 'toc'
+        md.treeprocessors.register(HeadingCollector(md), 'heading_collector', 5)
+
+    def reset(self):
+        self.md.headings = []
+
+
+def _engine_key(extensions, extension_configs) -> tuple:
+    return (tuple(extensions or DEFAULT_EXTENSIONS),
+            json.dumps(extension_configs or {}, sort_keys=True, default=str))
+
+
+def _thread_engines() -> dict:
+    engines = getattr(_engine_pool, 'engines', None)
+    if engines is None:
+        engines = _engine_pool.engines = {}
+    return engines
+
+
+def get_markdown_engine(extensions=None, extension_configs=None) -> markdown.Markdown:
+    """Devuelve un motor Markdown reutilizable, reiniciado y listo para convertir
+    
+    Los documentos que definen abreviaturas deben convertirse con render_markdown, que
+    descarta el motor después de usarlo (ver _ABBR_DEFINITION_RE).
+    """
+    key = _engine_key(extensions, extension_configs)
+    engines = _thread_engines()
+    engine = engines.get(key)
+    if engine is None:
+        engine = markdown.Markdown(extensions=[*key[0], HeadingExtension()], extension_configs=extension_configs or {})
+        engines[key] = engine
+    engine.reset()
+    return engine
+
+
+def render_markdown(md_content: str, extensions=None, extension_configs=None) -> Tuple[str, List[Heading]]:
+    """Convierte Markdown a HTML y devuelve también los headings encontrados"""
+    engine = get_markdown_engine(extensions, extension_configs)
+    try:
+        html_content = engine.convert(md_content)
+    finally:
+        # La extensión 'abbr' registra un patrón por abreviatura y reset() no los elimina:
+        # el motor de un documento que define abreviaturas no se vuelve a usar
+        if _ABBR_DEFINITION_RE.search(md_content):
+            _thread_engines().pop(_engine_key(extensions, extension_configs), None)
+    return html_content, engine.headings
+
+
+def markdown_to_html(md_content: str, extensions=None, extension_configs=None):
     """Convierte Markdown a HTML usando python-markdown"""
-    # No incluir 'toc' por defecto ya que se maneja manualmente
-    default_extensions = ['extra', 'tables', 'fenced_code', 'codehilite', 'attr_list', 'def_list', 'footnotes', 'md_in_html', 'nl2br', 'sane_lists', 'smarty', 'abbr', 'admonition', 'legacy_attrs', 'legacy_em', 'meta', 'wikilinks']
-    md = markdown.Markdown(extensions=extensions or default_extensions)
-    return md.convert(md_content)
-
-def insert_automatic_toc(html_content: str, toc_levels: int = 3, number_headings: bool = False) -> str:
-    """Insertar tabla de contenidos automática después del primer heading, con personalización de niveles y numeración y navegación."""
-    print(f"[DEBUG] insert_automatic_toc: toc_levels={toc_levels}, number_headings={number_headings}")
-    heading_pattern = r'<h([1-6])([^>]*)>(.*?)</h\1>'
-    match = re.search(heading_pattern, html_content)
-    if not match:
-        print("[DEBUG] insert_automatic_toc: No se encontraron headings, retornando HTML original")
-        return html_content
-    print(f"[DEBUG] insert_automatic_toc: Encontrado heading: {match.group(0)}")
-    toc_html, heading_numbers, anchor_ids = generate_toc_html(html_content, toc_levels, number_headings, return_anchors=True)
-    print(f"[DEBUG] insert_automatic_toc: TOC generada: {len(toc_html)} caracteres")
-    # Añadir id a los headings
-    def add_id(match):
+    return render_markdown(md_content, extensions, extension_configs)[0]
+
+def insert_automatic_toc(html_content: str, toc_levels: int = 3, number_headings: bool = False, headings: Optional[List[Heading]] = None) -> str:
+    """Insertar tabla de contenidos automática después del primer heading, con personalización de niveles y numeración y navegación.
+    
+    Recorre el HTML una sola vez. Si se pasan los headings recogidos al renderizar, se
+    reutilizan sus títulos y anclas; los headings de HTML crudo se resuelven al vuelo.
+    """
+    known = {heading.anchor: heading for heading in headings or ()}
+    used_ids = set(known)
+    counters = [0] * 6
+    parts = []
+    toc_items = []
+    toc_position = None
+    count = 0
+    last = 0
+    for match in _HEADING_RE.finditer(html_content):
         level = int(match.group(1))
         attrs = match.group(2)
-        title = match.group(3)
-        clean_title = re.sub(r'<[^>]+>', '', title)
-        anchor_id = re.sub(r'[^a-zA-Z0-9\s-]', '', clean_title.lower()).replace(' ', '-')
-        # Si ya tiene id, no lo duplica
-        if 'id=' in attrs:
-            return match.group(0)
-        return f'<h{level}{attrs} id="{anchor_id}">{title}</h{level}>'
-    html_content = re.sub(heading_pattern, add_id, html_content)
-    # Si se solicita numerar, reemplazar los headings en el HTML
-    if number_headings and heading_numbers:
-        def add_number(match):
-            level = int(match.group(1))
-            attrs = match.group(2)
-            title = match.group(3)
-            num = heading_numbers.pop(0)
-            return f'<h{level}{attrs}>{num} {title}</h{level}>'
-        html_content = re.sub(heading_pattern, add_number, html_content)
-    heading_match = re.search(heading_pattern, html_content)
-    heading_end = heading_match.end() if heading_match else 0
-    result = html_content[:heading_end] + '\n' + toc_html + '\n' + html_content[heading_end:]
-    print(f"[DEBUG] insert_automatic_toc: HTML resultante: {len(result)} caracteres")
-    return result
-
-def generate_toc_html(html_content: str, toc_levels: int = 3, number_headings: bool = False, return_anchors: bool = False) -> tuple:
-    heading_pattern = r'<h([1-6])[^>]*>(.*?)</h\1>'
-    headings = re.findall(heading_pattern, html_content)
-    if len(headings) < 2:
-        return ("", [], []) if return_anchors else ("", [])
-    toc_items = []
-    heading_numbers = []
-    anchor_ids = []
-    # Numeración por nivel
-    counters = [0] * 6
-    for level_str, title in headings:
-        level = int(level_str)
-        if level > toc_levels:
+        inner = match.group(3)
+        count += 1
+        
+        id_match = _ID_ATTR_RE.search(attrs)
+        heading = known.get(id_match.group(1)) if id_match else None
+        if heading is None:
+            title = html.unescape(_TAG_RE.sub('', inner)).strip()
+            anchor = id_match.group(1) if id_match else toc.unique(slugify(title), used_ids)
+            used_ids.add(anchor)
+            heading = Heading(level, title, anchor)
+        if not id_match:
+            attrs = f'{attrs} id="{heading.anchor}"'
+        
+        display_title = html.escape(heading.title, quote=False)
+        if level <= toc_levels:
+            if number_headings:
+                counters[level - 1] += 1
+                for i in range(level, 6):
+                    counters[i] = 0
+                num = '.'.join(str(counters[i]) for i in range(level) if counters[i] > 0)
+                inner = f'{num} {inner}'
+                display_title = f'{num} {display_title}'
+            indent = (level - 1) * 20
+            toc_items.append(f'<li style="margin-left: {indent}px;"><a href="#{html.escape(heading.anchor)}" style="text-decoration: none; color: #2c3e50;">{display_title}</a></li>')
+        
+        parts.append(html_content[last:match.start()])
+        parts.append(f'<h{level}{attrs}>{inner}</h{level}>')
+        last = match.end()
+        if toc_position is None:
+            toc_position = len(parts)
+            parts.append('')
+    
+    if toc_position is None:
+        return html_content
+    parts.append(html_content[last:])
+    parts[toc_position] = '\n' + (generate_toc_html(toc_items) if count >= 2 else '') + '\n'
+    return ''.join(parts)
+
+def _top_level_headings(html_content: str) -> Iterator[Tuple[int, int]]:
+    """(posición, nivel) de los headings que no están dentro de ningún elemento abierto"""
+    depth = 0
+    for match in _ELEMENT_RE.finditer(html_content):
+        closing, tag, self_closing = match.groups()
+        if tag is None:
+            continue
+        tag = tag.lower()
+        if closing:
+            depth = max(0, depth - 1)
             continue
-        clean_title = re.sub(r'<[^>]+>', '', title)
-        anchor_id = re.sub(r'[^a-zA-Z0-9\s-]', '', clean_title.lower()).replace(' ', '-')
-        anchor_ids.append(anchor_id)
-        if number_headings:
-            counters[level-1] += 1
-            for i in range(level, 6):
-                counters[i] = 0
-            num = '.'.join(str(counters[i]) for i in range(level) if counters[i] > 0)
-            heading_numbers.append(num)
-            display_title = f'{num} {clean_title}'
-        else:
-            display_title = clean_title
-        indent = (level - 1) * 20
-        toc_items.append(f'<li style="margin-left: {indent}px;"><a href="#{anchor_id}" style="text-decoration: none; color: #2c3e50;">{display_title}</a></li>')
-    toc_html = f'''<div class="table-of-contents" style="background-color: #f8f9fa; border: 1px solid #dee2e6; border-radius: 8px; padding: 1.5em; margin: 2em 0; page-break-inside: avoid;"><h2 style="margin-top: 0; color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 0.5em;">📋 Tabla de Contenidos</h2><ul style="list-style-type: none; padding-left: 0; margin: 0;">{''.join(toc_items)}</ul></div>'''
-    if return_anchors:
-        return toc_html, heading_numbers, anchor_ids
-    return toc_html, heading_numbers
+        if depth == 0 and tag in _HEADING_TAGS:
+            yield match.start(), _HEADING_TAGS[tag]
+        if not self_closing and tag not in _VOID_TAGS:
+            depth += 1
+
+
+def split_html_sections(html_content: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Límites (inicio, fin) de fragmentos del HTML de al menos chunk_size caracteres
+    
+    Solo se corta justo antes de un heading del nivel más alto del documento que no esté
+    dentro de otro elemento (admoniciones, md_in_html, la TOC), de modo que cada fragmento
+    contiene secciones completas. Una sección mayor que chunk_size queda entera.
+    """
+    starts = list(_top_level_headings(html_content))
+    if not starts:
+        return [(0, len(html_content))]
+    top_level = min(level for _, level in starts)
+    
+    bounds = []
+    begin = 0
+    for position, level in starts:
+        if level == top_level and position - begin >= chunk_size:
+            bounds.append((begin, position))
+            begin = position
+    bounds.append((begin, len(html_content)))
+    return bounds
+
+def generate_toc_html(toc_items: List[str]) -> str:
+    """Bloque HTML de la tabla de contenidos a partir de sus entradas <li>"""
+    return f'''<div class="table-of-contents" style="background-color: #f8f9fa; border: 1px solid #dee2e6; border-radius: 8px; padding: 1.5em; margin: 2em 0; page-break-inside: avoid;"><h2 style="margin-top: 0; color: #2c3e50; border-bottom: 2px solid #3498db; padding-bottom: 0.5em;">📋 Tabla de Contenidos</h2><ul style="list-style-type: none; padding-left: 0; margin: 0;">{''.join(toc_items)}</ul></div>'''
 
 def safe_update_metadata(doc_metadata, metadata):
     if isinstance(doc_metadata, dict):
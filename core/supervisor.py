@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Pool de procesos supervisado: límite de memoria (RSS) y de tiempo por trabajo
+
+Cada trabajo se ejecuta en un proceso trabajador. Un hilo supervisor vigila el
+tiempo transcurrido y la memoria residente de cada proceso; si un trabajo supera
+performance.timeout_seconds o performance.memory_limit_mb, el proceso se mata,
+el trabajo falla con ResourceLimitError y se arranca un proceso nuevo en su lugar.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de comprobación de tiempo y memoria, en segundos
+POLL_INTERVAL = 0.1
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+# Los procesos se arrancan desde el hilo supervisor: con fork heredarían los locks que otro
+# hilo tuviera tomados en ese momento (p. ej. el de logging) y podrían quedarse bloqueados
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class ResourceLimitError(RuntimeError):
+    """El trabajo superó un límite de recursos o su proceso terminó de forma inesperada"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def process_rss(pid: int) -> Optional[int]:
+    """Memoria residente del proceso en bytes (None si el sistema no la expone en /proc)"""
+    try:
+        with open(f'/proc/{pid}/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _worker_main(conn, initializer: Optional[Callable], initargs: tuple):
+    """Bucle del proceso trabajador: recibe (función, argumentos) y devuelve (ok, resultado)"""
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        fn, args = message
+        try:
+            conn.send((True, fn(*args)))
+        except BaseException as e:
+            try:
+                conn.send((False, e))
+            except Exception:
+                # La excepción no se puede serializar: se envía su descripción
+                conn.send((False, RuntimeError(repr(e))))
+
+
+class _Slot:
+    """Proceso trabajador y trabajo que está ejecutando"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.future: Optional[Future] = None
+        self.started = 0.0
+
+
+class SupervisedPool:
+    """Pool de procesos con límite de memoria y de tiempo por trabajo
+
+    Compatible con el uso habitual de ProcessPoolExecutor: submit() devuelve un Future
+    y el pool se usa como gestor de contexto. Las funciones, los argumentos y el
+    inicializador deben poder serializarse con pickle: los procesos no se crean con fork
+    (ver START_METHOD). Un límite a 0 lo desactiva.
+    """
+
+    def __init__(self, max_workers: int, initializer: Optional[Callable] = None, initargs: tuple = (),
+                 memory_limit_mb: int = 0, timeout_seconds: float = 0):
+        self.max_workers = max(1, max_workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else 0
+        self.timeout = timeout_seconds or 0
+        self.recycled = 0
+        self._context = multiprocessing.get_context(START_METHOD)
+        self._tasks: "queue.Queue" = queue.Queue()
+        self._shutdown = threading.Event()
+        self._slots: List[_Slot] = [self._spawn() for _ in range(self.max_workers)]
+        if self.memory_limit and process_rss(self._slots[0].process.pid) is None:
+            logger.warning("⚠️  No se puede medir la memoria de los procesos en este sistema; "
+                           "performance.memory_limit_mb no se aplicará")
+            self.memory_limit = 0
+        self._thread = threading.Thread(target=self._supervise, name='supervised-pool', daemon=True)
+        self._thread.start()
+
+    def _spawn(self) -> _Slot:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self.initializer, self.initargs),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return _Slot(process, parent_conn)
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        if self._shutdown.is_set():
+            raise RuntimeError("El pool ya está cerrado")
+        future: Future = Future()
+        self._tasks.put((future, fn, args))
+        return future
+
+    def _recycle(self, index: int, reason: Optional[str] = None):
+        """Mata el proceso del hueco (fallando su trabajo si lo hay) y arranca otro"""
+        slot = self._slots[index]
+        if slot.process.is_alive():
+            slot.process.kill()
+        slot.process.join()
+        slot.conn.close()
+        if slot.future is not None and reason is not None:
+            slot.future.set_exception(ResourceLimitError(reason))
+        self.recycled += 1
+        self._slots[index] = self._spawn()
+
+    def _check_limits(self, index: int, now: float):
+        slot = self._slots[index]
+        if slot.future is None and not slot.process.is_alive():
+            # Proceso inactivo que terminó por su cuenta
+            self._recycle(index)
+            return
+        if slot.future is not None and self.timeout and now - slot.started > self.timeout:
+            logger.warning(f"⏱️  Trabajo cancelado: superó {self.timeout:g}s (proceso {slot.process.pid})")
+            self._recycle(index, f"tiempo límite excedido ({self.timeout:g}s)")
+            return
+        if self.memory_limit:
+            rss = process_rss(slot.process.pid)
+            if rss is not None and rss > self.memory_limit:
+                limit_mb = self.memory_limit // (1024 * 1024)
+                logger.warning(f"💾 Proceso {slot.process.pid} superó {limit_mb}MB ({rss / 1024 / 1024:.0f}MB)")
+                # Un proceso inactivo que creció se recicla sin fallar ningún trabajo
+                self._recycle(index, f"límite de memoria excedido ({rss / 1024 / 1024:.0f}MB > {limit_mb}MB)"
+                              if slot.future is not None else None)
+
+    def _dispatch(self, index: int, task) -> bool:
+        """Envía el trabajo al proceso del hueco; False si el proceso ya no responde"""
+        future, fn, args = task
+        slot = self._slots[index]
+        slot.future, slot.started = future, time.monotonic()
+        try:
+            slot.conn.send((fn, args))
+        except OSError:
+            slot.future = None
+            self._recycle(index)
+            return False
+        return True
+
+    def _supervise(self):
+        pending = deque()
+        while True:
+            busy = any(slot.future is not None for slot in self._slots)
+            try:
+                # Sin trabajos en curso se espera en la cola en lugar de sondear
+                if not busy and not pending and not self._shutdown.is_set():
+                    task = self._tasks.get(timeout=POLL_INTERVAL)
+                    if task[0].set_running_or_notify_cancel():
+                        pending.append(task)
+                while True:
+                    task = self._tasks.get_nowait()
+                    if task[0].set_running_or_notify_cancel():
+                        pending.append(task)
+            except queue.Empty:
+                pass
+
+            # Repartir trabajos a los procesos libres
+            for index in range(len(self._slots)):
+                if pending and self._slots[index].future is None:
+                    task = pending.popleft()
+                    if not self._dispatch(index, task):
+                        pending.appendleft(task)
+
+            busy = {slot.conn: index for index, slot in enumerate(self._slots) if slot.future is not None}
+            if not busy and not pending and self._shutdown.is_set() and self._tasks.empty():
+                break
+
+            for conn in wait(list(busy), timeout=POLL_INTERVAL) if busy else ():
+                index = busy[conn]
+                slot = self._slots[index]
+                try:
+                    ok, value = conn.recv()
+                except (EOFError, OSError):
+                    slot.process.join(timeout=1)
+                    code = slot.process.exitcode
+                    self._recycle(index, f"el proceso trabajador terminó inesperadamente (código {code})")
+                    continue
+                future, slot.future = slot.future, None
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+            now = time.monotonic()
+            for index in range(len(self._slots)):
+                self._check_limits(index, now)
+
+        for slot in self._slots:
+            try:
+                slot.conn.send(None)
+            except OSError:
+                pass
+            slot.process.join(timeout=1)
+            if slot.process.is_alive():
+                slot.process.kill()
+                slot.process.join()
+            slot.conn.close()
+
+    def shutdown(self, wait: bool = True):
+        """Termina los trabajos pendientes y detiene los procesos"""
+        self._shutdown.set()
+        if wait:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+        return False
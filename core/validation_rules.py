@@ -0,0 +1,765 @@
+#!/usr/bin/env python3
+"""
+Motor de reglas del validador: tokeniza el documento una sola vez y reparte cada línea a las reglas
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+import yaml
+
+if TYPE_CHECKING:
+    from .validator import MarkdownValidator, ValidationIssue
+
+# Contexto de bloque de cada línea
+TEXT = 'text'
+CODE = 'code'
+FRONT_MATTER = 'front_matter'
+HTML = 'html'
+ALL_BLOCKS = frozenset({TEXT, CODE, FRONT_MATTER, HTML})
+NON_CODE_BLOCKS = ALL_BLOCKS - {CODE}
+
+# Líneas listadas como ejemplo en un problema agregado
+AGGREGATE_SAMPLE_LINES = 20
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+_FRONT_MATTER_RE = re.compile(r'^---\s*$')
+_INDENTED_RE = re.compile(r'^(?: {4}|\t)')
+_LIST_ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s')
+# Bloques HTML: comentarios, <pre>/<script>/<style> hasta su cierre y etiquetas de bloque hasta una línea vacía
+_HTML_BLOCK_RE = re.compile(
+    r'^ {0,3}<(?:(!--)|(pre|script|style|textarea)\b|/?(?:address|article|aside|blockquote|center|details|dialog|'
+    r'div|dl|fieldset|figcaption|figure|footer|form|h[1-6]|header|hr|iframe|li|main|nav|ol|p|section|summary|'
+    r'table|tbody|td|tfoot|th|thead|tr|ul)(?:\s|/?>|$))',
+    re.IGNORECASE
+)
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+_EMOJI_RE = re.compile(r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\U00002600-\U000027BF]')
+_LIST_NO_SPACE_RE = re.compile(r'^[-*+]\S')
+_NUMBERED_NO_SPACE_RE = re.compile(r'^\d+\.\S')
+
+# Caracteres no ASCII permitidos por defecto (validation.allowed_characters)
+DEFAULT_ALLOWED_CHARACTERS = 'áéíóúñüÁÉÍÓÚÑÜ'
+
+STANDARD_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp')
+PROBLEMATIC_TITLE_CHARS = ('<', '>', '&', '"', "'", '|', '\\', '/', ':', '*', '?')
+
+
+@lru_cache(maxsize=None)
+def invalid_characters_pattern(allowed: str = DEFAULT_ALLOWED_CHARACTERS) -> "re.Pattern":
+    """Expresión que encuentra los caracteres no ASCII fuera de la lista permitida"""
+    return re.compile('[^\\x00-\\x7f' + ''.join(re.escape(char) for char in dict.fromkeys(allowed)) + ']')
+
+
+def scan_invalid_characters(text: str, pattern: "re.Pattern") -> Dict[str, List[int]]:
+    """Caracteres problemáticos del texto con los desplazamientos donde aparecen, en orden de aparición"""
+    found: Dict[str, List[int]] = {}
+    if text.isascii():
+        return found
+    for match in pattern.finditer(text):
+        found.setdefault(match.group(), []).append(match.start())
+    return found
+
+
+class Line(NamedTuple):
+    """Línea del documento con su contexto de bloque y su desplazamiento en el contenido"""
+    number: int
+    offset: int
+    text: str
+    block: str
+    heading_level: int = 0
+    heading_text: str = ''
+
+
+class Reference(NamedTuple):
+    """Enlace o imagen del documento (fuera de bloques de código) con su posición"""
+    text: str
+    url: str
+    line: int
+    column: int
+
+
+class LineIndex:
+    """Índice de inicios de línea: convierte desplazamientos del contenido en (línea, columna)
+
+    Se construye una vez por documento; cada consulta es una búsqueda binaria.
+    """
+
+    def __init__(self, starts: List[int]):
+        self.starts = starts or [0]
+
+    @classmethod
+    def from_content(cls, content: str) -> "LineIndex":
+        starts, offset = [], 0
+        for line in content.splitlines(keepends=True):
+            starts.append(offset)
+            offset += len(line)
+        return cls(starts)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        """(línea, columna) de un desplazamiento, ambas desde 1"""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+    def line_of(self, offset: int) -> int:
+        return bisect_right(self.starts, offset)
+
+
+def tokenize(content: str) -> List[Line]:
+    """Divide el documento en líneas anotadas con su bloque
+
+    Marca el front matter, el código (con cercas o indentado) y los bloques HTML para que las
+    reglas puedan ignorarlos sin volver a recorrer el documento.
+    """
+    raw_lines = content.splitlines(keepends=True)
+    lines = content.splitlines()
+    offsets = []
+    offset = 0
+    for raw in raw_lines:
+        offsets.append(offset)
+        offset += len(raw)
+    tokens = []
+    start = 0
+
+    # Front matter: solo al inicio y solo si se cierra
+    if lines and _FRONT_MATTER_RE.match(lines[0]):
+        for end in range(1, len(lines)):
+            if _FRONT_MATTER_RE.match(lines[end]):
+                tokens.extend(Line(i + 1, offsets[i], lines[i], FRONT_MATTER) for i in range(end + 1))
+                start = end + 1
+                break
+
+    fence = None
+    html_end: Optional[str] = None  # '' = hasta una línea vacía
+    indented = False
+    in_list = False
+    previous_blank = True
+    for i in range(start, len(lines)):
+        text = lines[i]
+        blank = not text.strip()
+
+        if fence is not None:
+            match = _FENCE_RE.match(text)
+            # Se cierra con el mismo carácter y al menos la misma longitud
+            if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) \
+                    and not text[match.end():].strip():
+                fence = None
+            tokens.append(Line(i + 1, offsets[i], text, CODE))
+            continue
+
+        if html_end is not None:
+            if html_end == '' and blank:
+                html_end = None
+            else:
+                if html_end and html_end in text.lower():
+                    html_end = None
+                tokens.append(Line(i + 1, offsets[i], text, HTML))
+                previous_blank = False
+                continue
+
+        # Código indentado: solo tras una línea vacía y fuera de una lista
+        if indented or (previous_blank and not in_list):
+            indented = bool(_INDENTED_RE.match(text)) or (indented and blank)
+        if indented and not blank:
+            tokens.append(Line(i + 1, offsets[i], text, CODE))
+            previous_blank = False
+            continue
+
+        match = _FENCE_RE.match(text)
+        if match:
+            fence = match.group(1)
+            tokens.append(Line(i + 1, offsets[i], text, CODE))
+            previous_blank = False
+            continue
+
+        html = _HTML_BLOCK_RE.match(text) if previous_blank and '<' in text else None
+        if html:
+            if html.group(1):
+                html_end = '-->'
+            elif html.group(2):
+                html_end = f'</{html.group(2).lower()}>'
+            else:
+                html_end = ''
+            # El bloque puede cerrarse en la misma línea
+            if html_end and html_end in text.lower()[html.end():]:
+                html_end = None
+            tokens.append(Line(i + 1, offsets[i], text, HTML))
+            previous_blank = False
+            continue
+
+        if _LIST_ITEM_RE.match(text):
+            in_list = True
+        elif not blank and previous_blank and not _INDENTED_RE.match(text):
+            in_list = False
+        previous_blank = blank
+
+        heading = _HEADING_RE.match(text)
+        if heading:
+            tokens.append(Line(i + 1, offsets[i], text, TEXT, len(heading.group(1)), heading.group(2).strip()))
+        else:
+            tokens.append(Line(i + 1, offsets[i], text, TEXT))
+
+    return tokens
+
+
+@dataclass
+class DocumentContext:
+    """Estado compartido por las reglas durante la validación de un documento"""
+    file_path: Path
+    content: str
+    lines: List[Line] = field(default_factory=list)
+    index: LineIndex = field(default_factory=lambda: LineIndex([0]))
+    line_count: int = 0
+    heading_count: int = 0
+    link_count: int = 0
+    image_count: int = 0
+    front_matter: Optional[List[str]] = None
+    links: List[Reference] = field(default_factory=list)
+    images: List[Reference] = field(default_factory=list)
+
+    def references(self, pattern: "re.Pattern") -> List[Reference]:
+        """Coincidencias de pattern en el documento completo, sin las de bloques de código
+
+        El texto de un enlace puede ocupar varias líneas, así que se busca sobre el contenido
+        y la posición de cada coincidencia se traduce a línea y columna con el índice.
+        """
+        if '](' not in self.content:
+            return []
+        found = []
+        for match in pattern.finditer(self.content):
+            line, column = self.index.position(match.start())
+            if self.lines and self.lines[line - 1].block == CODE:
+                continue
+            found.append(Reference(match.group(1), match.group(2), line, column))
+        return found
+
+
+class Rule:
+    """Regla de validación que recibe cada línea una sola vez
+
+    Las subclases declaran los bloques que les interesan, revisan las líneas en check_line
+    y emiten lo que dependa del documento completo en finish. Se crea una instancia por documento.
+
+    Los problemas repetidos se limitan a validation.max_issues_per_type por tipo; con
+    validation.aggregate_issues cada tipo repetido se resume en un único problema de ejemplo.
+    Por encima del límite no se construyen más objetos ValidationIssue.
+    """
+    blocks = ALL_BLOCKS
+
+    def __init__(self, validator: "MarkdownValidator"):
+        from .validator import ValidationIssue
+        self.validator = validator
+        self.issue_class = ValidationIssue
+        self.codes = validator.error_codes
+        self.issues: List["ValidationIssue"] = []
+        self.limit = getattr(validator.config, 'max_issues_per_type', 0)
+        self.aggregate = getattr(validator.config, 'aggregate_issues', False)
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._samples: Dict[Tuple[str, str], int] = {}
+        self._lines: Dict[Tuple[str, str], List[int]] = {}
+
+    @classmethod
+    def enabled(cls, config) -> bool:
+        return True
+
+    def issue(self, **kwargs):
+        key = (kwargs['type'], kwargs.get('code', ''))
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        if self.aggregate:
+            if kwargs.get('line'):
+                self._lines.setdefault(key, []).append(kwargs['line'])
+            if count > 1:
+                return
+        elif self.limit and count > self.limit:
+            return
+        if count == 1:
+            self._samples[key] = len(self.issues)
+        self.issues.append(self.issue_class(**kwargs))
+
+    def collected(self) -> List["ValidationIssue"]:
+        """Problemas de la regla con los repetidos agregados o resumidos según la configuración"""
+        issues = self.issues
+        for key, count in self._counts.items():
+            sample = issues[self._samples[key]]
+            if self.aggregate and count > 1:
+                issues[self._samples[key]] = self._aggregated(sample, count, self._lines.get(key, []))
+            elif not self.aggregate and self.limit and count > self.limit:
+                issues.append(self.issue_class(
+                    type=sample.type,
+                    message=f"🔁 {count - self.limit} problemas más de este tipo omitidos (máximo {self.limit} por archivo)",
+                    code=sample.code,
+                    suggestion="Usa --aggregate-issues para agruparlos o ajusta validation.max_issues_per_type",
+                    severity=sample.severity
+                ))
+        return issues
+
+    def _aggregated(self, sample: "ValidationIssue", count: int, lines: List[int]) -> "ValidationIssue":
+        listed = ', '.join(map(str, lines[:AGGREGATE_SAMPLE_LINES]))
+        if len(lines) > AGGREGATE_SAMPLE_LINES:
+            listed += f" (+{len(lines) - AGGREGATE_SAMPLE_LINES})"
+        context = f"Líneas: {listed}" if lines else ""
+        if sample.context:
+            context = f"{sample.context} | {context}" if context else sample.context
+        return self.issue_class(
+            type=sample.type,
+            message=f"🔁 {count} problemas de este tipo; ejemplo: {sample.message}",
+            line=sample.line,
+            column=sample.column,
+            code=sample.code,
+            suggestion=sample.suggestion,
+            context=context,
+            severity=sample.severity
+        )
+
+    def check_line(self, line: Line, ctx: DocumentContext) -> None:
+        pass
+
+    def finish(self, ctx: DocumentContext) -> None:
+        pass
+
+
+class HeadingStructureRule(Rule):
+    """Documento sin headings o con saltos de nivel"""
+    blocks = frozenset({TEXT})
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.current_level = 0
+        self.jump: Optional[Tuple[str, int]] = None
+
+    def check_line(self, line, ctx):
+        if not line.heading_level:
+            return
+        ctx.heading_count += 1
+        if self.jump is None and line.heading_level > self.current_level + 1:
+            self.jump = (f"H{self.current_level} → H{line.heading_level} (salto de nivel)", line.number)
+        self.current_level = line.heading_level
+
+    def finish(self, ctx):
+        if not ctx.heading_count:
+            self.issue(
+                type="no_headings",
+                message="⚠️  No se encontraron headings (títulos) en el documento",
+                code=self.codes['NO_HEADINGS'],
+                suggestion="Agrega títulos usando # para H1, ## para H2, etc.",
+                severity="warning"
+            )
+        elif self.jump:
+            summary, line_number = self.jump
+            self.issue(
+                type="inconsistent_headings",
+                message="⚠️  Estructura de headings inconsistente detectada",
+                line=line_number,
+                column=1,
+                code=self.codes['INCONSISTENT_HEADINGS'],
+                suggestion="Usa una jerarquía consistente: H1 → H2 → H3, sin saltar niveles",
+                context=f"Headings encontrados: {summary}",
+                severity="warning"
+            )
+
+
+class DuplicateHeadingsRule(Rule):
+    """Headings con el mismo texto"""
+    blocks = frozenset({TEXT})
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.seen: Dict[str, List[int]] = {}
+
+    def check_line(self, line, ctx):
+        if line.heading_text:
+            self.seen.setdefault(line.heading_text, []).append(line.number)
+
+    def finish(self, ctx):
+        for heading, line_numbers in self.seen.items():
+            if len(line_numbers) > 1:
+                # Se señala la primera repetición
+                self.issue(
+                    type="duplicate_headings",
+                    message=f"⚠️  Heading duplicado: '{heading}'",
+                    line=line_numbers[1],
+                    column=1,
+                    code=self.codes['DUPLICATE_HEADINGS'],
+                    suggestion="Considera usar headings únicos o agregar sufijos para diferenciarlos",
+                    context=f"Aparece en líneas: {', '.join(map(str, line_numbers))}",
+                    severity="warning"
+                )
+
+
+class LineLengthRule(Rule):
+    """Líneas de más de 120 caracteres (fuera de código, HTML y front matter)"""
+    blocks = frozenset({TEXT})
+
+    def check_line(self, line, ctx):
+        if len(line.text) > 120:
+            self.issue(
+                type="line_too_long",
+                message=f"📏 Línea {line.number} es muy larga ({len(line.text)} caracteres)",
+                line=line.number,
+                column=121,
+                code=self.codes['LINE_TOO_LONG'],
+                suggestion="Considera dividir la línea para mejor legibilidad",
+                context=f"Línea: {line.text[:50]}...",
+                severity="warning"
+            )
+
+
+class TabCharactersRule(Rule):
+    """Líneas con tabuladores (fuera de código, HTML y front matter)"""
+    blocks = frozenset({TEXT})
+
+    def check_line(self, line, ctx):
+        column = line.text.find('\t')
+        if column >= 0:
+            self.issue(
+                type="tab_characters",
+                message=f"🔤 Línea {line.number} contiene caracteres tab",
+                line=line.number,
+                column=column + 1,
+                code=self.codes['TAB_CHARACTERS'],
+                suggestion="Reemplaza los tabs con espacios para mejor compatibilidad",
+                severity="warning"
+            )
+
+
+class InvalidCharactersRule(Rule):
+    """Caracteres no ASCII fuera de validation.allowed_characters (fuera de código)
+
+    Una sola búsqueda sobre el documento completo: solo se visitan los caracteres problemáticos,
+    que se agrupan por línea con el índice de líneas.
+    """
+    blocks = frozenset()
+
+    def finish(self, ctx):
+        if ctx.content.isascii():
+            return
+        by_line: Dict[int, List[Tuple[int, str]]] = {}
+        for match in self.validator.invalid_characters.finditer(ctx.content):
+            line, column = ctx.index.position(match.start())
+            if ctx.lines[line - 1].block != CODE:
+                by_line.setdefault(line, []).append((column, match.group()))
+
+        for line, found in by_line.items():
+            self.issue(
+                type="invalid_characters",
+                message=f"🔤 Línea {line} contiene caracteres potencialmente problemáticos",
+                line=line,
+                column=found[0][0],
+                code=self.codes['INVALID_CHARACTERS'],
+                suggestion="Revisa y corrige los caracteres especiales",
+                context=f"Caracteres: {''.join(dict.fromkeys(char for _, char in found))}",
+                severity="warning"
+            )
+
+
+class LinkRule(Rule):
+    """Enlaces locales rotos y enlaces HTTP (sobre ctx.links, ya sin los ejemplos de código)"""
+    blocks = frozenset()
+
+    @classmethod
+    def enabled(cls, config):
+        return config.check_broken_links
+
+    def finish(self, ctx):
+        for link in ctx.links:
+            if not link.url.startswith(('http://', 'https://', 'mailto:', '#')):
+                if not self.validator.stats.exists(ctx.file_path.parent / link.url):
+                    self.issue(
+                        type="broken_link",
+                        message=f"🔗 Enlace roto: '{link.text}' → {link.url}",
+                        line=link.line,
+                        column=link.column,
+                        code=self.codes['BROKEN_LINK'],
+                        suggestion="Verifica que el archivo referenciado existe en la ruta correcta",
+                        severity="error"
+                    )
+            elif link.url.startswith('http://'):
+                self.issue(
+                    type="unsafe_link",
+                    message=f"🔒 Enlace HTTP (no seguro): '{link.text}'",
+                    line=link.line,
+                    column=link.column,
+                    code=self.codes['UNSAFE_LINK'],
+                    suggestion="Considera usar HTTPS para mayor seguridad",
+                    severity="warning"
+                )
+
+
+class ImageRule(Rule):
+    """Imágenes inexistentes, con formato no estándar, muy grandes o SVG inválidos"""
+    blocks = frozenset()
+
+    @classmethod
+    def enabled(cls, config):
+        return config.check_missing_images
+
+    def finish(self, ctx):
+        for image in ctx.images:
+            self.check_image(image.url, image.line, image.column, ctx)
+
+    def check_image(self, image_path: str, line: int, column: int, ctx: DocumentContext):
+        if image_path.startswith('http'):
+            # URL externa - verificar formato
+            if not any(ext in image_path.lower() for ext in STANDARD_IMAGE_EXTENSIONS):
+                self.issue(
+                    type="WARNING",
+                    code="IMG_FORMAT",
+                    message=f"Formato de imagen no estándar: {image_path}",
+                    suggestion="Usar formatos estándar: PNG, JPG, SVG, GIF, WebP",
+                    line=line,
+                    column=column
+                )
+            return
+
+        image_file = ctx.file_path.parent / image_path
+        image_stat = self.validator.stats.stat(image_file)
+        if image_stat is None:
+            self.issue(
+                type="ERROR",
+                code="IMG_MISSING",
+                message=f"Imagen no encontrada: {image_path}",
+                suggestion=f"Verificar que el archivo existe en: {image_file}",
+                line=line,
+                column=column
+            )
+            return
+
+        file_extension = image_file.suffix.lower()
+        if file_extension not in STANDARD_IMAGE_EXTENSIONS:
+            self.issue(
+                type="WARNING",
+                code="IMG_FORMAT",
+                message=f"Formato de imagen no estándar: {file_extension}",
+                suggestion="Usar formatos estándar: PNG, JPG, SVG, GIF, WebP",
+                line=line,
+                column=column
+            )
+
+        if file_extension == '.svg':
+            self.issues.extend(self.validator._validate_svg_file(image_file, image_stat))
+
+        file_size = image_stat.st_size
+        if file_size > 5 * 1024 * 1024:  # 5MB
+            self.issue(
+                type="WARNING",
+                code="IMG_SIZE",
+                message=f"Imagen muy grande: {image_path} ({file_size / 1024 / 1024:.1f}MB)",
+                suggestion="Optimizar imagen para reducir tamaño",
+                line=line,
+                column=column
+            )
+
+
+class MetadataRule(Rule):
+    """Front matter YAML: sintaxis, campos recomendados y formato de fecha"""
+    blocks = frozenset({FRONT_MATTER})
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.lines: List[Line] = []
+
+    def check_line(self, line, ctx):
+        self.lines.append(line)
+
+    def finish(self, ctx):
+        if not self.lines:
+            self.issue(
+                type="no_metadata",
+                message="📋 No se encontraron metadatos YAML",
+                code="I001",
+                suggestion="Considera agregar metadatos para mejor documentación del archivo",
+                severity="info"
+            )
+            return
+
+        # Sin los delimitadores ---
+        ctx.front_matter = [line.text for line in self.lines[1:-1]]
+        try:
+            metadata = yaml.safe_load('\n'.join(ctx.front_matter))
+            if metadata is None:
+                metadata = {}
+        except yaml.YAMLError as e:
+            mark = getattr(e, 'problem_mark', None)
+            self.issue(
+                type="invalid_yaml",
+                message=f"📋 Error en formato YAML: {str(e)}",
+                # El YAML empieza en la línea 2, después del primer ---
+                line=mark.line + 2 if mark else 1,
+                column=mark.column + 1 if mark else None,
+                code=self.codes['INVALID_YAML'],
+                suggestion="Verifica la sintaxis YAML en los metadatos",
+                severity="error"
+            )
+            return
+
+        for field_name in ('title', 'author', 'date', 'description'):
+            if field_name not in metadata:
+                self.issue(
+                    type="missing_metadata",
+                    message=f"📋 Campo de metadatos recomendado faltante: {field_name}",
+                    line=1,
+                    column=1,
+                    code=self.codes['MISSING_METADATA'],
+                    suggestion=f"Agrega el campo '{field_name}' a los metadatos para mejor documentación",
+                    severity="info"
+                )
+
+        date_value = metadata.get('date') if isinstance(metadata, dict) else None
+        if isinstance(date_value, str):
+            try:
+                datetime.strptime(date_value, '%Y-%m-%d')
+            except ValueError:
+                date_line = next((line.number for line in self.lines if line.text.startswith('date:')), 1)
+                self.issue(
+                    type="invalid_date_format",
+                    message=f"📅 Formato de fecha inválido: {date_value}",
+                    line=date_line,
+                    column=1,
+                    code=self.codes['INVALID_DATE'],
+                    suggestion="Usa el formato YYYY-MM-DD (ejemplo: 2024-12-19)",
+                    severity="warning"
+                )
+
+
+class EmojiRule(Rule):
+    """Exceso de emojis en el documento y emojis en títulos"""
+    blocks = NON_CODE_BLOCKS
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.count = 0
+
+    def check_line(self, line, ctx):
+        if line.text.isascii():
+            return
+        found = _EMOJI_RE.findall(line.text)
+        if not found:
+            return
+        self.count += len(found)
+        if line.block == TEXT and line.text.strip().startswith('#'):
+            self.issue(
+                type="emoji_in_title",
+                message=f"📝 Emoji encontrado en título (línea {line.number})",
+                line=line.number,
+                column=line.text.index(found[0]) + 1,
+                code=self.codes.get('EMOJI_IN_TITLE', 'EMOJI_TITLE'),
+                suggestion="Los emojis en títulos pueden causar problemas en algunos sistemas",
+                severity="info"
+            )
+
+    def finish(self, ctx):
+        if self.count > 20:
+            self.issue(
+                type="too_many_emojis",
+                message=f"🎭 Demasiados emojis encontrados ({self.count})",
+                code=self.codes.get('TOO_MANY_EMOJIS', 'EMOJI_OVERUSE'),
+                suggestion="Considera reducir el uso de emojis para un tono más profesional",
+                severity="warning"
+            )
+
+
+class TitleCharactersRule(Rule):
+    """Caracteres problemáticos en títulos"""
+    blocks = frozenset({TEXT})
+
+    def check_line(self, line, ctx):
+        if not line.text.strip().startswith('#'):
+            return
+        found_chars = [char for char in PROBLEMATIC_TITLE_CHARS if char in line.text]
+        if found_chars:
+            self.issue(
+                type="problematic_title_chars",
+                message=f"🔤 Caracteres problemáticos en título (línea {line.number}): {', '.join(found_chars)}",
+                line=line.number,
+                column=min(line.text.index(char) for char in found_chars) + 1,
+                code=self.codes.get('PROBLEMATIC_TITLE_CHARS', 'TITLE_CHARS'),
+                suggestion="Evita caracteres especiales en títulos para mejor compatibilidad",
+                severity="warning"
+            )
+
+
+class ListStructureRule(Rule):
+    """Marcadores de lista sin espacio"""
+    blocks = frozenset({TEXT})
+
+    def check_line(self, line, ctx):
+        stripped = line.text.strip()
+        column = len(line.text) - len(line.text.lstrip()) + 1
+        if _LIST_NO_SPACE_RE.match(stripped):
+            self.issue(
+                type="list_no_space",
+                message=f"📋 Lista sin espacio después del marcador (línea {line.number})",
+                line=line.number,
+                column=column,
+                code=self.codes.get('LIST_NO_SPACE', 'LIST_FORMAT'),
+                suggestion="Añade un espacio después del marcador de lista: '- ' en lugar de '-'",
+                severity="warning"
+            )
+        if _NUMBERED_NO_SPACE_RE.match(stripped):
+            self.issue(
+                type="numbered_list_no_space",
+                message=f"📋 Lista numerada sin espacio después del punto (línea {line.number})",
+                line=line.number,
+                column=column,
+                code=self.codes.get('NUMBERED_LIST_NO_SPACE', 'LIST_FORMAT'),
+                suggestion="Añade un espacio después del punto: '1. ' en lugar de '1.'",
+                severity="warning"
+            )
+
+
+class LinkCountRule(Rule):
+    """Cuenta enlaces e imágenes para las estadísticas del reporte"""
+    blocks = frozenset()
+
+    def finish(self, ctx):
+        ctx.link_count = len(ctx.links)
+        ctx.image_count = len(ctx.images)
+
+
+# Reglas por defecto; el orden determina el orden de los problemas en el reporte
+DEFAULT_RULES: List[Type[Rule]] = [
+    HeadingStructureRule,
+    DuplicateHeadingsRule,
+    LineLengthRule,
+    TabCharactersRule,
+    InvalidCharactersRule,
+    LinkRule,
+    ImageRule,
+    MetadataRule,
+    EmojiRule,
+    TitleCharactersRule,
+    ListStructureRule,
+    LinkCountRule,
+]
+
+
+def run_rules(validator: "MarkdownValidator", rule_classes: Iterable[Type[Rule]],
+              ctx: DocumentContext) -> List["ValidationIssue"]:
+    """Recorre el documento una sola vez y devuelve los problemas de todas las reglas"""
+    rules = [cls(validator) for cls in rule_classes if cls.enabled(validator.config)]
+    # Reglas por bloque precalculadas: cada línea solo visita las que le corresponden
+    by_block = {block: [rule.check_line for rule in rules if block in rule.blocks] for block in ALL_BLOCKS}
+
+    ctx.lines = tokenize(ctx.content)
+    ctx.index = LineIndex([line.offset for line in ctx.lines])
+    ctx.line_count = len(ctx.lines)
+    # Enlaces e imágenes: una búsqueda de cada tipo que comparten las reglas y las estadísticas
+    ctx.links = ctx.references(_LINK_RE)
+    ctx.images = ctx.references(_IMAGE_RE)
+    for line in ctx.lines:
+        for check in by_block[line.block]:
+            check(line, ctx)
+
+    issues = []
+    for rule in rules:
+        rule.finish(ctx)
+        issues.extend(rule.collected())
+    return issues
@@ -3,13 +3,18 @@
 Validador avanzado de documentos Markdown con mensajes claros y sugerencias
 """
 
-import re
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
 
-import yaml
+from .discovery import MarkdownDiscovery
+from .validation_rules import (DEFAULT_ALLOWED_CHARACTERS, DEFAULT_RULES, DocumentContext, LineIndex, Rule,
+                               invalid_characters_pattern, run_rules, scan_invalid_characters)
+
+# Por debajo de este número de archivos no compensa arrancar procesos
+PARALLEL_MIN_FILES = 8
 
 
 @dataclass
@@ -23,6 +28,7 @@ class ValidationIssue:
     code: str = ""
     suggestion: str = ""
     context: str = ""
+    column: Optional[int] = None
 
 
 @dataclass
@@ -39,11 +45,46 @@ class ValidationResult:
     metadata_present: bool = False
 
 
+class StatCache:
+    """Memoriza stat() de las rutas consultadas durante una validación
+    
+    Los documentos que comparten enlaces e imágenes no repiten las llamadas al sistema de archivos.
+    Solo vale para una pasada: quien reutiliza el validador llama a reset_stats() al empezar otra.
+    """
+    
+    def __init__(self):
+        self._stats: Dict[str, Optional[os.stat_result]] = {}
+    
+    def stat(self, path: Path) -> Optional[os.stat_result]:
+        """stat() de la ruta o None si no existe"""
+        key = os.path.normpath(path)
+        try:
+            return self._stats[key]
+        except KeyError:
+            pass
+        try:
+            result = os.stat(key)
+        except (OSError, ValueError):
+            result = None
+        self._stats[key] = result
+        return result
+    
+    def exists(self, path: Path) -> bool:
+        return self.stat(path) is not None
+
+
 class MarkdownValidator:
     """Validador avanzado de documentos Markdown con mensajes claros"""
     
     def __init__(self, config):
         self.config = config
+        # Reglas aplicadas en el recorrido único del documento (ver core/validation_rules.py)
+        self.rules: List[Type[Rule]] = list(DEFAULT_RULES)
+        self.invalid_characters = invalid_characters_pattern(
+            getattr(config, 'allowed_characters', DEFAULT_ALLOWED_CHARACTERS))
+        # Caché de stat() por ejecución y de las comprobaciones de SVG por (ruta, mtime, tamaño)
+        self.stats = StatCache()
+        self._svg_issues: Dict[Tuple[str, int, int], List[ValidationIssue]] = {}
         self.image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp', '.tiff'}
         self.video_extensions = {'.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm'}
         
@@ -76,13 +117,18 @@ class MarkdownValidator:
             'NUMBERED_LIST_NO_SPACE': 'E025'
         }
     
+    def reset_stats(self):
+        """Empieza una pasada de validación nueva, sin los stat() memorizados de la anterior"""
+        self.stats = StatCache()
+    
     def validate_file(self, file_path: Path) -> ValidationResult:
         """Validar un archivo Markdown con mensajes claros y sugerencias"""
         issues = []
         
         try:
             # Verificar que el archivo existe
-            if not file_path.exists():
+            file_stat = self.stats.stat(file_path)
+            if file_stat is None:
                 issues.append(ValidationIssue(
                     type="file_not_found",
                     message=f"❌ El archivo no existe: {file_path.name}",
@@ -93,69 +139,16 @@ class MarkdownValidator:
                 return ValidationResult(False, issues, str(file_path), 0, 0)
             
             # Verificar tamaño del archivo
-            file_size = file_path.stat().st_size
-            max_size = self.config.max_file_size_mb * 1024 * 1024
-            
-            if file_size > max_size:
-                issues.append(ValidationIssue(
-                    type="file_too_large",
-                    message=f"⚠️  El archivo es muy grande: {file_size / 1024 / 1024:.2f}MB (máximo {self.config.max_file_size_mb}MB)",
-                    code=self.error_codes['FILE_TOO_LARGE'],
-                    suggestion="Considera dividir el documento en archivos más pequeños",
-                    severity="warning"
-                ))
+            file_size = file_stat.st_size
+            size_issue = self._size_issue(file_size)
+            if size_issue is not None:
+                issues.append(size_issue)
             
             # Leer contenido del archivo
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
-            line_count = len(content.splitlines())
-            
-            # Verificar archivo vacío
-            if self.config.check_empty_files and not content.strip():
-                issues.append(ValidationIssue(
-                    type="empty_file",
-                    message="❌ El archivo está completamente vacío",
-                    code=self.error_codes['EMPTY_FILE'],
-                    suggestion="Agrega contenido al archivo o elimínalo si no es necesario",
-                    severity="error"
-                ))
-            
-            # Contar elementos del documento
-            heading_count = len(re.findall(r'^#{1,6}\s+', content, re.MULTILINE))
-            link_count = len(re.findall(r'\[([^\]]+)\]\(([^)]+)\)', content))
-            image_count = len(re.findall(r'!\[([^\]]*)\]\(([^)]+)\)', content))
-            metadata_present = bool(re.search(r'^---\s*\n', content, re.MULTILINE))
-            
-            # Validar contenido
-            content_issues = self._validate_content(content, file_path)
-            issues.extend(content_issues)
-            
-            # Verificar enlaces rotos
-            if self.config.check_broken_links:
-                link_issues = self._validate_links(content, file_path)
-                issues.extend(link_issues)
-            
-            # Verificar imágenes faltantes
-            if self.config.check_missing_images:
-                image_issues = self._validate_images(content, file_path)
-                issues.extend(image_issues)
-            
-            # Verificar metadatos YAML
-            metadata_issues = self._validate_metadata(content)
-            issues.extend(metadata_issues)
-            
-            # Validaciones adicionales
-            additional_issues = self._validate_additional(content, file_path)
-            issues.extend(additional_issues)
-            
-            # Determinar si el archivo es válido
-            valid = not any(issue.severity == "error" for issue in issues)
-            
-            return ValidationResult(
-                valid, issues, str(file_path), file_size, line_count,
-                heading_count, link_count, image_count, metadata_present
-            )
+            return self._validate_content(file_path, content, file_size, issues)
             
         except Exception as e:
             issues.append(ValidationIssue(
@@ -167,185 +160,89 @@ class MarkdownValidator:
             ))
             return ValidationResult(False, issues, str(file_path), 0, 0)
     
-    def _validate_content(self, content: str, file_path: Path) -> List[ValidationIssue]:
-        """Validar contenido del archivo con mensajes claros"""
-        issues = []
+    def validate_document(self, document) -> ValidationResult:
+        """Validar un documento ya leído (core.document.Document) sin volver a leer el archivo
         
-        lines = content.splitlines()
-        
-        # Verificar si hay headings
-        headings = re.findall(r'^#{1,6}\s+', content, re.MULTILINE)
-        if not headings:
+        La conversión con --validate usa el mismo texto que después se renderiza. Los enlaces,
+        imágenes y headings encontrados quedan en document.links, document.images y
+        document.outline para las etapas siguientes.
+        """
+        issues = []
+        try:
+            file_size = len(document.raw)
+            size_issue = self._size_issue(file_size)
+            if size_issue is not None:
+                issues.append(size_issue)
+            return self._validate_content(document.path, document.text, file_size, issues, document)
+        except Exception as e:
             issues.append(ValidationIssue(
-                type="no_headings",
-                message="⚠️  No se encontraron headings (títulos) en el documento",
-                code=self.error_codes['NO_HEADINGS'],
-                suggestion="Agrega títulos usando # para H1, ## para H2, etc.",
-                severity="warning"
+                type="validation_error",
+                message=f"❌ Error inesperado durante la validación: {str(e)}",
+                code="E999",
+                suggestion="Verifica que el archivo no esté corrupto y sea un Markdown válido",
+                severity="error"
             ))
-        else:
-            # Verificar estructura de headings
-            heading_structure = self._analyze_heading_structure(content)
-            if heading_structure['inconsistent']:
-                issues.append(ValidationIssue(
-                    type="inconsistent_headings",
-                    message="⚠️  Estructura de headings inconsistente detectada",
-                    code=self.error_codes['INCONSISTENT_HEADINGS'],
-                    suggestion="Usa una jerarquía consistente: H1 → H2 → H3, sin saltar niveles",
-                    context=f"Headings encontrados: {heading_structure['summary']}",
-                    severity="warning"
-                ))
-            
-            # Verificar headings duplicados
-            duplicate_headings = self._find_duplicate_headings(content)
-            for heading, line_numbers in duplicate_headings.items():
-                issues.append(ValidationIssue(
-                    type="duplicate_headings",
-                    message=f"⚠️  Heading duplicado: '{heading}'",
-                    code=self.error_codes['DUPLICATE_HEADINGS'],
-                    suggestion="Considera usar headings únicos o agregar sufijos para diferenciarlos",
-                    context=f"Aparece en líneas: {', '.join(map(str, line_numbers))}",
-                    severity="warning"
-                ))
-        
-        for i, line in enumerate(lines, 1):
-            # Verificar líneas muy largas
-            if len(line) > 120:
-                issues.append(ValidationIssue(
-                    type="line_too_long",
-                    message=f"📏 Línea {i} es muy larga ({len(line)} caracteres)",
-                    line=i,
-                    code=self.error_codes['LINE_TOO_LONG'],
-                    suggestion="Considera dividir la línea para mejor legibilidad",
-                    context=f"Línea: {line[:50]}...",
-                    severity="warning"
-                ))
-            
-            # Verificar caracteres especiales problemáticos
-            if '\t' in line:
-                issues.append(ValidationIssue(
-                    type="tab_characters",
-                    message=f"🔤 Línea {i} contiene caracteres tab",
-                    line=i,
-                    code=self.error_codes['TAB_CHARACTERS'],
-                    suggestion="Reemplaza los tabs con espacios para mejor compatibilidad",
-                    severity="warning"
-                ))
-            
-            # Verificar caracteres inválidos
-            invalid_chars = self._find_invalid_characters(line)
-            if invalid_chars:
-                issues.append(ValidationIssue(
-                    type="invalid_characters",
-                    message=f"🔤 Línea {i} contiene caracteres potencialmente problemáticos",
-                    line=i,
-                    code=self.error_codes['INVALID_CHARACTERS'],
-                    suggestion="Revisa y corrige los caracteres especiales",
-                    context=f"Caracteres: {invalid_chars}",
-                    severity="warning"
-                ))
-        
-        return issues
+            return ValidationResult(False, issues, str(document.path), 0, 0)
     
-    def _validate_links(self, content: str, file_path: Path) -> List[ValidationIssue]:
-        """Validar enlaces con mensajes claros"""
-        issues = []
+    def _validate_content(self, file_path: Path, content: str, file_size: int,
+                          issues: List[ValidationIssue], document=None) -> ValidationResult:
+        """Comprobaciones sobre el texto del documento, comunes a validate_file y validate_document"""
+        # Verificar archivo vacío
+        if self.config.check_empty_files and not content.strip():
+            issues.append(ValidationIssue(
+                type="empty_file",
+                message="❌ El archivo está completamente vacío",
+                code=self.error_codes['EMPTY_FILE'],
+                suggestion="Agrega contenido al archivo o elimínalo si no es necesario",
+                severity="error"
+            ))
         
-        # Patrón para enlaces Markdown
-        link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
+        # Un solo recorrido del documento reparte cada línea a las reglas registradas
+        ctx = DocumentContext(file_path, content)
+        issues.extend(run_rules(self, self.rules, ctx))
+        if document is not None:
+            document.links, document.images = ctx.links, ctx.images
+            document.outline = [line for line in ctx.lines if line.heading_level]
         
-        for match in re.finditer(link_pattern, content):
-            link_text = match.group(1)
-            link_url = match.group(2)
-            
-            # Verificar enlaces locales
-            if not link_url.startswith(('http://', 'https://', 'mailto:', '#')):
-                local_path = file_path.parent / link_url
-                
-                if not local_path.exists():
-                    issues.append(ValidationIssue(
-                        type="broken_link",
-                        message=f"🔗 Enlace roto: '{link_text}' → {link_url}",
-                        code=self.error_codes['BROKEN_LINK'],
-                        suggestion="Verifica que el archivo referenciado existe en la ruta correcta",
-                        severity="error"
-                    ))
-            
-            # Verificar enlaces potencialmente inseguros
-            elif link_url.startswith('http://'):
-                issues.append(ValidationIssue(
-                    type="unsafe_link",
-                    message=f"🔒 Enlace HTTP (no seguro): '{link_text}'",
-                    code=self.error_codes['UNSAFE_LINK'],
-                    suggestion="Considera usar HTTPS para mayor seguridad",
-                    severity="warning"
-                ))
+        # Determinar si el archivo es válido
+        valid = not any(issue.severity == "error" for issue in issues)
         
-        return issues
+        return ValidationResult(
+            valid, issues, str(file_path), file_size, ctx.line_count,
+            ctx.heading_count, ctx.link_count, ctx.image_count, ctx.front_matter is not None
+        )
     
-    def _validate_images(self, content: str, file_path: Path) -> List[ValidationIssue]:
-        """Validar imágenes y archivos multimedia"""
-        issues = []
-        
-        # Buscar imágenes en Markdown
-        image_pattern = r'!\[([^\]]*)\]\(([^)]+)\)'
-        images = re.findall(image_pattern, content)
-        
-        for alt_text, image_path in images:
-            # Validar ruta de imagen
-            if image_path.startswith('http'):
-                # URL externa - verificar formato
-                if not any(ext in image_path.lower() for ext in ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp']):
-                    issues.append(ValidationIssue(
-                        type="WARNING",
-                        code="IMG_FORMAT",
-                        message=f"Formato de imagen no estándar: {image_path}",
-                        suggestion="Usar formatos estándar: PNG, JPG, SVG, GIF, WebP",
-                        line=self.find_line_number(content, image_path)
-                    ))
-            else:
-                # Ruta local
-                image_file = file_path.parent / image_path
-                if not image_file.exists():
-                    issues.append(ValidationIssue(
-                        type="ERROR",
-                        code="IMG_MISSING",
-                        message=f"Imagen no encontrada: {image_path}",
-                        suggestion=f"Verificar que el archivo existe en: {image_file}",
-                        line=self.find_line_number(content, image_path)
-                    ))
-                else:
-                    # Validar formato de archivo
-                    file_extension = image_file.suffix.lower()
-                    if file_extension not in ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp']:
-                        issues.append(ValidationIssue(
-                            type="WARNING",
-                            code="IMG_FORMAT",
-                            message=f"Formato de imagen no estándar: {file_extension}",
-                            suggestion="Usar formatos estándar: PNG, JPG, SVG, GIF, WebP",
-                            line=self.find_line_number(content, image_path)
-                        ))
-                    
-                    # Validaciones específicas para SVG
-                    if file_extension == '.svg':
-                        svg_issues = self._validate_svg_file(image_file)
-                        issues.extend(svg_issues)
-                    
-                    # Verificar tamaño de archivo
-                    file_size = image_file.stat().st_size
-                    if file_size > 5 * 1024 * 1024:  # 5MB
-                        issues.append(ValidationIssue(
-                            type="WARNING",
-                            code="IMG_SIZE",
-                            message=f"Imagen muy grande: {image_path} ({file_size / 1024 / 1024:.1f}MB)",
-                            suggestion="Optimizar imagen para reducir tamaño",
-                            line=self.find_line_number(content, image_path)
-                        ))
-        
-        return issues
+    def _size_issue(self, file_size: int) -> Optional[ValidationIssue]:
+        """Aviso de archivo demasiado grande según validation.max_file_size_mb"""
+        if file_size <= self.config.max_file_size_mb * 1024 * 1024:
+            return None
+        return ValidationIssue(
+            type="file_too_large",
+            message=f"⚠️  El archivo es muy grande: {file_size / 1024 / 1024:.2f}MB (máximo {self.config.max_file_size_mb}MB)",
+            code=self.error_codes['FILE_TOO_LARGE'],
+            suggestion="Considera dividir el documento en archivos más pequeños",
+            severity="warning"
+        )
+    
+    def register_rule(self, rule_class: Type[Rule]):
+        """Agregar una regla al recorrido del documento sin añadir otra pasada"""
+        self.rules.append(rule_class)
     
-    def _validate_svg_file(self, svg_file: Path) -> List[ValidationIssue]:
-        """Validar archivo SVG específicamente"""
+    def _validate_svg_file(self, svg_file: Path, svg_stat: Optional[os.stat_result] = None) -> List[ValidationIssue]:
+        """Validar archivo SVG específicamente (una sola lectura por versión del archivo)"""
+        if svg_stat is None:
+            svg_stat = self.stats.stat(svg_file)
+        key = (os.path.normpath(svg_file), svg_stat.st_mtime_ns, svg_stat.st_size) if svg_stat else None
+        if key is not None and key in self._svg_issues:
+            return list(self._svg_issues[key])
+        
+        issues = self._check_svg_file(svg_file)
+        if key is not None:
+            self._svg_issues[key] = issues
+        return list(issues)
+    
+    def _check_svg_file(self, svg_file: Path) -> List[ValidationIssue]:
+        """Comprobaciones de un archivo SVG"""
         issues = []
         
         try:
@@ -404,234 +301,40 @@ class MarkdownValidator:
         
         return issues
     
-    def _validate_metadata(self, content: str) -> List[ValidationIssue]:
-        """Validar metadatos YAML con mensajes claros"""
-        issues = []
-        
-        # Verificar si hay YAML front matter
-        yaml_pattern = r'^---\s*\n(.*?)\n---\s*\n'
-        match = re.search(yaml_pattern, content, re.DOTALL)
-        
-        if match:
-            yaml_content = match.group(1)
-            
-            try:
-                # Intentar parsear YAML
-                metadata = yaml.safe_load(yaml_content)
-                if metadata is None:
-                    metadata = {}
-            except yaml.YAMLError as e:
-                issues.append(ValidationIssue(
-                    type="invalid_yaml",
-                    message=f"📋 Error en formato YAML: {str(e)}",
-                    code=self.error_codes['INVALID_YAML'],
-                    suggestion="Verifica la sintaxis YAML en los metadatos",
-                    severity="error"
-                ))
-                return issues
-            
-            # Validar campos recomendados
-            recommended_fields = ['title', 'author', 'date', 'description']
-            for field in recommended_fields:
-                if field not in metadata:
-                    issues.append(ValidationIssue(
-                        type="missing_metadata",
-                        message=f"📋 Campo de metadatos recomendado faltante: {field}",
-                        code=self.error_codes['MISSING_METADATA'],
-                        suggestion=f"Agrega el campo '{field}' a los metadatos para mejor documentación",
-                        severity="info"
-                    ))
-            
-            # Validar formato de fecha
-            if 'date' in metadata:
-                date_value = metadata['date']
-                if isinstance(date_value, str):
-                    try:
-                        datetime.strptime(date_value, '%Y-%m-%d')
-                    except ValueError:
-                        issues.append(ValidationIssue(
-                            type="invalid_date_format",
-                            message=f"📅 Formato de fecha inválido: {date_value}",
-                            code=self.error_codes['INVALID_DATE'],
-                            suggestion="Usa el formato YYYY-MM-DD (ejemplo: 2024-12-19)",
-                            severity="warning"
-                        ))
-        else:
-            issues.append(ValidationIssue(
-                type="no_metadata",
-                message="📋 No se encontraron metadatos YAML",
-                code="I001",
-                suggestion="Considera agregar metadatos para mejor documentación del archivo",
-                severity="info"
-            ))
-        
-        return issues
-    
-    def _validate_additional(self, content: str, file_path: Path) -> List[ValidationIssue]:
-        """Validaciones adicionales específicas"""
-        issues = []
-        
-        # Validar emojis
-        emoji_issues = self._validate_emojis(content)
-        issues.extend(emoji_issues)
-        
-        # Validar caracteres especiales en títulos
-        title_issues = self._validate_title_characters(content)
-        issues.extend(title_issues)
-        
-        # Validar estructura de listas
-        list_issues = self._validate_list_structure(content)
-        issues.extend(list_issues)
-        
-        return issues
-    
-    def _validate_emojis(self, content: str) -> List[ValidationIssue]:
-        """Validar uso de emojis"""
-        issues = []
-        
-        # Patrón para detectar emojis Unicode
-        emoji_pattern = r'[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F1E0-\U0001F1FF\U00002600-\U000027BF]'
-        emojis = re.findall(emoji_pattern, content)
-        
-        if emojis:
-            # Verificar si hay demasiados emojis
-            if len(emojis) > 20:
-                issues.append(ValidationIssue(
-                    type="too_many_emojis",
-                    message=f"🎭 Demasiados emojis encontrados ({len(emojis)})",
-                    code=self.error_codes.get('TOO_MANY_EMOJIS', 'EMOJI_OVERUSE'),
-                    suggestion="Considera reducir el uso de emojis para un tono más profesional",
-                    severity="warning"
-                ))
-            
-            # Verificar emojis en títulos (puede ser problemático)
-            lines = content.split('\n')
-            for i, line in enumerate(lines, 1):
-                if line.strip().startswith('#') and re.search(emoji_pattern, line):
-                    issues.append(ValidationIssue(
-                        type="emoji_in_title",
-                        message=f"📝 Emoji encontrado en título (línea {i})",
-                        line=i,
-                        code=self.error_codes.get('EMOJI_IN_TITLE', 'EMOJI_TITLE'),
-                        suggestion="Los emojis en títulos pueden causar problemas en algunos sistemas",
-                        severity="info"
-                    ))
-        
-        return issues
-    
-    def _validate_title_characters(self, content: str) -> List[ValidationIssue]:
-        """Validar caracteres especiales en títulos"""
-        issues = []
-        
-        lines = content.split('\n')
-        for i, line in enumerate(lines, 1):
-            if line.strip().startswith('#'):
-                # Verificar caracteres problemáticos en títulos
-                problematic_chars = ['<', '>', '&', '"', "'", '|', '\\', '/', ':', '*', '?']
-                found_chars = [char for char in problematic_chars if char in line]
-                
-                if found_chars:
-                    issues.append(ValidationIssue(
-                        type="problematic_title_chars",
-                        message=f"🔤 Caracteres problemáticos en título (línea {i}): {', '.join(found_chars)}",
-                        line=i,
-                        code=self.error_codes.get('PROBLEMATIC_TITLE_CHARS', 'TITLE_CHARS'),
-                        suggestion="Evita caracteres especiales en títulos para mejor compatibilidad",
-                        severity="warning"
-                    ))
-        
-        return issues
-    
-    def _validate_list_structure(self, content: str) -> List[ValidationIssue]:
-        """Validar estructura de listas"""
-        issues = []
-        
-        lines = content.split('\n')
-        for i, line in enumerate(lines, 1):
-            stripped = line.strip()
-            
-            # Verificar listas sin espacio después del marcador
-            if re.match(r'^[-*+]\S', stripped):
-                issues.append(ValidationIssue(
-                    type="list_no_space",
-                    message=f"📋 Lista sin espacio después del marcador (línea {i})",
-                    line=i,
-                    code=self.error_codes.get('LIST_NO_SPACE', 'LIST_FORMAT'),
-                    suggestion="Añade un espacio después del marcador de lista: '- ' en lugar de '-'",
-                    severity="warning"
-                ))
-            
-            # Verificar listas numeradas inconsistentes
-            if re.match(r'^\d+\.\S', stripped):
-                issues.append(ValidationIssue(
-                    type="numbered_list_no_space",
-                    message=f"📋 Lista numerada sin espacio después del punto (línea {i})",
-                    line=i,
-                    code=self.error_codes.get('NUMBERED_LIST_NO_SPACE', 'LIST_FORMAT'),
-                    suggestion="Añade un espacio después del punto: '1. ' en lugar de '1.'",
-                    severity="warning"
-                ))
-        
-        return issues
-    
-    def _analyze_heading_structure(self, content: str) -> Dict[str, Any]:
-        """Analizar la estructura de headings"""
-        lines = content.splitlines()
-        heading_levels = []
-        current_level = 0
-        
-        for line in lines:
-            match = re.match(r'^(#{1,6})\s+', line)
-            if match:
-                level = len(match.group(1))
-                heading_levels.append(level)
-                
-                # Verificar saltos de nivel
-                if level > current_level + 1:
-                    return {
-                        'inconsistent': True,
-                        'summary': f"H{current_level} → H{level} (salto de nivel)"
-                    }
-                current_level = level
-        
-        return {
-            'inconsistent': False,
-            'summary': f"Total: {len(heading_levels)} headings"
-        }
-    
-    def _find_duplicate_headings(self, content: str) -> Dict[str, List[int]]:
-        """Encontrar headings duplicados"""
-        lines = content.splitlines()
-        headings = {}
-        
-        for i, line in enumerate(lines, 1):
-            match = re.match(r'^#{1,6}\s+(.+)$', line)
-            if match:
-                heading_text = match.group(1).strip()
-                if heading_text in headings:
-                    headings[heading_text].append(i)
-                else:
-                    headings[heading_text] = [i]
-        
-        return {k: v for k, v in headings.items() if len(v) > 1}
-    
     def _find_invalid_characters(self, line: str) -> str:
         """Encontrar caracteres potencialmente problemáticos"""
-        invalid_chars = []
-        for char in line:
-            if ord(char) > 127 and char not in 'áéíóúñüÁÉÍÓÚÑÜ':
-                invalid_chars.append(char)
-        return ''.join(set(invalid_chars))
+        return ''.join(scan_invalid_characters(line, self.invalid_characters))
     
-    def validate_directory(self, directory: Path) -> Dict[str, ValidationResult]:
-        """Validar todos los archivos Markdown en un directorio"""
+    def validate_directory(self, directory: Path, workers: Optional[int] = None,
+                           files: Optional[Iterable[Path]] = None) -> Dict[str, ValidationResult]:
+        """Validar todos los archivos Markdown en un directorio
+        
+        Con varios archivos la validación se reparte en un pool de procesos. Los resultados
+        se devuelven ordenados por ruta, independientemente del orden en que terminen.
+        `files` permite reutilizar una búsqueda ya hecha (core.discovery.MarkdownDiscovery);
+        sin él, se recorre el directorio con la configuración de búsqueda por defecto.
+        """
         results = {}
         
         if not directory.exists():
             return results
         
-        for file_path in directory.glob("*.md"):
-            results[str(file_path)] = self.validate_file(file_path)
+        # Caché de stat() nueva en cada ejecución
+        self.reset_stats()
+        files = sorted(files if files is not None else MarkdownDiscovery(directory))
+        workers = min(workers or os.cpu_count() or 1, len(files))
+        
+        if workers > 1 and len(files) >= PARALLEL_MIN_FILES:
+            # Bloques contiguos: los archivos vecinos comparten recursos y la caché de cada proceso
+            chunksize = max(1, len(files) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_validation_worker,
+                                     initargs=(self.config,)) as executor:
+                validated = list(executor.map(_validate_in_worker, files, chunksize=chunksize))
+        else:
+            validated = [self.validate_file(file_path) for file_path in files]
+        
+        for file_path, result in zip(files, validated):
+            results[str(file_path)] = result
         
         return results
     
@@ -726,7 +429,9 @@ class MarkdownValidator:
                             print(f"         💡 {issue.suggestion}")
                         if issue.context:
                             print(f"         📝 {issue.context}")
-                        if issue.line:
+                        if issue.line and issue.column:
+                            print(f"         📍 Línea: {issue.line}, columna: {issue.column}")
+                        elif issue.line:
                             print(f"         📍 Línea: {issue.line}")
         
         # Recomendaciones
@@ -744,7 +449,20 @@ class MarkdownValidator:
     
     def find_line_number(self, content: str, search: str) -> int:
         """Devuelve el número de línea donde aparece el texto buscado, o -1 si no se encuentra."""
-        for i, line in enumerate(content.splitlines(), 1):
-            if search in line:
-                return i
-        return -1 
\ No newline at end of file
+        offset = content.find(search)
+        if offset < 0:
+            return -1
+        return LineIndex.from_content(content).line_of(offset)
+
+
+# Validador de cada proceso del pool, creado una sola vez por proceso
+_worker_validator: Optional[MarkdownValidator] = None
+
+
+def _init_validation_worker(config):
+    global _worker_validator
+    _worker_validator = MarkdownValidator(config)
+
+
+def _validate_in_worker(file_path: Path) -> ValidationResult:
+    return _worker_validator.validate_file(file_path)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Vigilancia de cambios en el sistema de archivos para el modo --watch
+
+En Linux se usa inotify (mediante ctypes, sin dependencias adicionales); en el
+resto de sistemas, o si inotify no está disponible, se comparan periódicamente
+la fecha de modificación y el tamaño de los archivos vigilados.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ventana de agrupación: los cambios separados por menos de este tiempo se procesan juntos
+DEBOUNCE_SECONDS = 0.3
+
+# Intervalo entre comparaciones del sondeo
+POLL_INTERVAL = 0.5
+
+# Máscaras de inotify (linux/inotify.h)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ATTRIB
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _ignored(path: Path) -> bool:
+    """Directorios y archivos ocultos (.cache, .deps, .git, temporales de editores)"""
+    return path.name.startswith('.') or path.name.endswith('~')
+
+
+class PollingWatcher:
+    """Detecta cambios comparando (mtime, tamaño) de los archivos de los directorios vigilados"""
+
+    backend = 'sondeo'
+
+    def __init__(self, directories: Iterable[Path], exclude: Iterable[Path] = (), interval: float = POLL_INTERVAL):
+        self.directories = [Path(d).resolve() for d in directories]
+        self.exclude = {Path(d).resolve() for d in exclude}
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _walk(self, directory: Path, recursive: bool, snapshot: Dict[Path, Tuple[int, int]],
+              visited: Set[Tuple[int, int]]):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            path = Path(entry.path)
+            if _ignored(path) or path in self.exclude:
+                continue
+            try:
+                if entry.is_dir():
+                    # Los enlaces simbólicos se siguen, pero cada directorio se recorre una vez
+                    stat = entry.stat()
+                    if recursive and (stat.st_dev, stat.st_ino) not in visited:
+                        visited.add((stat.st_dev, stat.st_ino))
+                        self._walk(path, recursive, snapshot, visited)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot: Dict[Path, Tuple[int, int]] = {}
+        visited: Set[Tuple[int, int]] = set()
+        for index, directory in enumerate(self.directories):
+            # Solo el primer directorio (el de entrada) se recorre de forma recursiva
+            if index == 0:
+                try:
+                    stat = directory.stat()
+                    visited.add((stat.st_dev, stat.st_ino))
+                except OSError:
+                    pass
+            self._walk(directory, index == 0, snapshot, visited)
+        return snapshot
+
+    def read(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Rutas que cambiaron; vacío si no hubo cambios antes de timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            wait = self._next_scan - now
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            if wait > 0:
+                time.sleep(wait)
+            if time.monotonic() >= self._next_scan:
+                self._next_scan = time.monotonic() + self.interval
+                snapshot = self._scan()
+                changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                           if snapshot.get(path) != self._snapshot.get(path)}
+                self._snapshot = snapshot
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Detecta cambios con inotify; el primer directorio se vigila de forma recursiva
+
+    Se vigilan directorios y no archivos: los editores suelen guardar escribiendo un
+    archivo temporal y renombrándolo, lo que invalidaría la vigilancia del archivo.
+    """
+
+    backend = 'inotify'
+
+    def __init__(self, directories: Iterable[Path], exclude: Iterable[Path] = ()):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name or 'libc.so.6', use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify no disponible")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        self.exclude = {Path(d).resolve() for d in exclude}
+        self._watches: Dict[int, Path] = {}
+        self._recursive: Set[Path] = set()
+        for index, directory in enumerate(directories):
+            directory = Path(directory).resolve()
+            if index == 0:
+                self._recursive.add(directory)
+                self._add_tree(directory)
+            else:
+                self._add(directory)
+
+    def _add(self, directory: Path) -> bool:
+        """Vigila el directorio; False si no se pudo o si ya se vigilaba (mismo inodo por otra ruta)"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code == errno.ENOSPC:
+                logger.warning("⚠️  Límite de vigilancias de inotify alcanzado "
+                               "(fs.inotify.max_user_watches); algunos directorios no se vigilarán")
+            return False
+        if wd in self._watches:
+            # inotify devuelve el mismo descriptor para el mismo inodo: un enlace simbólico
+            # a un directorio ya vigilado (p. ej. un ciclo) no se vuelve a recorrer
+            return False
+        self._watches[wd] = directory
+        return True
+
+    def _add_tree(self, directory: Path):
+        if _ignored(directory) or directory in self.exclude:
+            return
+        if not self._add(directory):
+            return
+        try:
+            subdirectories = [Path(entry.path) for entry in os.scandir(directory) if entry.is_dir()]
+        except OSError:
+            return
+        for subdirectory in subdirectories:
+            self._add_tree(subdirectory)
+
+    def _in_recursive_tree(self, path: Path) -> bool:
+        return any(root == path or root in path.parents for root in self._recursive)
+
+    def _drain(self) -> Set[Path]:
+        changed: Set[Path] = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # Se perdieron eventos: se informa de todos los directorios vigilados
+                    changed.update(self._watches.values())
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._watches[wd]
+                    continue
+                if not name:
+                    continue
+                path = directory / os.fsdecode(name)
+                if _ignored(path) or path in self.exclude:
+                    continue
+                if mask & IN_ISDIR:
+                    # Los directorios nuevos dentro del árbol de entrada también se vigilan
+                    if mask & (IN_CREATE | IN_MOVED_TO) and self._in_recursive_tree(path):
+                        self._add_tree(path)
+                    continue
+                changed.add(path)
+
+    def read(self, timeout: Optional[float] = None) -> Set[Path]:
+        """Rutas que cambiaron; vacío si no hubo cambios antes de timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if ready:
+                changed = self._drain()
+                if changed:
+                    return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(directories: Iterable[Path], exclude: Iterable[Path] = (), polling: bool = False):
+    """Vigilante con inotify si está disponible; si no, por sondeo
+
+    El primer directorio (el de entrada) se vigila de forma recursiva; el resto, solo
+    en su primer nivel (los directorios del CSS y de config.yaml).
+    """
+    directories = list(dict.fromkeys(Path(d).resolve() for d in directories))
+    if not polling:
+        try:
+            return InotifyWatcher(directories, exclude)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify no disponible ({e}); se usará sondeo cada {POLL_INTERVAL:g}s")
+    return PollingWatcher(directories, exclude)
+
+
+def debounced_changes(watcher, delay: float = DEBOUNCE_SECONDS, idle_timeout: float = 1.0) -> Iterator[Set[Path]]:
+    """Agrupa ráfagas de cambios: entrega el conjunto cuando pasan `delay` segundos sin cambios nuevos
+
+    La espera del primer cambio se hace en tramos de idle_timeout para que Ctrl+C
+    interrumpa el bucle también en sistemas donde select() no lo atiende de inmediato.
+    """
+    while True:
+        changed = watcher.read(idle_timeout)
+        if not changed:
+            continue
+        while True:
+            more = watcher.read(delay)
+            if not more:
+                break
+            changed |= more
+        yield changed
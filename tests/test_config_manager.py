@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Pruebas del gestor de configuración (secciones y valores por defecto)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.config_manager import ConfigManager
+
+REPO_CONFIG = Path(__file__).resolve().parent.parent / "config.yaml"
+
+
+class TestConfigManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_file = Path(self.tmp.name) / "config.yaml"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _manager(self, config) -> ConfigManager:
+        self.config_file.write_text(yaml.safe_dump(config), encoding="utf-8")
+        return ConfigManager(str(self.config_file))
+
+    def test_defaults_for_missing_sections(self):
+        manager = self._manager({'default': {'input_dir': './docs'}})
+        self.assertEqual(manager.get_conversion_config().input_dir, './docs')
+        performance = manager.get_performance_config()
+        self.assertEqual((performance.max_workers, performance.memory_limit_mb, performance.timeout_seconds,
+                          performance.chunked), (4, 512, 30, False))
+        cache = manager.get_cache_config()
+        self.assertTrue(cache.enabled and cache.assets_enabled)
+        self.assertFalse(cache.offline)
+        discovery = manager.get_discovery_config()
+        self.assertEqual((discovery.recursive, discovery.exclude, discovery.mirror_output), (True, [], True))
+        self.assertEqual(manager.get_validation_config().max_issues_per_type, 100)
+        self.assertTrue(manager.get_output_config().optimize_images)
+
+    def test_sections_override_defaults(self):
+        manager = self._manager({
+            'performance': {'max_workers': 8, 'memory_limit_mb': 0, 'chunked': True, 'chunk_size': 256},
+            'cache': {'enabled': False, 'directory': '/tmp/render', 'offline': True},
+            'discovery': {'recursive': False, 'exclude': None, 'workers': 2},
+            'output': {'dpi': 150, 'embed_max_mb': 5},
+        })
+        performance = manager.get_performance_config()
+        self.assertEqual((performance.max_workers, performance.memory_limit_mb, performance.chunked,
+                          performance.chunk_size), (8, 0, True, 256))
+        cache = manager.get_cache_config()
+        self.assertEqual((cache.enabled, cache.directory, cache.offline), (False, '/tmp/render', True))
+        discovery = manager.get_discovery_config()
+        self.assertEqual((discovery.recursive, discovery.exclude, discovery.workers), (False, [], 2))
+        output = manager.get_output_config()
+        self.assertEqual((output.dpi, output.embed_max_mb, output.image_quality), (150, 5, 85))
+
+    def test_template_selection(self):
+        manager = self._manager({
+            'default': {'style_file': './style/light.css'},
+            'templates': {'oscuro': {'style_file': './style/dark.css', 'page_size': 'Letter'}},
+        })
+        self.assertEqual(manager.get_conversion_config().style_file, './style/light.css')
+        dark = manager.get_conversion_config('oscuro')
+        self.assertEqual((dark.style_file, dark.page_size), ('./style/dark.css', 'Letter'))
+        self.assertEqual(manager.get_conversion_config('inexistente').style_file, './style/light.css')
+
+    def test_missing_file_uses_defaults(self):
+        manager = ConfigManager(str(self.config_file))
+        self.assertEqual(manager.get_conversion_config().input_dir, './conversion')
+        self.assertEqual(manager.get_performance_config().max_workers, 4)
+
+    def test_repository_config(self):
+        manager = ConfigManager(str(REPO_CONFIG))
+        for getter in (manager.get_conversion_config, manager.get_validation_config, manager.get_performance_config,
+                       manager.get_output_config, manager.get_cache_config, manager.get_discovery_config):
+            self.assertIsNotNone(getter())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Pruebas del flujo de conversión de MarkdownToPDFConverter (con WeasyPrint sustituido)
+"""
+
+import contextlib
+import io
+import threading
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+from PIL import Image
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from weasyprint_stub import FakeCSS, FakeHTML, install_for_workers, patch_exporter
+
+from cli import md_to_pdf_converter
+from cli.md_to_pdf_converter import MarkdownToPDFConverter, print_validation_summary, validate_only
+from core import document as document_module
+from core.config_manager import ConfigManager, ConversionConfig, ValidationConfig
+from core.image_processor import ImageProcessor
+from core.manifest import DependencyManifest
+from core.renderer import SVG_EMOJI_CSS
+
+
+class ConverterTestCase(unittest.TestCase):
+    def setUp(self):
+        patch_exporter(self)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name).resolve()
+        self.input_dir = self.root / "entrada"
+        self.input_dir.mkdir()
+        self.output_dir = self.root / "salida"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _converter(self, config_manager=None, style_file=None) -> MarkdownToPDFConverter:
+        config = ConversionConfig(str(self.input_dir), str(self.output_dir), style_file and str(style_file),
+                                  'A4', '2cm', 'Arial', 'es', False)
+        return MarkdownToPDFConverter(config, config_manager)
+
+    def _config_manager(self, **sections) -> ConfigManager:
+        """config.yaml temporal sin cachés ni procesos supervisados, con las secciones indicadas"""
+        config = {
+            'cache': {'enabled': False, 'assets_enabled': False},
+            'performance': {'max_workers': 1, 'memory_limit_mb': 0, 'timeout_seconds': 0},
+            'output': {'optimize_images': False},
+        }
+        for name, values in sections.items():
+            config.setdefault(name, {}).update(values)
+        config_file = self.root / "config.yaml"
+        config_file.write_text(yaml.safe_dump(config), encoding="utf-8")
+        return ConfigManager(str(config_file))
+
+    def _write(self, name: str, text: str) -> Path:
+        path = self.input_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def _image(self, name: str, color: str) -> Path:
+        path = self.input_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", (4, 4), color).save(path)
+        return path
+
+
+class TestDocumentFolder(ConverterTestCase):
+    def test_nested_document_images(self):
+        # Misma imagen en la raíz y junto al documento: vale la de su carpeta
+        self._image("foto.png", "red")
+        nested_image = self._image("guia/foto.png", "blue")
+        markdown_file = self._write("guia/doc.md", "# Guía\n\n![Foto](foto.png)\n")
+        converter = self._converter()
+
+        document = converter._load_document(markdown_file)
+        html_content = converter._render_document(document, download_remote_images=True)
+        self.assertEqual(document.assets, [nested_image])
+        processed = list((self.input_dir / "guia" / "processed_images").glob("foto_*.png"))
+        self.assertEqual(len(processed), 1)
+        self.assertIn(f'src="processed_images/{processed[0].name}"', html_content)
+        self.assertFalse((self.input_dir / "processed_images").exists())
+        with Image.open(processed[0]) as img:
+            self.assertEqual(img.getpixel((0, 0)), (0, 0, 255))
+
+        self.assertTrue(converter.convert_file(markdown_file))
+        self.assertEqual(FakeHTML.rendered[-1][1], self.input_dir / "guia")
+
+    def test_base_dir_overrides_document_folder(self):
+        image = self._image("foto.png", "red")
+        markdown_file = self.root / "temporal.md"
+        markdown_file.write_text("![Foto](foto.png)\n", encoding="utf-8")
+        converter = self._converter()
+
+        self.assertTrue(converter.convert_file(markdown_file, output_path=self.root / "temporal.pdf",
+                                               base_dir=self.input_dir))
+        self.assertEqual(FakeHTML.rendered[-1][1], self.input_dir)
+        document = converter._load_document(markdown_file)
+        document.base_dir = self.input_dir
+        converter._render_document(document)
+        self.assertEqual(document.assets, [image])
+
+
+class TestBatch(ConverterTestCase):
+    def _convert_all(self, output_dir: Path, jobs: int) -> dict:
+        self.output_dir = output_dir
+        converter = self._converter(self._config_manager())
+        results = converter.convert_all_files(toc=True, jobs=jobs)
+        results['pdfs'] = {path.relative_to(output_dir).as_posix(): path.read_bytes()
+                           for path in output_dir.rglob("*.pdf")}
+        results['failures'] = {Path(f).relative_to(self.input_dir).as_posix(): reason
+                               for f, reason in results['failures'].items()}
+        return results
+
+    def test_parallel_batch_matches_serial(self):
+        install_for_workers(self)
+        for i in range(4):
+            self._write(f"doc{i}.md", f"# Documento {i}\n\n## Sección\n\ntexto {i}\n")
+        self._write("guia/anidado.md", "# Anidado\n")
+        self._write("vacio.md", "")
+
+        serial = self._convert_all(self.root / "serie", jobs=1)
+        self.assertEqual(len(FakeHTML.rendered), 5)
+        parallel = self._convert_all(self.root / "paralelo", jobs=3)
+        # Con --jobs los documentos se renderizan en los procesos del pool, no en este
+        self.assertEqual(len(FakeHTML.rendered), 5)
+
+        self.assertEqual((serial['success'], serial['failed'], serial['total']), (5, 1, 6))
+        for key in ('success', 'failed', 'total', 'failures', 'pdfs'):
+            self.assertEqual(parallel[key], serial[key], key)
+        self.assertIn("guia/anidado.pdf", parallel['pdfs'])
+        self.assertEqual(list(parallel['failures']), ["vacio.md"])
+
+
+class TestValidate(ConverterTestCase):
+    def test_invalid_file_skipped_before_rendering(self):
+        valid = self._write("valido.md", "---\ntitle: Válido\n---\n# Válido\n")
+        invalid = self._write("roto.md", "# Roto\n\n[enlace](no-existe.md)\n")
+        converter = self._converter(self._config_manager())
+
+        with mock.patch.object(md_to_pdf_converter, "render_markdown",
+                               wraps=md_to_pdf_converter.render_markdown) as render_markdown:
+            results = converter.convert_all_files(validate=True)
+        # Solo se renderizó el archivo válido
+        self.assertEqual(render_markdown.call_count, 1)
+        self.assertEqual(len(FakeHTML.rendered), 1)
+        self.assertFalse((self.output_dir / "roto.pdf").exists())
+        self.assertTrue((self.output_dir / "valido.pdf").exists())
+
+        self.assertEqual((results['success'], results['failed'], results['total']), (1, 1, 2))
+        self.assertEqual(results['failures'], {str(invalid): "no se convirtió: 1 errores de validación"})
+        self.assertEqual(set(results['validation']), {str(valid), str(invalid)})
+        self.assertTrue(results['validation'][str(valid)].valid)
+        self.assertFalse(results['validation'][str(invalid)].valid)
+
+        # El reporte final se construye con results['validation'], sin volver a validar
+        output = io.StringIO()
+        with mock.patch.object(md_to_pdf_converter.MarkdownValidator, "validate_file") as validate_file, \
+                contextlib.redirect_stdout(output):
+            summary = print_validation_summary(results, ValidationConfig(True, True, True, 10))
+        validate_file.assert_not_called()
+        self.assertEqual((summary['total_files'], summary['valid_files'], summary['invalid_files']), (2, 1, 1))
+        self.assertIn("Archivos con errores: 1", output.getvalue())
+        self.assertIn("1 archivos con errores críticos no se convirtieron", output.getvalue())
+
+    def test_each_batch_sees_current_files(self):
+        self._write("doc.md", "---\ntitle: Doc\n---\n# Doc\n\n[anexo](anexo.md)\n")
+        converter = self._converter(self._config_manager())
+
+        first = converter.convert_all_files(validate=True)
+        self.assertEqual((first['success'], first['failed']), (0, 1))
+        # El validador se reutiliza entre lotes, pero no sus stat() memorizados
+        self._write("anexo.md", "---\ntitle: Anexo\n---\n# Anexo\n")
+        second = converter.convert_all_files(validate=True)
+        self.assertEqual((second['success'], second['failed']), (2, 0))
+
+    def test_validation_results_reach_image_stage(self):
+        markdown_file = self._write("doc.md", "---\ntitle: Doc\n---\n# Doc\n\n![Logo](https://example.com/logo.png)\n\n"
+                                              "![Otro][otro]\n\n[otro]: https://example.com/otro.png\n")
+        converter = self._converter(self._config_manager())
+        document = converter._validated_document(markdown_file)
+        self.assertEqual([image.url for image in document.images], ["https://example.com/logo.png"])
+        self.assertEqual([(line.heading_level, line.heading_text) for line in document.outline], [(1, "Doc")])
+
+        downloads, prefetches = [], []
+
+        def prefetch(processor, urls, base_path, *args):
+            prefetches.append((list(urls), threading.current_thread().name.startswith("prefetch")))
+            return prefetch_remote_images(processor, prefetches[-1][0], base_path, *args)
+
+        def download(processor, url, images_dir, timeout=30):
+            downloads.append(url)
+            images_dir.mkdir(exist_ok=True)
+            path = images_dir / Path(url).name
+            Image.new("RGB", (4, 4), "red").save(path)
+            return path
+
+        prefetch_remote_images = ImageProcessor.prefetch_remote_images
+        with mock.patch.object(ImageProcessor, "download_remote_image", autospec=True, side_effect=download), \
+                mock.patch.object(ImageProcessor, "prefetch_remote_images", autospec=True, side_effect=prefetch):
+            self.assertTrue(converter.convert_file(markdown_file, validate=True, download_remote_images=True))
+        # La imagen que vio el validador se descarga en segundo plano mientras se renderiza el Markdown
+        # y no se vuelve a pedir; la de sintaxis de referencia sale del HTML
+        self.assertEqual(prefetches, [(["https://example.com/logo.png"], True),
+                                      (["https://example.com/logo.png", "https://example.com/otro.png"], False)])
+        self.assertEqual(downloads, ["https://example.com/logo.png", "https://example.com/otro.png"])
+
+    def test_validate_only(self):
+        self._write("valido.md", "---\ntitle: Válido\n---\n# Válido\n")
+        self._write("guia/roto.md", "# Roto\n\n[enlace](no-existe.md)\n")
+        config_manager = self._config_manager()
+
+        output = io.StringIO()
+        with mock.patch.object(md_to_pdf_converter.MarkdownValidator, "validate_directory", autospec=True,
+                               side_effect=md_to_pdf_converter.MarkdownValidator.validate_directory) as validate_directory, \
+                contextlib.redirect_stdout(output):
+            summary = validate_only(self.input_dir, config_manager, workers=2, skip=[self.output_dir])
+        self.assertEqual(validate_directory.call_count, 1)
+        self.assertEqual((summary['total_files'], summary['valid_files'], summary['invalid_files']), (2, 1, 1))
+        self.assertIn("Se encontraron 1 archivos con errores críticos", output.getvalue())
+        # Nada se renderiza ni se escribe en la salida
+        self.assertEqual(FakeHTML.rendered, [])
+        self.assertFalse(self.output_dir.exists())
+
+
+class TestSinglePass(ConverterTestCase):
+    def test_pdf_and_html_from_one_parse(self):
+        markdown_file = self._write("doc.md", "---\ntitle: Manual\n---\n# Intro\n\n## Uso\n\ntexto\n")
+        converter = self._converter()
+        html_path = self.output_dir / "doc.html"
+
+        with mock.patch.object(Path, "read_bytes", autospec=True, side_effect=Path.read_bytes) as read_bytes, \
+                mock.patch.object(document_module, "extract_metadata",
+                                  wraps=document_module.extract_metadata) as extract_metadata, \
+                mock.patch.object(md_to_pdf_converter, "render_markdown",
+                                  wraps=md_to_pdf_converter.render_markdown) as render_markdown:
+            self.assertTrue(converter.convert_file(markdown_file, toc=True, html_path=html_path))
+        self.assertEqual([call.args[0] for call in read_bytes.call_args_list], [markdown_file])
+        self.assertEqual(extract_metadata.call_count, 1)
+        self.assertEqual(render_markdown.call_count, 1)
+
+        standalone = html_path.read_text(encoding="utf-8")
+        pdf_html = FakeHTML.rendered[-1][0]
+        for html in (standalone, pdf_html):
+            self.assertIn("<title>Manual</title>", html)
+            self.assertIn('<h2 id="uso">', html)
+            self.assertNotIn("title: Manual", html)
+        # La TOC solo va en el PDF
+        self.assertIn('href="#uso"', pdf_html)
+        self.assertNotIn('href="#uso"', standalone)
+
+
+class TestStylesheets(ConverterTestCase):
+    def test_template_stylesheet_applied_once(self):
+        style_file = self.root / "plantilla.css"
+        style_file.write_text("h1 { color: rebeccapurple }", encoding="utf-8")
+        converter = self._converter(style_file=style_file)
+        files = [self._write(f"doc{i}.md", f"# Doc {i}\n") for i in range(2)]
+
+        for markdown_file in files:
+            html_path = self.output_dir / f"{markdown_file.stem}.html"
+            self.assertTrue(converter.convert_file(markdown_file, html_path=html_path))
+            # El HTML independiente incluye el CSS completo
+            self.assertIn("rebeccapurple", html_path.read_text(encoding="utf-8"))
+
+        self.assertEqual(len(FakeHTML.rendered), 2)
+        for html, _base_url, stylesheets in FakeHTML.rendered:
+            # En el PDF el CSS del template no va en el <style>: se aplica una vez como hoja
+            self.assertNotIn("rebeccapurple", html)
+            self.assertEqual([css.source for css in stylesheets], [SVG_EMOJI_CSS, "h1 { color: rebeccapurple }"])
+        # Las hojas se parsean una vez y las comparten todos los documentos
+        self.assertEqual(len(FakeCSS.created), 2)
+        self.assertEqual([id(css) for css in FakeHTML.rendered[0][2]], [id(css) for css in FakeHTML.rendered[1][2]])
+
+
+class TestIncremental(ConverterTestCase):
+    def test_manifest_only_when_incremental(self):
+        image = self._image("guia/foto.png", "blue")
+        markdown_file = self._write("guia/doc.md", "# Guía\n\n![Foto](foto.png)\n")
+        converter = self._converter()
+        pdf_path = self.root / "servidor" / "doc.pdf"
+        pdf_path.parent.mkdir()
+
+        self.assertTrue(converter.convert_file(markdown_file, output_path=pdf_path))
+        self.assertFalse((pdf_path.parent / ".deps").exists())
+
+        self.assertTrue(converter.convert_file(markdown_file, output_path=pdf_path, incremental=True))
+        manifest = DependencyManifest(pdf_path)
+        self.assertEqual(set(manifest._load()["inputs"]), {str(markdown_file), str(image)})
+        self.assertTrue(manifest.is_up_to_date(converter._build_settings(self._options())))
+
+    def test_manifest_records_rendered_images(self):
+        # Sintaxis de referencia y ruta con espacios: las que resuelve el renderizador
+        reference = self._image("guia/ref.png", "red")
+        spaced = self._image("guia/con espacio.png", "red")
+        markdown_file = self._write("guia/doc.md", "# Guía\n\n![A][logo]\n\n![B](<con espacio.png>)\n\n[logo]: ref.png\n")
+        converter = self._converter(self._config_manager(cache={'enabled': True,
+                                                                'directory': str(self.root / "cache")}))
+        expected = {str(markdown_file), str(reference), str(spaced)}
+
+        # Renderizado y, con otra salida, reutilizado desde la caché
+        for name in ("doc.pdf", "copia.pdf"):
+            pdf_path = self.output_dir / name
+            self.assertTrue(converter.convert_file(markdown_file, output_path=pdf_path, incremental=True))
+            self.assertEqual(set(DependencyManifest(pdf_path)._load()["inputs"]), expected)
+        self.assertEqual(len(FakeHTML.rendered), 1)
+
+        Image.new("RGB", (8, 8), "blue").save(reference)
+        self.assertFalse(DependencyManifest(self.output_dir / "copia.pdf").is_up_to_date(
+            converter._build_settings(self._options())))
+
+    def test_convert_all_files_skips_unchanged(self):
+        self._write("a.md", "# A\n")
+        self._write("guia/b.md", "# B\n")
+        converter = self._converter()
+
+        first = converter.convert_all_files(incremental=True)
+        self.assertEqual((first["success"], first["skipped"]), (2, 0))
+        self._write("guia/b.md", "# B editado\n")
+        second = converter.convert_all_files(incremental=True)
+        self.assertEqual((second["success"], second["skipped"], second["total"]), (1, 1, 2))
+
+    def _options(self):
+        return {'toc': False, 'toc_levels': 3, 'number_headings': False, 'max_image_width': 800,
+                'max_image_height': 600, 'image_quality': 85, 'download_remote_images': False,
+                'embed_images': False}
+
+
+
+class TestRenderCache(ConverterTestCase):
+    def test_remote_images_skip_render_cache(self):
+        local = self._write("local.md", "# Local\n")
+        remote = self._write("remoto.md", "# Remoto\n\n![Logo](https://example.com/logo.png)\n")
+        converter = self._converter(self._config_manager(cache={'enabled': True,
+                                                                'directory': str(self.root / "cache")}))
+
+        for _ in range(2):
+            self.assertTrue(converter.convert_file(local))
+        self.assertEqual(len(FakeHTML.rendered), 1)
+
+        # La imagen remota puede cambiar sin que cambie la URL: se renderiza cada vez
+        for _ in range(2):
+            self.assertTrue(converter.convert_file(remote))
+        self.assertEqual(len(FakeHTML.rendered), 3)
+
+    def test_key_uses_images_from_rendered_html(self):
+        # Imágenes de sintaxis de referencia y rutas con espacios entre <>
+        reference = self._image("ref.png", "red")
+        spaced = self._image("con espacio.png", "red")
+        markdown_file = self._write("doc.md", "# Doc\n\n![A][logo]\n\n![B](<con espacio.png>)\n\n[logo]: ref.png\n")
+        converter = self._converter(self._config_manager(cache={'enabled': True,
+                                                                'directory': str(self.root / "cache")}))
+        document = converter._load_document(markdown_file)
+        converter._render_markdown(document)
+        self.assertEqual(document.assets, [reference, spaced])
+
+        self.assertTrue(converter.convert_file(markdown_file))
+        self.assertTrue(converter.convert_file(markdown_file))
+        self.assertEqual(len(FakeHTML.rendered), 1)
+        for path in (reference, spaced):
+            Image.new("RGB", (8, 8), "blue").save(path)
+            self.assertTrue(converter.convert_file(markdown_file))
+        self.assertEqual(len(FakeHTML.rendered), 3)
+
+    def test_remote_reference_images_skip_render_cache(self):
+        markdown_file = self._write("doc.md", "# Doc\n\n![Logo][logo]\n\n[logo]: https://example.com/logo.png\n")
+        converter = self._converter(self._config_manager(cache={'enabled': True,
+                                                                'directory': str(self.root / "cache")}))
+        for _ in range(2):
+            self.assertTrue(converter.convert_file(markdown_file))
+        self.assertEqual(len(FakeHTML.rendered), 2)
+
+
+class TestChunked(ConverterTestCase):
+    def test_chunk_bounds_and_page_numbering(self):
+        sections = "\n\n".join(f"# Parte {i}\n\n" + "texto " * 300 for i in range(3))
+        markdown_file = self._write("manual.md", sections)
+        converter = self._converter(self._config_manager(performance={'chunked': True, 'chunk_size': 1}))
+
+        document = converter._load_document(markdown_file)
+        body = converter._document_body(document)
+        bounds = converter._chunk_bounds(body)
+        self.assertEqual([body[start:end][:16] for start, end in bounds],
+                         ['<h1 id="parte-0"', '<h1 id="parte-1"', '<h1 id="parte-2"'])
+        self.assertEqual(self._converter()._chunk_bounds(body), [(0, len(body))])
+
+        pdf_path = self.output_dir / "manual.pdf"
+        self.assertTrue(converter.convert_file(markdown_file, output_path=pdf_path))
+        self.assertEqual(len(FakeHTML.rendered), 3)
+        # Cada fragmento continúa la numeración donde terminó el anterior (una página por fragmento)
+        resets = [[css.source for css in stylesheets if 'counter-reset' in (css.source or '')]
+                  for _html, _base_url, stylesheets in FakeHTML.rendered]
+        self.assertEqual(resets, [[], ['@page :first { counter-reset: page 1 }'],
+                                  ['@page :first { counter-reset: page 2 }']])
+        pdf = pdf_path.read_text(encoding="utf-8")
+        self.assertTrue(pdf.index("Parte 0") < pdf.index("Parte 1") < pdf.index("Parte 2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché de imágenes derivadas (redimensionadas y recomprimidas)
+"""
+
+import base64
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PIL import Image
+
+from core import image_processor
+from core.image_processor import ImageProcessor, process_html_images
+
+
+class TestDerivedImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _image(self, relative: str, color: str, size=(1600, 1200)) -> Path:
+        path = self.root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Image.new("RGB", size, color).save(path)
+        return path
+
+    def test_hit_skips_pil(self):
+        source = self._image("captura.png", "red")
+        processor = ImageProcessor()
+        first = processor.process_raster_image(source, self.root)
+        self.assertTrue((self.root / first).exists())
+        with mock.patch("core.image_processor.Image.open", side_effect=AssertionError("PIL no debe usarse")):
+            self.assertEqual(ImageProcessor().process_raster_image(source, self.root), first)
+
+    def test_same_stem_different_content(self):
+        a = self._image("a/captura.png", "red")
+        b = self._image("b/captura.png", "blue")
+        processor = ImageProcessor()
+        self.assertNotEqual(processor.process_raster_image(a, self.root), processor.process_raster_image(b, self.root))
+
+    def test_parameters_change_key(self):
+        source = self._image("foto.jpg", "green")
+        small = ImageProcessor(max_width=200, max_height=200).process_raster_image(source, self.root)
+        low_quality = ImageProcessor(quality=40).process_raster_image(source, self.root)
+        default = ImageProcessor().process_raster_image(source, self.root)
+        self.assertEqual(len({small, low_quality, default}), 3)
+        with Image.open(self.root / small) as img:
+            self.assertEqual(img.size, (200, 150))
+
+    def test_parallel_stage_rewrites_every_tag(self):
+        for i in range(6):
+            self._image(f"img{i}.png", "red" if i % 2 else "blue")
+        html = "".join(f'<img alt="{i}" src="img{i % 6}.png">' for i in range(12))
+        with mock.patch.object(ImageProcessor, "process_image_src", autospec=True,
+                               side_effect=lambda self, src, base, css_width=None: f"processed_images/{src}") as process:
+            result = process_html_images(html, self.root, workers=4)
+        # Cada fuente distinta se transforma una sola vez
+        self.assertEqual(process.call_count, 6)
+        self.assertEqual(result.count('src="processed_images/img'), 12)
+        self.assertIn('<img alt="7" src="processed_images/img1.png"', result)
+
+    def test_parallel_stage_real_images(self):
+        for i in range(4):
+            self._image(f"shot{i}.png", "red")
+        html = "".join(f'<img src="shot{i}.png">' for i in range(4))
+        result = process_html_images(html, self.root, workers=4)
+        self.assertEqual(result.count('src="processed_images/shot'), 4)
+        self.assertEqual(len(list((self.root / "processed_images").glob("*.png"))), 4)
+
+    def test_embed_images_once_per_content(self):
+        self._image("a.png", "red", (10, 10))
+        self._image("b.png", "red", (10, 10))
+        html = '<img src="a.png"><img src="b.png"><img src="a.png">'
+        with mock.patch("core.image_processor.write_data_uri", wraps=image_processor.write_data_uri) as write:
+            result = process_html_images(html, self.root, embed_images=True)
+        self.assertEqual(result.count('src="data:image/png;base64,'), 3)
+        # a.png y b.png tienen el mismo contenido: se codifica una sola vez
+        self.assertEqual(write.call_count, 1)
+        processed = next((self.root / "processed_images").glob("a_*.png"))
+        expected = base64.b64encode(processed.read_bytes()).decode("ascii")
+        self.assertIn(f'src="data:image/png;base64,{expected}"', result)
+
+    def test_embed_budget_falls_back_to_files(self):
+        self._image("a.png", "red", (10, 10))
+        self._image("b.png", "blue", (10, 10))
+        html = '<img src="a.png"><img src="b.png">'
+        processed_size = len(process_html_images('<img src="a.png">', self.root, embed_images=True))
+        result = process_html_images(html, self.root, embed_images=True, embed_max_bytes=processed_size)
+        self.assertEqual(result.count('src="data:'), 1)
+        self.assertRegex(result, r'src="processed_images/b_[0-9a-f]{16}\.png"')
+
+
+if __name__ == "__main__":
+    unittest.main()
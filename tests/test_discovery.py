@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la búsqueda recursiva de archivos Markdown
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core import discovery
+from core.config_manager import ValidationConfig
+from core.discovery import ExcludePatterns, MarkdownDiscovery, walk_markdown
+from core.validator import MarkdownValidator
+
+TREE = [
+    "raiz.md",
+    "notas.txt",
+    "guia/intro.md",
+    "guia/api/referencia.md",
+    "guia/api/borrador.tmp.md",
+    "borradores/idea.md",
+    "docs/borradores/otra.md",
+    "docs/antiguo/viejo.md",
+    ".git/HEAD.md",
+    "salida/generado.md",
+]
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for name in TREE:
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("# Título\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _relative(self, files):
+        return sorted(Path(f).relative_to(self.root).as_posix() for f in files)
+
+    def test_exclude_patterns(self):
+        patterns = ExcludePatterns(["# comentario", "borradores/", "*.tmp.md", "/docs/antiguo", "!importante.tmp.md"])
+        self.assertTrue(patterns.excluded("borradores", True))
+        self.assertTrue(patterns.excluded("docs/borradores", True))
+        self.assertFalse(patterns.excluded("borradores", False))
+        self.assertTrue(patterns.excluded("guia/api/borrador.tmp.md", False))
+        self.assertFalse(patterns.excluded("guia/importante.tmp.md", False))
+        self.assertTrue(patterns.excluded("docs/antiguo", True))
+        self.assertFalse(patterns.excluded("otros/docs/antiguo", True))
+        self.assertTrue(ExcludePatterns(["docs/**/viejo.md"]).excluded("docs/a/b/viejo.md", False))
+
+    def test_recursive_walk(self):
+        found = self._relative(walk_markdown(self.root, ExcludePatterns(["borradores/", "*.tmp.md"]), workers=4,
+                                             skip=[self.root / "salida"]))
+        self.assertEqual(found, ["docs/antiguo/viejo.md", "guia/api/referencia.md", "guia/intro.md", "raiz.md"])
+        self.assertEqual(self._relative(walk_markdown(self.root, recursive=False)), ["raiz.md"])
+
+    def test_shared_between_phases(self):
+        files = MarkdownDiscovery(self.root, ["docs/"], skip=[self.root / "salida"])
+        # Una iteración abandonada no se guarda
+        next(iter(files))
+        with mock.patch.object(discovery, "walk_markdown", wraps=walk_markdown) as walk:
+            first = list(files)
+            validator = MarkdownValidator(ValidationConfig(True, True, True, 10))
+            results = validator.validate_directory(self.root, workers=1, files=files)
+            self.assertEqual(walk.call_count, 1)
+        self.assertEqual(self._relative(first), ["borradores/idea.md", "guia/api/borrador.tmp.md",
+                                                 "guia/api/referencia.md", "guia/intro.md", "raiz.md"])
+        self.assertEqual(self._relative(results), self._relative(first))
+
+    def test_symlink_cycle(self):
+        # Enlace al propio directorio y enlace a un hermano: cada directorio se recorre una vez
+        try:
+            (self.root / "guia" / "api" / "bucle").symlink_to(self.root / "guia", target_is_directory=True)
+            (self.root / "atajo").symlink_to(self.root / "docs", target_is_directory=True)
+        except (OSError, NotImplementedError):
+            self.skipTest("enlaces simbólicos no disponibles")
+        found = self._relative(walk_markdown(self.root, ExcludePatterns(["borradores/"]), workers=4,
+                                             skip=[self.root / "salida"]))
+        self.assertEqual(len(found), len(set(Path(f).name for f in found)))
+        self.assertEqual(sorted(Path(f).name for f in found),
+                         ["borrador.tmp.md", "intro.md", "raiz.md", "referencia.md", "viejo.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
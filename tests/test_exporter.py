@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la reutilización de fuentes y hojas de estilo del exportador (con WeasyPrint sustituido)
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from weasyprint_stub import FakeCSS, FakeFontConfiguration, FakeHTML, patch_exporter
+
+from core import exporter
+from core.exporter import PdfExporter, export_pdf, get_exporter
+
+
+class TestPdfExporter(unittest.TestCase):
+    def setUp(self):
+        patch_exporter(self)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.style_file = self.root / "light.css"
+        self.style_file.write_text("body { color: black }", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_font_configuration_once_per_process(self):
+        for i in range(3):
+            export_pdf(f"<h1>Doc {i}</h1>", self.root / f"doc{i}.pdf", self.root, self.style_file, ("h1 {}",))
+        self.assertIs(get_exporter(), exporter._exporter)
+        self.assertEqual(FakeFontConfiguration.created, 1)
+        self.assertEqual(len(FakeHTML.rendered), 3)
+        self.assertTrue(all(css.font_config is get_exporter().font_config for css in FakeCSS.created))
+
+    def test_stylesheets_parsed_once(self):
+        pdf_exporter = PdfExporter()
+        first = pdf_exporter.get_stylesheets(self.style_file, ("h1 {}",))
+        second = pdf_exporter.get_stylesheets(self.style_file, ("h1 {}",))
+        self.assertEqual(len(FakeCSS.created), 2)
+        self.assertEqual([id(css) for css in first], [id(css) for css in second])
+        # Reglas adicionales primero, archivo del template después
+        self.assertEqual([css.source for css in first], ["h1 {}", "body { color: black }"])
+
+    def test_stylesheet_invalidated_when_file_changes(self):
+        pdf_exporter = PdfExporter()
+        old = pdf_exporter.get_stylesheet(self.style_file)
+        self.style_file.write_text("body { color: red }", encoding="utf-8")
+        stat = self.style_file.stat()
+        os.utime(self.style_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        new = pdf_exporter.get_stylesheet(self.style_file)
+        self.assertIsNot(new, old)
+        self.assertEqual(new.source, "body { color: red }")
+        self.assertIs(pdf_exporter.get_stylesheet(self.style_file), new)
+
+    def test_cache_size_is_capped(self):
+        pdf_exporter = PdfExporter(max_stylesheets=2)
+        for css in ("a {}", "b {}", "c {}"):
+            pdf_exporter.get_stylesheets(extra_css=(css,))
+        self.assertEqual(len(pdf_exporter._stylesheets), 2)
+        # La menos usada ("a {}") salió de la caché y se vuelve a parsear
+        pdf_exporter.get_stylesheets(extra_css=("c {}",))
+        self.assertEqual(len(FakeCSS.created), 3)
+        pdf_exporter.get_stylesheets(extra_css=("a {}",))
+        self.assertEqual(len(FakeCSS.created), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Pruebas del recolector de headings y de la tabla de contenidos
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.renderer import insert_automatic_toc, render_markdown, split_html_sections
+
+
+class TestHeadingToc(unittest.TestCase):
+    def test_unique_anchors(self):
+        html, headings = render_markdown("# Intro\n\n## Uso\n\n## Uso\n\n### Propio {#mi-ancla}\n")
+        self.assertEqual([h.anchor for h in headings], ["intro", "uso", "uso_1", "mi-ancla"])
+        self.assertIn('<h2 id="uso_1">Uso</h2>', html)
+
+    def test_numbering_and_levels(self):
+        html, headings = render_markdown("# A\n\n## B\n\n### C\n\n## D\n\n#### E\n")
+        result = insert_automatic_toc(html, toc_levels=3, number_headings=True, headings=headings)
+        self.assertIn('<h2 id="b">1.1 B</h2>', result)
+        self.assertIn('<h3 id="c">1.1.1 C</h3>', result)
+        self.assertIn('<h2 id="d">1.2 D</h2>', result)
+        # Los niveles fuera de la TOC no se numeran
+        self.assertIn('<h4 id="e">E</h4>', result)
+        self.assertNotIn('href="#e"', result)
+        # La TOC va justo después del primer heading
+        self.assertTrue(result.startswith('<h1 id="a">1 A</h1>\n<div class="table-of-contents"'))
+
+    def test_raw_html_headings(self):
+        result = insert_automatic_toc("<h1>Título</h1>\n<h2>Otro</h2>")
+        self.assertIn('<h2 id="otro">Otro</h2>', result)
+        self.assertIn('href="#otro"', result)
+
+    def test_single_heading_without_toc(self):
+        html, headings = render_markdown("# Solo\n\ntexto\n")
+        self.assertNotIn("table-of-contents", insert_automatic_toc(html, headings=headings))
+
+    def test_many_headings(self):
+        source = "\n\n".join(f"## Sección {i}" for i in range(5000))
+        html, headings = render_markdown(source)
+        result = insert_automatic_toc(html, number_headings=True, headings=headings)
+        self.assertEqual(len(headings), 5000)
+        self.assertTrue('<h2 id="seccin-4999">5000 Sección 4999</h2>' in result)
+
+    def test_split_sections(self):
+        html, headings = render_markdown("# A\n\ntexto\n\n## A.1\n\n# B\n\nmás\n\n# C\n\nfin\n")
+        html = insert_automatic_toc(html, headings=headings)
+        bounds = split_html_sections(html, 1)
+        chunks = [html[start:end] for start, end in bounds]
+        # Solo se corta en los headings de primer nivel y no se pierde contenido
+        self.assertEqual("".join(chunks), html)
+        self.assertEqual([chunk[:12] for chunk in chunks], ['<h1 id="a">A', '<h1 id="b">B', '<h1 id="c">C'])
+        self.assertIn('href="#c"', chunks[0])
+        self.assertEqual(split_html_sections(html, len(html)), [(0, len(html))])
+
+    def test_split_sections_outside_open_elements(self):
+        source = ("# A\n\ntexto\n\n<div class=\"nota\" markdown=\"1\">\n\n# Dentro\n\n![x](a.png)\n\n</div>\n\n"
+                  "!!! note \"Aviso\"\n    # En la admonición\n\n# B\n\nfin\n")
+        html, headings = render_markdown(source, ['md_in_html', 'admonition'])
+        html = insert_automatic_toc(html, headings=headings)
+        bounds = split_html_sections(html, 1)
+        chunks = [html[start:end] for start, end in bounds]
+        self.assertEqual("".join(chunks), html)
+        # La TOC, el <div> y la admonición quedan enteros; solo se corta antes de B
+        self.assertEqual(len(chunks), 2)
+        self.assertTrue(chunks[1].startswith('<h1 id="b">B'))
+        for chunk in chunks:
+            self.assertEqual(chunk.count('<div'), chunk.count('</div>'))
+
+
+if __name__ == "__main__":
+    unittest.main()
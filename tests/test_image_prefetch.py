@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la descarga concurrente de imágenes remotas contra un servidor HTTP local
+"""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PIL import Image
+
+from core.cache import AssetCache
+from core.image_processor import ImageProcessor, find_remote_images, get_http_session, process_html_images
+
+
+def _png_bytes() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(0.05)
+        with server.lock:
+            server.active -= 1
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = server.png
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestImagePrefetch(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.png = _png_bytes()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def test_find_remote_images_dedupes(self):
+        html = (f'<img src="{self.base_url}/a.png"><img src="local.png">'
+                f'<img src="{self.base_url}/a.png"><img src="{self.base_url}/b.png">')
+        self.assertEqual(find_remote_images(html), [f"{self.base_url}/a.png", f"{self.base_url}/b.png"])
+
+    def test_prefetch_concurrent_with_host_limit(self):
+        urls = [f"{self.base_url}/img{i}.png" for i in range(8)] * 2
+        processor = ImageProcessor()
+        downloaded = processor.prefetch_remote_images(urls, self.root, max_workers=8, per_host=3)
+        self.assertEqual(len(downloaded), 8)
+        self.assertEqual(len(self.server.requests), 8)
+        self.assertGreater(self.server.max_active, 1)
+        self.assertLessEqual(self.server.max_active, 3)
+        self.assertTrue(all(path.exists() for path in downloaded.values()))
+
+    def test_process_html_images_rewrites_tags(self):
+        html = f'<p><img alt="a" src="{self.base_url}/a.png"><img alt="x" src="{self.base_url}/missing.png"></p>'
+        result = process_html_images(html, self.root)
+        self.assertRegex(result, r'src="processed_images/a_[0-9a-f]{12}_[0-9a-f]{16}\.png"')
+        # Las imágenes que no se pueden descargar conservan su URL
+        self.assertIn(f'src="{self.base_url}/missing.png"', result)
+        self.assertEqual(sorted(self.server.requests), ["/a.png", "/missing.png"])
+
+    def test_asset_cache_avoids_network(self):
+        cache = AssetCache(self.root / "assets", ttl_seconds=3600)
+        html = f'<img src="{self.base_url}/a.png"><img src="{self.base_url}/logo">'
+        for _ in range(3):
+            process_html_images(html, self.root, asset_cache=cache)
+        self.assertEqual(sorted(self.server.requests), ["/a.png", "/logo"])
+        self.assertTrue(list((self.root / "assets").glob("*/*.png")))
+
+    def test_asset_cache_revalidates_and_offline(self):
+        url = f"{self.base_url}/a.png"
+        cache = AssetCache(self.root / "assets", ttl_seconds=0)
+        first = cache.fetch(url, get_http_session())
+        # Con el TTL vencido se revalida con If-None-Match y el servidor responde 304
+        self.assertEqual(cache.fetch(url, get_http_session()), first)
+        self.assertEqual(len(self.server.requests), 2)
+
+        offline = AssetCache(self.root / "assets", ttl_seconds=0, offline=True)
+        self.assertEqual(offline.fetch(url, get_http_session()), first)
+        self.assertIsNone(offline.fetch(f"{self.base_url}/b.png", get_http_session()))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_asset_cache_lru_eviction(self):
+        cache = AssetCache(self.root / "assets", max_size_mb=0)
+        cache.max_bytes = len(self.server.png) * 2
+        paths = [cache.fetch(f"{self.base_url}/img{i}.png", get_http_session()) for i in range(4)]
+        self.assertEqual([path.exists() for path in paths], [False, False, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los manifiestos de dependencias de la compilación incremental
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.manifest import MANIFEST_DIR, DependencyManifest
+
+SETTINGS = {"template": "default", "options": {"toc": False}}
+
+
+class TestDependencyManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.markdown = self.root / "doc.md"
+        self.markdown.write_text("# Doc\n\n![Foto](foto.png)\n", encoding="utf-8")
+        self.image = self.root / "foto.png"
+        self.image.write_bytes(b"png-1")
+        self.pdf = self.root / "salida" / "doc.pdf"
+        self.pdf.parent.mkdir()
+        self.pdf.write_bytes(b"%PDF")
+        self.manifest = DependencyManifest(self.pdf)
+        self.manifest.save([self.markdown, self.image], SETTINGS)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _touch(self, path: Path, content: bytes):
+        # Fecha distinta aunque el sistema de archivos tenga poca resolución
+        path.write_bytes(content)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_up_to_date(self):
+        self.assertEqual(self.manifest.path, self.pdf.parent / MANIFEST_DIR / "doc.pdf.json")
+        self.assertTrue(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+        # Misma fecha nueva pero mismo contenido: sigue al día
+        self._touch(self.image, b"png-1")
+        self.assertTrue(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+        self.assertFalse(DependencyManifest(self.pdf).is_up_to_date(dict(SETTINGS, template="dark")))
+
+    def test_changed_input(self):
+        self._touch(self.markdown, b"# Doc editado\n")
+        self.assertFalse(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+
+    def test_changed_asset(self):
+        self._touch(self.image, b"png-2")
+        self.assertFalse(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+
+    def test_missing_asset(self):
+        self.image.unlink()
+        self.assertFalse(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+
+        # Una imagen que no existía al compilar solo invalida el PDF cuando aparece
+        self.manifest.save([self.markdown, self.image], SETTINGS)
+        self.assertTrue(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+        self.image.write_bytes(b"png-3")
+        self.assertFalse(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+
+    def test_missing_output(self):
+        self.pdf.unlink()
+        self.assertFalse(DependencyManifest(self.pdf).is_up_to_date(SETTINGS))
+
+
+if __name__ == "__main__":
+    unittest.main()
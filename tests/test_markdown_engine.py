@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la reutilización de motores Markdown entre documentos
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.renderer import get_markdown_engine, render_markdown
+
+ABBREVIATIONS = "El HTML se genera con CSS.\n\n*[HTML]: Hyper Text Markup Language\n*[CSS]: Cascading Style Sheets\n"
+FOOTNOTES = "Primera[^a] y segunda[^b].\n\n[^a]: Nota A.\n[^b]: Nota B.\n"
+
+
+class TestMarkdownEngine(unittest.TestCase):
+    def test_engine_is_reused(self):
+        engine = get_markdown_engine()
+        render_markdown("# Uno\n")
+        self.assertIs(get_markdown_engine(), engine)
+        self.assertIsNot(get_markdown_engine(['extra']), engine)
+
+    def test_abbreviations_do_not_leak(self):
+        html, _ = render_markdown(ABBREVIATIONS)
+        self.assertIn('<abbr title="Hyper Text Markup Language">HTML</abbr>', html)
+        self.assertIn('<abbr title="Cascading Style Sheets">CSS</abbr>', html)
+
+        html, _ = render_markdown("El HTML se genera con CSS.\n")
+        self.assertEqual(html, "<p>El HTML se genera con CSS.</p>")
+        # El documento con abreviaturas vuelve a dar el mismo resultado
+        self.assertEqual(render_markdown(ABBREVIATIONS)[0], render_markdown(ABBREVIATIONS)[0])
+
+    def test_footnote_numbering_restarts(self):
+        first, _ = render_markdown(FOOTNOTES)
+        render_markdown("Otra[^x].\n\n[^x]: Nota X.\n")
+        second, _ = render_markdown(FOOTNOTES)
+        self.assertEqual(first, second)
+        self.assertIn('href="#fn:a"', second)
+        self.assertIn('>1</a></sup>', second)
+        self.assertNotIn('Nota X', second)
+
+    def test_heading_anchors_restart(self):
+        render_markdown("# Introducción\n\n## Uso\n")
+        html, headings = render_markdown("# Introducción\n\n## Uso\n")
+        self.assertEqual([h.anchor for h in headings], ["introduccin", "uso"])
+        self.assertIn('<h2 id="uso">', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
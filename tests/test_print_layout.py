@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pruebas del ajuste de imágenes a la resolución de impresión
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from PIL import Image
+
+from core.image_processor import process_html_images
+from core.print_layout import PrintLayout, css_length_to_inches, page_size_inches
+
+
+class TestPrintLayout(unittest.TestCase):
+    def test_page_geometry(self):
+        self.assertAlmostEqual(page_size_inches("A4")[0], 8.2677, places=3)
+        self.assertEqual(page_size_inches("letter landscape"), (11.0, 8.5))
+        layout = PrintLayout.from_page("letter", "1in 0.5in", 300)
+        self.assertEqual((layout.content_width_in, layout.content_height_in), (7.5, 9.0))
+        self.assertAlmostEqual(css_length_to_inches("50%", 6.0), 3.0)
+        self.assertRaises(ValueError, PrintLayout.from_page, "tabloide", "2cm", 300)
+
+    def test_target_size(self):
+        layout = PrintLayout.from_page("letter", "0.5in", 200)
+        # Ancho natural mayor que la caja: se limita al ancho de contenido (7.5in)
+        self.assertEqual(layout.target_size((4000, 2000)), (1500, 750))
+        # Ancho CSS explícito
+        self.assertEqual(layout.target_size((4000, 2000), "50%"), (750, 375))
+        self.assertEqual(layout.target_size((4000, 2000), "2in"), (400, 200))
+        # Nunca se amplía
+        self.assertEqual(layout.target_size((600, 400)), (600, 400))
+
+
+class TestPrintImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.layout = PrintLayout.from_page("letter", "0.5in", 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _processed(self, html: str) -> Image.Image:
+        result = process_html_images(html, self.root, layout=self.layout)
+        src = result.split('src="', 1)[1].split('"', 1)[0]
+        return Image.open(self.root / src)
+
+    def test_flat_graphic_becomes_png(self):
+        Image.new("RGBA", (3000, 1000), (255, 0, 0, 128)).save(self.root / "diagrama.png")
+        with self._processed('<img src="diagrama.png">') as img:
+            self.assertEqual((img.format, img.size), ("PNG", (750, 250)))
+            self.assertEqual(img.mode, "RGBA")
+
+    def test_photo_becomes_jpeg(self):
+        Image.frombytes("RGB", (1200, 800), os.urandom(1200 * 800 * 3)).save(self.root / "foto.png")
+        with self._processed('<img src="foto.png" width="300">') as img:
+            self.assertEqual((img.format, img.size), ("JPEG", (312, 208)))
+
+    def test_image_that_fits_is_left_untouched(self):
+        Image.frombytes("RGB", (400, 300), os.urandom(400 * 300 * 3)).save(self.root / "captura.png")
+        layout = PrintLayout.from_page("A4", "2cm", 300)
+        self.assertIn('src="captura.png"', process_html_images('<img src="captura.png">', self.root, layout=layout))
+        self.assertFalse((self.root / "processed_images").exists())
+
+        # Otro formato sí se convierte, aunque no haya que reducirla
+        Image.new("RGB", (400, 300), "red").save(self.root / "grafico.gif")
+        result = process_html_images('<img src="grafico.gif">', self.root, layout=layout)
+        self.assertRegex(result, r'src="processed_images/grafico_[0-9a-f]+\.png"')
+
+
+if __name__ == "__main__":
+    unittest.main()
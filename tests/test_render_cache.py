@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la caché de renderizado direccionada por contenido
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.cache import RenderCache, hash_key
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.cache = RenderCache(self.root / "cache", max_size_mb=1)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _pdf(self, name: str, size: int) -> Path:
+        path = self.root / name
+        path.write_bytes(b"%PDF" + b"x" * (size - 4))
+        return path
+
+    def test_hash_key_depends_on_every_part(self):
+        base = hash_key("# Doc", "body {}", {"page_size": "A4"}, {"toc": False})
+        self.assertEqual(base, hash_key("# Doc", "body {}", {"page_size": "A4"}, {"toc": False}))
+        self.assertNotEqual(base, hash_key("# Doc", "body {}", {"page_size": "A4"}, {"toc": True}))
+        self.assertNotEqual(base, hash_key("# Doc", "body { color: red }", {"page_size": "A4"}, {"toc": False}))
+
+    def test_miss_then_hit(self):
+        key = hash_key("documento")
+        destination = self.root / "out" / "doc.pdf"
+        self.assertFalse(self.cache.get(key, destination))
+
+        self.cache.put(key, self._pdf("doc.pdf", 100))
+        self.assertTrue(self.cache.get(key, destination))
+        self.assertEqual(destination.read_bytes()[:4], b"%PDF")
+
+    def test_hit_replaces_existing_output_without_touching_entry(self):
+        key = hash_key("documento")
+        self.cache.put(key, self._pdf("doc.pdf", 100))
+        destination = self.root / "doc_out.pdf"
+        self.assertTrue(self.cache.get(key, destination))
+
+        # Un nuevo render borra la salida antes de escribir: la entrada debe seguir intacta
+        destination.unlink()
+        destination.write_bytes(b"otro")
+        self.assertTrue(self.cache.get(key, self.root / "copia.pdf"))
+        self.assertEqual(len((self.root / "copia.pdf").read_bytes()), 100)
+
+    def test_lru_eviction_keeps_recently_used(self):
+        old_key, used_key, new_key = hash_key(1), hash_key(2), hash_key(3)
+        self.cache.put(old_key, self._pdf("a.pdf", 400 * 1024))
+        self.cache.put(used_key, self._pdf("b.pdf", 400 * 1024))
+        past = time.time() - 60
+        for key in (old_key, used_key):
+            os.utime(self.cache._entry_path(key), (past, past))
+        self.assertTrue(self.cache.get(used_key, self.root / "b_out.pdf"))
+
+        self.cache.put(new_key, self._pdf("c.pdf", 400 * 1024))
+        self.assertFalse(self.cache._entry_path(old_key).exists())
+        self.assertTrue(self.cache._entry_path(used_key).exists())
+        self.assertTrue(self.cache._entry_path(new_key).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los trabajos del modo servidor (con WeasyPrint sustituido)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+from PIL import Image
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from weasyprint_stub import FakeHTML, patch_exporter
+
+from cli import server
+from core.config_manager import ConfigManager
+
+
+class TestParseJob(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.markdown_file = Path(self.tmp.name) / "doc.md"
+        self.markdown_file.write_text("# Doc\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_markdown_path_or_markdown(self):
+        job = server.parse_job({"markdown_path": str(self.markdown_file), "options": {"toc": 1}})
+        self.assertEqual(job["markdown_path"], str(self.markdown_file))
+        self.assertEqual(job["options"], {"toc": True})
+        job = server.parse_job({"markdown": "# Texto", "name": "../../informe.md"})
+        self.assertEqual((job["markdown"], job["name"]), ("# Texto", "informe"))
+
+        for payload in ({}, {"markdown_path": str(self.markdown_file), "markdown": "# Texto"}):
+            with self.assertRaisesRegex(ValueError, "exactamente uno"):
+                server.parse_job(payload)
+        with self.assertRaisesRegex(ValueError, "no existe"):
+            server.parse_job({"markdown_path": str(self.markdown_file.with_name("otro.md"))})
+
+    def test_unknown_option(self):
+        with self.assertRaisesRegex(ValueError, "Opción desconocida: output_dir"):
+            server.parse_job({"markdown": "# Texto", "options": {"output_dir": "/tmp"}})
+
+    def test_non_object_body(self):
+        for payload in (["# Texto"], "# Texto", None):
+            with self.assertRaisesRegex(ValueError, "objeto JSON"):
+                server.parse_job(payload)
+
+
+class TestRunJob(unittest.TestCase):
+    def setUp(self):
+        patch_exporter(self)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name).resolve()
+        self.input_dir = self.root / "entrada"
+        self.input_dir.mkdir()
+        config_file = self.root / "config.yaml"
+        config_file.write_text(yaml.safe_dump({
+            'default': {'input_dir': str(self.input_dir), 'output_dir': str(self.root / "salida"),
+                        'style_file': None, 'page_size': 'A4', 'margins': '2cm', 'font_family': 'Arial',
+                        'language': 'es', 'verbose': False},
+            'cache': {'enabled': False, 'assets_enabled': False},
+            'output': {'optimize_images': False},
+        }), encoding="utf-8")
+        for name, value in (('_config_manager', ConfigManager(str(config_file))), ('_converters', {})):
+            patcher = mock.patch.object(server, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _job(self, **payload):
+        return server.parse_job(payload)
+
+    def test_inline_markdown_resolves_images_against_base_dir(self):
+        assets = self.root / "recursos"
+        assets.mkdir()
+        Image.new("RGB", (4, 4), "blue").save(assets / "foto.png")
+        Image.new("RGB", (4, 4), "red").save(self.input_dir / "foto.png")
+
+        result = server._run_job(self._job(markdown="# Texto\n\n![Foto](foto.png)\n", name="informe",
+                                           base_dir=str(assets), options={"download_remote_images": True}))
+        self.assertTrue(result["success"])
+        self.assertTrue(result["pdf"].startswith(b"%PDF"))
+        _html, base_url, _stylesheets = FakeHTML.rendered[-1]
+        self.assertEqual(base_url, assets)
+        # La imagen procesada sale de base_dir, no de la entrada del convertidor ni del temporal
+        self.assertEqual(len(list((assets / "processed_images").glob("foto_*.png"))), 1)
+        self.assertFalse((self.input_dir / "processed_images").exists())
+
+    def test_converter_input_dir_unchanged(self):
+        markdown_file = self.root / "otro" / "doc.md"
+        markdown_file.parent.mkdir()
+        markdown_file.write_text("# Doc\n", encoding="utf-8")
+        output_path = self.root / "doc.pdf"
+
+        result = server._run_job(self._job(markdown_path=str(markdown_file), output_path=str(output_path)))
+        self.assertEqual(result, {'success': True, 'output_path': str(output_path)})
+        self.assertEqual(FakeHTML.rendered[-1][1], markdown_file.parent)
+        result = server._run_job(self._job(markdown="# Texto\n", base_dir=str(self.root)))
+        self.assertTrue(result["success"])
+        converter = server._converters[None]
+        self.assertEqual(converter.input_dir, Path(converter.config.input_dir))
+        self.assertEqual(converter.input_dir, self.input_dir)
+        # Sin --incremental el servidor no deja manifiestos junto al PDF
+        self.assertFalse((self.root / ".deps").exists())
+
+    def test_failed_job(self):
+        markdown_file = self.root / "vacio.md"
+        markdown_file.write_text("", encoding="utf-8")
+        result = server._run_job(self._job(markdown_path=str(markdown_file)))
+        self.assertEqual(result, {'success': False, 'error': "No se pudo convertir vacio.md"})
+
+
+if __name__ == "__main__":
+    unittest.main()
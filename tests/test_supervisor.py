@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Pruebas del pool de procesos supervisado (límites de memoria y de tiempo)
+"""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.supervisor import ResourceLimitError, SupervisedPool, process_rss
+
+
+def _square(value):
+    return os.getpid(), value * value
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _allocate(megabytes):
+    block = bytearray(megabytes * 1024 * 1024)
+    time.sleep(5)
+    return len(block)
+
+
+def _crash(_):
+    os._exit(3)
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+class TestSupervisedPool(unittest.TestCase):
+    def test_results_and_exceptions(self):
+        with SupervisedPool(2) as pool:
+            futures = [pool.submit(_square, i) for i in range(6)]
+            self.assertEqual([f.result()[1] for f in futures], [i * i for i in range(6)])
+            with self.assertRaisesRegex(ValueError, "roto"):
+                pool.submit(_fail, "roto").result()
+
+    def test_timeout_kills_and_recycles(self):
+        with SupervisedPool(1, timeout_seconds=0.5) as pool:
+            slow = pool.submit(_sleep, 10)
+            after = pool.submit(_square, 3)
+            start = time.monotonic()
+            with self.assertRaises(ResourceLimitError) as context:
+                slow.result()
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertIn("tiempo límite", context.exception.reason)
+            # El trabajo siguiente se ejecuta en un proceso nuevo
+            self.assertEqual(after.result()[1], 9)
+            self.assertEqual(pool.recycled, 1)
+
+    @unittest.skipIf(process_rss(os.getpid()) is None, "sin /proc para medir la memoria")
+    def test_memory_limit(self):
+        with SupervisedPool(1, memory_limit_mb=150) as pool:
+            with self.assertRaises(ResourceLimitError) as context:
+                pool.submit(_allocate, 300).result(timeout=10)
+            self.assertIn("memoria", context.exception.reason)
+            self.assertEqual(pool.submit(_square, 2).result()[1], 4)
+
+    def test_crashed_worker(self):
+        with SupervisedPool(1) as pool:
+            with self.assertRaises(ResourceLimitError) as context:
+                pool.submit(_crash, None).result()
+            self.assertIn("terminó inesperadamente", context.exception.reason)
+            self.assertEqual(pool.submit(_square, 5).result()[1], 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Pruebas del motor de reglas del validador (tokenizado en una sola pasada)
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.config_manager import ValidationConfig
+from core.document import Document
+from core.validation_rules import (CODE, FRONT_MATTER, HTML, TEXT, DocumentContext, LineIndex, Reference, Rule,
+                                   _IMAGE_RE, invalid_characters_pattern, scan_invalid_characters, tokenize)
+from core.validator import MarkdownValidator
+
+DOCUMENT = """---
+title: Prueba
+date: 19/12/2024
+---
+# Título
+
+```python
+# comentario, no es un heading
+-sin espacio
+```
+
+## Sección
+-item
+## Sección
+"""
+
+
+class TodoRule(Rule):
+    """Regla de ejemplo: marca los TODO del texto"""
+    blocks = frozenset({TEXT})
+
+    def check_line(self, line, ctx):
+        if 'TODO' in line.text:
+            self.issue(type="todo", message="TODO pendiente", line=line.number)
+
+
+class TestValidationRules(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "doc.md"
+        self.path.write_text(DOCUMENT, encoding="utf-8")
+        self.validator = MarkdownValidator(ValidationConfig(
+            check_broken_links=True,
+            check_missing_images=True,
+            check_empty_files=True,
+            max_file_size_mb=10
+        ))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tokenize_block_context(self):
+        lines = tokenize(DOCUMENT)
+        self.assertEqual([line.block for line in lines[:4]], [FRONT_MATTER] * 4)
+        self.assertEqual([line.block for line in lines[6:10]], [CODE] * 4)
+        self.assertEqual([(line.number, line.heading_text) for line in lines if line.heading_level],
+                         [(5, "Título"), (12, "Sección"), (14, "Sección")])
+        # Un '---' sin cerrar no es front matter
+        self.assertEqual(tokenize("---\n# A\n")[0].block, TEXT)
+
+    def test_single_pass_results(self):
+        result = self.validator.validate_file(self.path)
+        self.assertEqual((result.line_count, result.heading_count, result.metadata_present), (14, 3, True))
+        types = [issue.type for issue in result.issues]
+        self.assertIn("duplicate_headings", types)
+        self.assertIn("invalid_date_format", types)
+        # El bloque de código no produce avisos de listas
+        self.assertEqual([i.line for i in result.issues if i.type == "list_no_space"], [13])
+
+    def test_indented_code_and_html(self):
+        source = ("Texto\n\n    codigo\tcon tab\n\n    más código\n\n- item\n\n    continuación\n\n"
+                  "<div>\n\ttabla\n</div>\n\n<!--\n# no es título\n-->\n# Título\n")
+        blocks = [line.block for line in tokenize(source)]
+        self.assertEqual(blocks[2], CODE)
+        self.assertEqual(blocks[4], CODE)
+        self.assertEqual(blocks[8], TEXT)
+        self.assertEqual(blocks[10:13], [HTML] * 3)
+        self.assertEqual(blocks[14:17], [HTML] * 3)
+        self.assertEqual(blocks[17], TEXT)
+
+    def test_cap_and_aggregation(self):
+        self.path.write_text("# Título\n\n" + "x" * 130 + "\n" * 2 + ("y" * 130 + "\n") * 9, encoding="utf-8")
+        self.validator.config.max_issues_per_type = 3
+        long_lines = [i for i in self.validator.validate_file(self.path).issues if i.type == "line_too_long"]
+        self.assertEqual(len(long_lines), 4)
+        self.assertIn("7 problemas más", long_lines[-1].message)
+
+        self.validator.config.aggregate_issues = True
+        long_lines = [i for i in self.validator.validate_file(self.path).issues if i.type == "line_too_long"]
+        self.assertEqual(len(long_lines), 1)
+        self.assertEqual(long_lines[0].line, 3)
+        self.assertTrue(long_lines[0].message.startswith("🔁 10 problemas"))
+        self.assertTrue(long_lines[0].context.endswith("Líneas: 3, 5, 6, 7, 8, 9, 10, 11, 12, 13"))
+
+    def test_emoji_issues_with_cap_and_aggregation(self):
+        self.path.write_text("# 😀 Uno\n\n# 😀 Dos\n\n# 😀 Tres\n\n" + "🎉" * 20 + "\n", encoding="utf-8")
+
+        def emoji_issues():
+            return [(i.type, i.message) for i in self.validator.validate_file(self.path).issues
+                    if i.type in ("emoji_in_title", "too_many_emojis")]
+
+        self.validator.config.max_issues_per_type = 1
+        self.assertEqual(emoji_issues(), [
+            ("emoji_in_title", "📝 Emoji encontrado en título (línea 1)"),
+            ("too_many_emojis", "🎭 Demasiados emojis encontrados (23)"),
+            ("emoji_in_title", "🔁 2 problemas más de este tipo omitidos (máximo 1 por archivo)"),
+        ])
+
+        self.validator.config.aggregate_issues = True
+        self.assertEqual(emoji_issues(), [
+            ("emoji_in_title", "🔁 3 problemas de este tipo; ejemplo: 📝 Emoji encontrado en título (línea 1)"),
+            ("too_many_emojis", "🎭 Demasiados emojis encontrados (23)"),
+        ])
+
+    def test_invalid_characters(self):
+        pattern = invalid_characters_pattern("áéíóúñ")
+        self.assertEqual(scan_invalid_characters("año “dicho” — fin”", pattern),
+                         {"“": [4], "”": [10, 17], "—": [12]})
+        self.assertEqual(scan_invalid_characters("canción", pattern), {})
+
+        self.path.write_text("# Título\n\nTexto “citado” ok\n\n```\n“en código”\n```\nOtra → línea\n",
+                             encoding="utf-8")
+        issues = [i for i in self.validator.validate_file(self.path).issues if i.type == "invalid_characters"]
+        self.assertEqual([(i.line, i.column, i.context) for i in issues],
+                         [(3, 7, "Caracteres: “”"), (8, 6, "Caracteres: →")])
+
+        self.validator.config.allowed_characters = "áéíóúñüÁÉÍÓÚÑÜ“”→"
+        validator = MarkdownValidator(self.validator.config)
+        self.assertFalse([i for i in validator.validate_file(self.path).issues if i.type == "invalid_characters"])
+
+    def test_line_index(self):
+        index = LineIndex.from_content("ab\r\ncd\n\nef")
+        self.assertEqual([index.position(offset) for offset in (0, 1, 4, 7, 8)],
+                         [(1, 1), (1, 2), (2, 1), (3, 1), (4, 1)])
+
+    def test_exact_positions(self):
+        self.path.write_text(
+            "# Título\n\nVer falta.png antes de la imagen.\n\n"
+            "Texto ![Falta](falta.png) y [roto](nada.md)\n"
+            "[enlace\nen dos líneas](http://ejemplo.com)\n",
+            encoding="utf-8"
+        )
+        result = self.validator.validate_file(self.path)
+        positions = {issue.code or issue.type: (issue.line, issue.column) for issue in result.issues}
+        self.assertEqual(positions["IMG_MISSING"], (5, 7))
+        self.assertEqual(positions["E004"], (5, 29))
+        self.assertEqual(positions["E017"], (6, 1))
+
+    def test_links_and_images_collected_once(self):
+        self.path.write_text("# Título\n\n[a](a.md) ![Logo](logo.png)\n\n```\n[b](b.md)\n```\n"
+                             "[enlace\nlargo](http://ejemplo.com)\n", encoding="utf-8")
+        with mock.patch.object(DocumentContext, 'references', autospec=True,
+                               side_effect=DocumentContext.references) as references:
+            result = self.validator.validate_file(self.path)
+        self.assertEqual(references.call_count, 2)
+        self.assertEqual((result.link_count, result.image_count), (3, 1))
+        self.assertEqual({i.code for i in result.issues if i.code in ("E004", "E017", "IMG_MISSING")},
+                         {"E004", "E017", "IMG_MISSING"})
+
+        # Sin las reglas de enlaces e imágenes las estadísticas salen de la misma lista
+        self.validator.config.check_broken_links = False
+        self.validator.config.check_missing_images = False
+        result = self.validator.validate_file(self.path)
+        self.assertEqual((result.link_count, result.image_count), (3, 1))
+        self.assertFalse([i for i in result.issues if i.code in ("E004", "E017", "IMG_MISSING")])
+
+        ctx = DocumentContext(self.path, self.path.read_text(encoding="utf-8"))
+        ctx.lines = tokenize(ctx.content)
+        ctx.index = LineIndex([line.offset for line in ctx.lines])
+        self.assertEqual(ctx.references(_IMAGE_RE), [Reference("Logo", "logo.png", 3, 11)])
+
+    def test_validate_document_matches_file(self):
+        self.path.write_bytes(DOCUMENT.replace("\n", "\r\n").encode("utf-8"))
+        from_file = self.validator.validate_file(self.path)
+        from_document = self.validator.validate_document(Document.load(self.path))
+        self.assertEqual(from_document, from_file)
+
+        self.path.write_text("", encoding="utf-8")
+        result = self.validator.validate_document(Document.load(self.path))
+        self.assertFalse(result.valid)
+        self.assertIn("empty_file", [issue.type for issue in result.issues])
+
+    def test_register_rule(self):
+        self.path.write_text("# Título\n\nTODO: revisar\n\n```\nTODO en código\n```\n", encoding="utf-8")
+        self.validator.register_rule(TodoRule)
+        result = self.validator.validate_file(self.path)
+        self.assertEqual([i.line for i in result.issues if i.type == "todo"], [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la validación en paralelo y de las cachés de stat() y SVG
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from core.config_manager import ValidationConfig
+from core.validator import MarkdownValidator, StatCache
+
+
+class TestValidatorParallel(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.config = ValidationConfig(
+            check_broken_links=True,
+            check_missing_images=True,
+            check_empty_files=True,
+            max_file_size_mb=10
+        )
+        (self.root / "diagrama.svg").write_text('<svg width="10"></svg>', encoding="utf-8")
+        (self.root / "foto.png").write_bytes(b"png")
+        for i in range(12):
+            (self.root / f"doc{i:02d}.md").write_text(
+                f"# Documento {i}\n\n![Diagrama](diagrama.svg)\n![Foto](foto.png)\n\n"
+                f"[Otro](doc{(i + 1) % 12:02d}.md) [Roto](falta{i}.md)\n",
+                encoding="utf-8"
+            )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_matches_serial(self):
+        serial = MarkdownValidator(self.config).validate_directory(self.root, workers=1)
+        parallel = MarkdownValidator(self.config).validate_directory(self.root, workers=4)
+        self.assertEqual(list(parallel), sorted(parallel))
+        self.assertEqual(list(parallel), list(serial))
+        for path in serial:
+            self.assertEqual(parallel[path], serial[path])
+        self.assertTrue(all(not r.valid for r in parallel.values()))
+
+    def test_shared_assets_checked_once(self):
+        validator = MarkdownValidator(self.config)
+        with mock.patch("core.validator.os.stat", wraps=os.stat) as stat, \
+                mock.patch.object(validator, "_check_svg_file", wraps=validator._check_svg_file) as check_svg:
+            validator.validate_directory(self.root, workers=1)
+        stated = [str(call.args[0]) for call in stat.call_args_list]
+        self.assertEqual(stated.count(str(self.root / "foto.png")), 1)
+        self.assertEqual(check_svg.call_count, 1)
+
+    def test_stat_cache(self):
+        cache = StatCache()
+        self.assertTrue(cache.exists(self.root / "foto.png"))
+        self.assertIs(cache.stat(self.root / "foto.png"), cache.stat(self.root / "." / "foto.png"))
+        self.assertFalse(cache.exists(self.root / "nada.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
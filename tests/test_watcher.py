@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la vigilancia de cambios del modo --watch
+"""
+
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+from PIL import Image
+
+# Agregar el directorio actual al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent))
+
+from weasyprint_stub import patch_exporter
+
+from cli.md_to_pdf_converter import MarkdownToPDFConverter
+from cli.watch import WatchSession
+from core.config_manager import ConfigManager
+from core.watcher import InotifyWatcher, PollingWatcher, create_watcher, debounced_changes
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name).resolve()
+        self.input_dir = self.root / "entrada"
+        (self.input_dir / "img").mkdir(parents=True)
+        (self.input_dir / ".cache").mkdir()
+        self.style_dir = self.root / "style"
+        self.style_dir.mkdir()
+        (self.input_dir / "doc.md").write_text("# Doc\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _check_backend(self, watcher):
+        try:
+            self.assertEqual(watcher.read(0.3), set())
+            (self.input_dir / "doc.md").write_text("# Doc 2\n", encoding="utf-8")
+            (self.input_dir / "img" / "a.png").write_bytes(b"png")
+            (self.input_dir / ".cache" / "oculto").write_bytes(b"x")
+            (self.style_dir / "light.css").write_text("body {}", encoding="utf-8")
+            changed = set()
+            deadline = time.monotonic() + 3
+            while len(changed) < 3 and time.monotonic() < deadline:
+                changed |= watcher.read(0.5)
+            self.assertEqual(changed, {self.input_dir / "doc.md", self.input_dir / "img" / "a.png",
+                                       self.style_dir / "light.css"})
+        finally:
+            watcher.close()
+
+    def test_polling(self):
+        self._check_backend(PollingWatcher([self.input_dir, self.style_dir], interval=0.1))
+
+    def test_inotify(self):
+        try:
+            watcher = InotifyWatcher([self.input_dir, self.style_dir])
+        except OSError:
+            self.skipTest("inotify no disponible")
+        self._check_backend(watcher)
+
+    def _check_symlink_cycle(self, make_watcher):
+        try:
+            (self.input_dir / "img" / "bucle").symlink_to(self.input_dir, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            self.skipTest("enlaces simbólicos no disponibles")
+        watcher = make_watcher()
+        try:
+            (self.input_dir / "doc.md").write_text("# Doc 2\n", encoding="utf-8")
+            changed = set()
+            deadline = time.monotonic() + 3
+            while not changed and time.monotonic() < deadline:
+                changed |= watcher.read(0.5)
+            # Cada archivo aparece una vez, por su ruta real, no por cada vuelta del ciclo
+            self.assertEqual(changed, {self.input_dir / "doc.md"})
+        finally:
+            watcher.close()
+
+    def test_polling_symlink_cycle(self):
+        self._check_symlink_cycle(lambda: PollingWatcher([self.input_dir], interval=0.1))
+
+    def test_inotify_symlink_cycle(self):
+        def make_watcher():
+            try:
+                return InotifyWatcher([self.input_dir])
+            except OSError:
+                self.skipTest("inotify no disponible")
+        self._check_symlink_cycle(make_watcher)
+
+    def test_debounce_groups_bursts(self):
+        watcher = create_watcher([self.input_dir])
+
+        def burst():
+            for i in range(5):
+                (self.input_dir / f"nota{i}.md").write_text("texto", encoding="utf-8")
+                time.sleep(0.05)
+
+        threading.Timer(0.2, burst).start()
+        try:
+            changes = next(debounced_changes(watcher, delay=0.3, idle_timeout=0.2))
+        finally:
+            watcher.close()
+        self.assertEqual(changes, {self.input_dir / f"nota{i}.md" for i in range(5)})
+
+
+
+class TestWatchSession(unittest.TestCase):
+    def setUp(self):
+        patch_exporter(self)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name).resolve()
+        self.input_dir = self.root / "entrada"
+        (self.input_dir / "img").mkdir(parents=True)
+        self.style_file = self.root / "light.css"
+        self.style_file.write_text("body {}", encoding="utf-8")
+        self.config_file = self.root / "config.yaml"
+        self.config_file.write_text(yaml.safe_dump({
+            'default': {'input_dir': str(self.input_dir), 'output_dir': str(self.root / "salida"),
+                        'style_file': str(self.style_file), 'page_size': 'A4', 'margins': '2cm',
+                        'font_family': 'Arial', 'language': 'es', 'verbose': False},
+            'cache': {'enabled': False, 'assets_enabled': False},
+            'output': {'optimize_images': False},
+        }), encoding="utf-8")
+        for name in ("a.png", "b.png"):
+            Image.new("RGB", (4, 4), "red").save(self.input_dir / "img" / name)
+        # Imagen con sintaxis de referencia y ruta con espacios entre <>
+        self.doc_a = self._write("a.md", "# A\n\n![A][logo]\n\n[logo]: img/a.png\n")
+        self.doc_b = self._write("b.md", "# B\n\n![B](<img/b.png>)\n")
+        self.doc_c = self._write("c.md", "# C\n")
+        self.session = WatchSession(self._make_converter(), self._make_converter, self.config_file,
+                                    self._options(), html=True, pdf=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name: str, text: str) -> Path:
+        path = self.input_dir / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def _make_converter(self) -> MarkdownToPDFConverter:
+        config_manager = ConfigManager(str(self.config_file))
+        return MarkdownToPDFConverter(config_manager.get_conversion_config(), config_manager)
+
+    def _options(self) -> dict:
+        return {'toc': False, 'toc_levels': 3, 'number_headings': False, 'max_image_width': 800,
+                'max_image_height': 600, 'image_quality': 85, 'download_remote_images': False,
+                'embed_images': False}
+
+    def test_affected_by_rendered_images(self):
+        self.assertEqual(self.session.affected({self.input_dir / "img" / "a.png"}), ([self.doc_a], False))
+        self.assertEqual(self.session.affected({self.input_dir / "img" / "b.png"}), ([self.doc_b], False))
+        self.assertEqual(self.session.affected({self.doc_c}), ([self.doc_c], False))
+        all_files = [self.doc_a, self.doc_b, self.doc_c]
+        self.assertEqual(self.session.affected({self.style_file}), (all_files, False))
+        self.assertEqual(self.session.affected({self.config_file}), (all_files, True))
+
+        # El documento editado vuelve a renderizarse para conocer sus imágenes nuevas
+        self._write("c.md", "# C\n\n![A][a]\n\n[a]: img/a.png\n")
+        self.assertEqual(self.session.affected({self.input_dir / "img" / "a.png"}), ([self.doc_a, self.doc_c], False))
+
+    def test_reload(self):
+        old = self.session.converter
+        self.assertTrue(self.session.reload())
+        self.assertIsNot(self.session.converter, old)
+
+        current = self.session.converter
+        self.session.make_converter = mock.Mock(side_effect=ValueError("YAML inválido"))
+        with self.assertLogs("cli.watch", "ERROR"):
+            self.assertFalse(self.session.reload())
+        self.assertIs(self.session.converter, current)
+
+    def test_rebuild_writes_previews_before_pdfs(self):
+        converter = self.session.converter
+        order = []
+        write_html, export_document = converter._write_html, converter._export_document
+        with mock.patch.object(converter, '_write_html', side_effect=lambda document, *args: (
+                                   order.append(('html', document.path.name)), write_html(document, *args))), \
+             mock.patch.object(converter, '_export_document', side_effect=lambda document, *args: (
+                                   order.append(('pdf', document.path.name)), export_document(document, *args))):
+            results = self.session.rebuild({self.style_file})
+        self.assertEqual(results['success'], 3)
+        self.assertEqual(order, [('html', 'a.md'), ('html', 'b.md'), ('html', 'c.md'),
+                                 ('pdf', 'a.md'), ('pdf', 'b.md'), ('pdf', 'c.md')])
+        self.assertIsNone(self.session.rebuild({self.root / "otro.txt"}))
+
+    def test_rebuild_after_config_change_uses_new_converter(self):
+        old = self.session.converter
+        results = self.session.rebuild({self.config_file})
+        self.assertIsNot(self.session.converter, old)
+        self.assertEqual(results['total'], 3)
+        self.assertTrue((self.root / "salida" / "a.pdf").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Sustituto de WeasyPrint para las pruebas que pasan por el exportador
+
+WeasyPrint necesita Pango, que no siempre está instalado donde corren las pruebas.
+Al importar este módulo se registra un WeasyPrint mínimo solo si el real no se
+puede importar; patch_exporter() sustituye además las clases que usa
+core.exporter por versiones que registran cada llamada, tenga o no el sistema
+WeasyPrint instalado.
+
+Cada página "renderizada" es el HTML del documento o fragmento que la produjo, y
+el PDF escrito es el texto de sus páginas: las pruebas pueden comprobar qué se
+renderizó y con qué hojas de estilo.
+"""
+
+import shutil
+import sys
+import tempfile
+import types
+from pathlib import Path
+from unittest import mock
+
+
+class FakeFontConfiguration:
+    created = 0
+
+    def __init__(self):
+        FakeFontConfiguration.created += 1
+
+
+class FakeCSS:
+    created = []
+
+    def __init__(self, filename=None, string=None, font_config=None, **kwargs):
+        self.source = open(filename, encoding='utf-8').read() if filename else string
+        self.font_config = font_config
+        FakeCSS.created.append(self)
+
+
+class FakeDocument:
+    def __init__(self, pages):
+        self.pages = list(pages)
+
+    def copy(self, pages):
+        return FakeDocument(pages)
+
+    def write_pdf(self, target=None, **kwargs):
+        data = ("%PDF-stub\n" + "\n".join(page for page in self.pages)).encode('utf-8')
+        if target is None:
+            return data
+        with open(target, 'wb') as f:
+            f.write(data)
+
+
+class FakeHTML:
+    # (html, base_url, hojas de estilo) de cada documento renderizado
+    rendered = []
+
+    def __init__(self, string=None, base_url=None, **kwargs):
+        self.string = string
+        self.base_url = base_url
+
+    def render(self, stylesheets=None, font_config=None, **kwargs):
+        FakeHTML.rendered.append((self.string, self.base_url, list(stylesheets or [])))
+        return FakeDocument([self.string])
+
+    def write_pdf(self, target=None, stylesheets=None, font_config=None, **kwargs):
+        return self.render(stylesheets, font_config).write_pdf(target)
+
+
+def install():
+    """Registra el WeasyPrint mínimo si el real no se puede importar"""
+    try:
+        import weasyprint  # noqa: F401
+        return
+    except (ImportError, OSError):
+        pass
+    for name in [n for n in sys.modules if n == 'weasyprint' or n.startswith('weasyprint.')]:
+        del sys.modules[name]
+    weasyprint = types.ModuleType('weasyprint')
+    weasyprint.__version__ = 'stub'
+    weasyprint.CSS, weasyprint.HTML = FakeCSS, FakeHTML
+    text = types.ModuleType('weasyprint.text')
+    fonts = types.ModuleType('weasyprint.text.fonts')
+    fonts.FontConfiguration = FakeFontConfiguration
+    weasyprint.text, text.fonts = text, fonts
+    sys.modules.update({'weasyprint': weasyprint, 'weasyprint.text': text, 'weasyprint.text.fonts': fonts})
+
+
+def patch_exporter(testcase):
+    """Usa las clases de prueba en core.exporter durante el test y parte de un exportador nuevo"""
+    import core.exporter
+
+    FakeFontConfiguration.created = 0
+    FakeCSS.created = []
+    FakeHTML.rendered = []
+    for name, value in (('CSS', FakeCSS), ('HTML', FakeHTML), ('FontConfiguration', FakeFontConfiguration),
+                        ('_exporter', None)):
+        patcher = mock.patch.object(core.exporter, name, value)
+        patcher.start()
+        testcase.addCleanup(patcher.stop)
+
+
+
+def install_for_workers(testcase):
+    """Hace que los procesos trabajadores nuevos (forkserver o spawn) importen estas clases
+
+    Esos procesos no heredan sys.modules, pero sí el sys.path del padre: se antepone un
+    paquete weasyprint que reexporta las clases de prueba durante el test.
+    """
+    directory = tempfile.mkdtemp()
+    package = Path(directory) / 'weasyprint'
+    (package / 'text').mkdir(parents=True)
+    (package / '__init__.py').write_text(
+        "from weasyprint_stub import FakeCSS as CSS, FakeHTML as HTML\n__version__ = 'stub'\n", encoding='utf-8')
+    (package / 'text' / '__init__.py').write_text('', encoding='utf-8')
+    (package / 'text' / 'fonts.py').write_text(
+        "from weasyprint_stub import FakeFontConfiguration as FontConfiguration\n", encoding='utf-8')
+    sys.path.insert(0, directory)
+    testcase.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+    testcase.addCleanup(sys.path.remove, directory)
+
+
+install()